@@ -0,0 +1,112 @@
+# File: bench_load.py
+# Description: Benchmark of manifest loading, single read pass vs verify-then-parse
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#usage (from the repository root):
+#   python benchmarks/bench_load.py [--sizes 100000 400000] [--formats json jsonl binary] [--dir /tmp/bench]
+#the old path hashes the file, then reads it again to parse it; both runs read
+#from the page cache here, so the gap on a cold disk is larger than shown
+
+#imports
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.manifest import load, save, verify_signature, is_binary, is_jsonl, read_header, iter_records #noqa: E402
+
+_SUFFIXES = {"json": ".json", "jsonl": ".jsonl", "binary": ".vlb"}
+
+
+def _digest(s: str) -> str:
+    return hashlib.sha256(s.encode()).hexdigest()
+
+
+def synthetic_manifest(n: int) -> dict:
+    """Manifest of n text files, each with a text block of four chunks"""
+    files = []
+    for i in range(n):
+        path = f"dir{i % 100}/file{i:07d}.txt"
+        files.append({
+            "path": path,
+            "ext": ".txt",
+            "size": 1000 + i,
+            "mtime": 1700000000,
+            "ctime": 1700000000,
+            "mode": 33188,
+            "mtime_ns": 1700000000000000000 + i,
+            "ctime_ns": 1700000000000000000 + i,
+            "inode": 100000 + i,
+            "raw_hash": _digest(f"r{i}"),
+            "text": {
+                "kind": "text",
+                "hash": _digest(f"t{i}"),
+                "snapshot": path + ".txt",
+                "chunking": {"method": "lines", "max_lines": 20},
+                "chunks": [_digest(f"{i}-{j}") for j in range(4)],
+            },
+        })
+    files.sort(key=lambda rec: rec["path"])
+    return {"schema_version": 4, "algorithm": "sha256", "base_dir": "/data", "snapshot_dir": "/snapshots", "files": files}
+
+
+def two_pass_load(path: Path) -> dict:
+    """The previous load: hash the whole file, then read it again to parse it"""
+    verify_signature(path)
+    if is_binary(path) or is_jsonl(path):
+        data = read_header(path)
+        data["files"] = list(iter_records(path))
+        return data
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _best_of(fn, path: Path, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = fn(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del data
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manifest load benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 400000])
+    parser.add_argument("--formats", nargs="+", choices=list(_SUFFIXES), default=list(_SUFFIXES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", help="Where to write the manifests (default: a temporary directory)")
+    args = parser.parse_args()
+
+    work = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="verilite-bench-"))
+    work.mkdir(parents=True, exist_ok=True)
+    try:
+        print(f"{'files':>10} {'format':>7} {'MB':>8} {'two-pass s':>11} {'one-pass s':>11} {'speedup':>8}")
+        for n in args.sizes:
+            manifest = synthetic_manifest(n)
+            for fmt in args.formats:
+                path = work / f"bench_{n}{_SUFFIXES[fmt]}"
+                save(dict(manifest), path, "sha256", fmt=fmt)
+                size_mb = path.stat().st_size / 1e6
+
+                old = _best_of(two_pass_load, path, args.repeat)
+                new = _best_of(load, path, args.repeat)
+                print(f"{n:>10} {fmt:>7} {size_mb:>8.1f} {old:>11.3f} {new:>11.3f} {old / new:>7.2f}x")
+            del manifest
+    finally:
+        if not args.dir:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# File: bench_report.py
+# Description: Benchmark showing report construction scales linearly with the number of changes
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#usage (from the repository root):
+#   python benchmarks/bench_report.py [--sizes 10000 20000 40000 80000]
+
+#imports
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.cli import build_report #noqa: E402
+from fic.compare import compare_baselines, _index_files #noqa: E402
+
+
+def _digest(s: str) -> str:
+    return hashlib.sha256(s.encode()).hexdigest()
+
+
+def synthetic_manifests(n: int) -> tuple[dict, dict]:
+    """Baseline and current manifests of n text files where every file was modified"""
+    def manifest(tag: str, snapshot_dir: str) -> dict:
+        files = []
+        for i in range(n):
+            path = f"dir{i % 100}/file{i}.txt"
+            files.append({
+                "path": path,
+                "raw_hash": _digest(f"{tag}{i}"),
+                "text": {
+                    "kind": "text",
+                    "hash": _digest(f"{tag}t{i}"),
+                    "snapshot": path + ".txt",
+                    "chunking": {"method": "lines", "max_lines": 20},
+                    "chunks": [_digest(f"{tag}{i}-{j}") for j in range(2)],
+                },
+            })
+        return {"algorithm": "sha256", "snapshot_dir": snapshot_dir, "files": files}
+
+    return manifest("b", "/tmp/snapshots_baseline"), manifest("c", "/tmp/snapshots_current")
+
+
+def bench(n: int) -> float:
+    baseline, current = synthetic_manifests(n)
+    base_idx = _index_files(baseline)
+    curr_idx = _index_files(current)
+    modified, added, deleted = compare_baselines(baseline, current, base_idx=base_idx, curr_idx=curr_idx)
+
+    start = time.perf_counter()
+    report = build_report(
+        baseline, current, modified, added, deleted, "/tmp/data", "/tmp/baseline.json", "sha256",
+        base_idx, curr_idx
+    )
+    elapsed = time.perf_counter() - start
+    assert len(report["modified"]) == n
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report construction benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 40000, 80000])
+    args = parser.parse_args()
+
+    print(f"{'files':>10} {'seconds':>10} {'us/file':>10}")
+    for n in args.sizes:
+        elapsed = bench(n)
+        #constant us/file across sizes means the report stage is linear
+        print(f"{n:>10} {elapsed:>10.3f} {elapsed / n * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
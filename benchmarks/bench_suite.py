@@ -0,0 +1,283 @@
+# File: bench_suite.py
+# Description: Reproducible benchmark suite over synthetic trees, with JSON results for regression checks
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#usage (from the repository root):
+#   python benchmarks/bench_suite.py --out results.json [--profiles small mixed] [--scales 1 2 4]
+#   python benchmarks/bench_suite.py --out new.json --compare old.json [--tolerance 0.25]
+#trees come from synth.py, so the same profile/scale/seed always times the same input
+#--compare exits with status 1 if any operation got slower than the tolerance allows
+
+#imports
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+#makes the fic and gui packages importable without installing them
+sys.path.insert(0, str(HERE.parent / "src"))
+sys.path.insert(0, str(HERE))
+
+from synth import PROFILES, generate_tree, modify_tree #noqa: E402
+from fic.scanner import build_baseline #noqa: E402
+from fic.compare import compare_baselines, _index_files #noqa: E402
+from fic.manifest import save, load, MANIFEST_FORMATS #noqa: E402
+from fic.cli import build_report, write_report #noqa: E402
+from fic.utils import default_chunking #noqa: E402
+from fic.snapfile import encode_snapshot, COMPRESSED_SUFFIX #noqa: E402
+from gui.helpers import load_report, load_spans, render_colored_lines #noqa: E402
+
+SUITE_VERSION = 1
+_SUFFIXES = {"json": ".json", "jsonl": ".jsonl", "binary": ".vlb"}
+_NOISE_FLOOR = 0.005 #seconds; smaller differences are never reported as regressions
+
+
+def _best_of(fn, repeat: int):
+    """(best wall time, result of the last call)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _entry(profile: str, scale: int, op: str, seconds: float, files: int = 0, size: int = 0) -> dict:
+    return {
+        "profile": profile,
+        "scale": scale,
+        "op": op,
+        "seconds": round(seconds, 6),
+        "files": files,
+        "bytes": size,
+        "files_per_second": round(files / seconds, 1) if files and seconds > 0 else None,
+        "mb_per_second": round(size / 1e6 / seconds, 2) if size and seconds > 0 else None,
+    }
+
+
+def bench_tree(work: Path, profile: str, scale: int, seed: int, repeat: int, workers: int) -> list[dict]:
+    """Times the scan, compare, manifest and report stages on one synthetic tree"""
+    tree = work / "tree"
+    info = generate_tree(tree, profile, scale, seed)
+    files, size = info["files"], info["bytes"]
+    out = []
+
+    def scan(name: str):
+        return build_baseline(
+            str(tree), "sha256", str(work / "baseline.json"), snapshot_dir=str(work / name), workers=workers
+        )
+
+    seconds, baseline = _best_of(lambda: scan("snapshots_baseline"), repeat)
+    out.append(_entry(profile, scale, "build_baseline", seconds, files, size))
+
+    modify_tree(tree, 0.01, seed)
+    current = scan("snapshots_current")
+
+    def compare():
+        base_idx = _index_files(baseline)
+        curr_idx = _index_files(current)
+        return compare_baselines(baseline, current, base_idx=base_idx, curr_idx=curr_idx), base_idx, curr_idx
+
+    seconds, ((modified, added, deleted), base_idx, curr_idx) = _best_of(compare, repeat)
+    out.append(_entry(profile, scale, "compare_baselines", seconds, files))
+
+    #the comparison above used the Merkle shortcut; this is the full per-file comparison
+    no_merkle_b = dict(baseline, merkle=None)
+    no_merkle_c = dict(current, merkle=None)
+    seconds, _ = _best_of(lambda: compare_baselines(no_merkle_b, no_merkle_c), repeat)
+    out.append(_entry(profile, scale, "compare_baselines_full", seconds, files))
+
+    for fmt in MANIFEST_FORMATS:
+        path = work / f"manifest{_SUFFIXES[fmt]}"
+        seconds, _ = _best_of(lambda: _quiet(save, dict(baseline), str(path), "sha256", fmt=fmt), repeat)
+        manifest_size = path.stat().st_size
+        out.append(_entry(profile, scale, f"save_{fmt}", seconds, files, manifest_size))
+        seconds, _ = _best_of(lambda: load(str(path)), repeat)
+        out.append(_entry(profile, scale, f"load_{fmt}", seconds, files, manifest_size))
+
+    def report():
+        data = build_report(
+            baseline, current, modified, added, deleted, str(tree), str(work / "baseline.json"), "sha256",
+            base_idx, curr_idx
+        )
+        write_report(data, str(work / "baseline.report.json"))
+        return data
+
+    seconds, _ = _best_of(report, repeat)
+    changes = len(modified) + len(added) + len(deleted)
+    out.append(_entry(profile, scale, "report_write", seconds, changes))
+    #the first thing the GUI does with a report
+    seconds, _ = _best_of(lambda: load_report(work / "baseline.report.json"), repeat)
+    out.append(_entry(profile, scale, "report_load", seconds, changes))
+    return out
+
+
+def bench_gui(work: Path, scale: int, seed: int, repeat: int) -> list[dict]:
+    """
+    Times what the GUI runs for a modified file, on a synthetic snapshot pair of
+    20000 * scale lines: load_spans on plain and compressed snapshots, then
+    reading and rendering every changed chunk side by side
+    """
+    import random
+    rng = random.Random(f"gui:{scale}:{seed}")
+    words = ("evidence", "ledger", "exhibit", "transfer", "custody", "digest", "seal", "witness")
+    lines = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 10))) for _ in range(20000 * scale)]
+    text = "\n".join(lines) + "\n"
+    edited = "\n".join(line.upper() if i % 97 == 0 else line for i, line in enumerate(lines)) + "\n"
+    size = len(text.encode())
+    out = []
+
+    for method in ("lines", "cdc"):
+        chunking = default_chunking(method)
+        paths = {}
+        for name, content in (("baseline", text), ("current", edited)):
+            plain = work / f"{name}_{method}.txt"
+            plain.write_text(content, encoding="utf-8")
+            framed = work / f"{name}_{method}.txt{COMPRESSED_SUFFIX}"
+            framed.write_bytes(encode_snapshot(content, chunking, "zlib"))
+            paths[name] = (plain, framed)
+
+        for variant, k in (("plain", 0), ("zlib", 1)):
+            def view_changes():
+                base_spans = load_spans(paths["baseline"][k], chunking)
+                curr_spans = load_spans(paths["current"][k], chunking)
+                n = min(len(base_spans), len(curr_spans))
+                shown = 0
+                for i in range(n): #the GUI shows one chunk at a time; this walks every changed one
+                    b, c = base_spans[i], curr_spans[i]
+                    if b[2] != c[2]:
+                        render_colored_lines(b[2], c[2], b[0] + 1, c[0] + 1)
+                        shown += 1
+                return shown
+
+            seconds, _ = _best_of(lambda: load_spans(paths["current"][k], chunking), repeat)
+            out.append(_entry("gui", scale, f"load_spans_{variant}_{method}", seconds, 0, size))
+            seconds, _ = _best_of(view_changes, repeat)
+            out.append(_entry("gui", scale, f"view_chunks_{variant}_{method}", seconds, 0, size))
+    return out
+
+
+def _quiet(fn, *args, **kwargs):
+    #save() prints a confirmation line, keep the benchmark output readable
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    extractors = {}
+    for name, module in (("pdf", "fitz"), ("docx", "docx")):
+        try:
+            __import__(module)
+            extractors[name] = True
+        except ImportError: #documents are still hashed, only their text snapshot is empty
+            extractors[name] = False
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+        "extractors": extractors,
+    }
+
+
+def compare_results(old: dict, new: dict, tolerance: float) -> list[str]:
+    """Operations slower than old * (1 + tolerance), as printable lines"""
+    previous = {(r["profile"], r["scale"], r["op"]): r["seconds"] for r in old.get("results", [])}
+    regressions = []
+    for r in new.get("results", []):
+        before = previous.get((r["profile"], r["scale"], r["op"]))
+        if before is None:
+            continue
+        if r["seconds"] > before * (1 + tolerance) and r["seconds"] - before > _NOISE_FLOOR:
+            regressions.append(
+                f"{r['profile']} x{r['scale']} {r['op']}: {before:.4f}s -> {r['seconds']:.4f}s "
+                f"(+{(r['seconds'] / before - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VeriLite benchmark suite")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES + ["gui"], default=PROFILES + ["gui"])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the fastest is kept")
+    parser.add_argument("--workers", type=int, default=1, help="build_baseline workers")
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", metavar="RESULTS", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown with --compare (0.25 = 25%%)")
+    parser.add_argument("--dir", help="Where to generate the trees (default: a temporary directory, removed after)")
+    args = parser.parse_args()
+
+    results = []
+    root = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="verilite-suite-"))
+    try:
+        for scale in args.scales:
+            for profile in args.profiles:
+                print(f"-- {profile} x{scale}")
+                work = root / f"{profile}_x{scale}"
+                if work.exists():
+                    shutil.rmtree(work)
+                work.mkdir(parents=True)
+                if profile == "gui":
+                    rows = bench_gui(work, scale, args.seed, args.repeat)
+                else:
+                    rows = bench_tree(work, profile, scale, args.seed, args.repeat, args.workers)
+                shutil.rmtree(work, ignore_errors=True)
+                for r in rows:
+                    rate = f"{r['files_per_second']:.0f} files/s" if r["files_per_second"] else ""
+                    if r["mb_per_second"]:
+                        rate += f" {r['mb_per_second']:.1f} MB/s"
+                    print(f"   {r['op']:<26} {r['seconds']:>9.4f}s  {rate}")
+                results.extend(rows)
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    output = {
+        "suite_version": SUITE_VERSION,
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "workers": args.workers,
+        "environment": _environment(),
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(output, indent=2), encoding="utf-8")
+    print(f"\nResults written: {args.out}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_results(old, output, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance * 100:.0f}%:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions over {args.tolerance * 100:.0f}% against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# File: synth.py
+# Description: Deterministic synthetic evidence trees for the benchmark suite
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#usage (from the repository root):
+#   python benchmarks/synth.py /tmp/tree --profile mixed --scale 2 [--seed 1]
+#the same profile, scale and seed always give byte-identical files (and mtimes)
+
+#imports
+import argparse
+import os
+import random
+import zipfile
+from pathlib import Path
+
+PROFILES = ["small", "huge", "deep", "mixed"]
+
+FIXED_MTIME = 1_700_000_000 #every generated file gets this mtime, so stat data is reproducible too
+_ZIP_TIME = (2020, 1, 1, 0, 0, 0) #fixed timestamps inside .docx archives
+
+_WORDS = (
+    "evidence integrity baseline snapshot chunk verify report folder archive ledger invoice "
+    "transfer account witness statement exhibit hash record custody seal digest audit"
+).split()
+
+
+def _text_lines(rng: random.Random, n_lines: int) -> list[str]:
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 12))) for _ in range(n_lines)]
+
+
+def _csv_text(rng: random.Random, n_rows: int) -> str:
+    rows = ["id,account,amount,reference"]
+    for i in range(n_rows):
+        rows.append(f"{i},{rng.randint(10000, 99999)},{rng.randint(1, 100000) / 100:.2f},{rng.choice(_WORDS)}")
+    return "\n".join(rows) + "\n"
+
+
+def _log_text(rng: random.Random, n_lines: int) -> str:
+    levels = ("INFO", "WARN", "ERROR", "DEBUG")
+    return "".join(
+        f"2026-01-{1 + i % 28:02d} 12:{i % 60:02d}:{(i * 7) % 60:02d} {rng.choice(levels)} {line}\n"
+        for i, line in enumerate(_text_lines(rng, n_lines))
+    )
+
+
+def minimal_docx(paragraphs: list[str]) -> bytes:
+    """Smallest .docx that python-docx opens: content types, package rels and a document part"""
+    import io
+    from xml.sax.saxutils import escape
+
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paragraphs)
+    parts = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/>'
+            '</Relationships>'
+        ),
+        "word/document.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ),
+    }
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, xml in parts.items():
+            z.writestr(zipfile.ZipInfo(name, date_time=_ZIP_TIME), xml)
+    return buf.getvalue()
+
+
+def minimal_pdf(lines: list[str]) -> bytes:
+    """Single-page PDF with one Helvetica text line per entry and a valid xref table"""
+    def esc(s: str) -> str:
+        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+    for line in lines[:60]: #one page worth of lines
+        ops.append(f"({esc(line)}) Tj T*")
+    ops.append("ET")
+    stream = "\n".join(ops).encode("latin-1", errors="replace")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _file_bytes(rng: random.Random, ext: str, size_hint: int) -> bytes:
+    n_lines = max(1, size_hint // 60)
+    if ext == ".txt":
+        return ("\n".join(_text_lines(rng, n_lines)) + "\n").encode()
+    if ext == ".csv":
+        return _csv_text(rng, n_lines).encode()
+    if ext == ".log":
+        return _log_text(rng, n_lines).encode()
+    if ext == ".docx":
+        return minimal_docx(_text_lines(rng, n_lines))
+    if ext == ".pdf":
+        return minimal_pdf(_text_lines(rng, n_lines))
+    return rng.randbytes(size_hint) #.bin and anything else
+
+
+def _plan(profile: str, scale: int, rng: random.Random) -> list[tuple[str, str, int]]:
+    """(relative path, extension, size hint in bytes) for every file of a profile"""
+    plan = []
+    if profile == "small": #many small files in a flat-ish tree
+        for i in range(2000 * scale):
+            ext = rng.choice((".txt", ".log", ".csv", ".bin"))
+            plan.append((f"d{i % 50:02d}/f{i:06d}{ext}", ext, rng.randint(200, 2000)))
+    elif profile == "huge": #few large binary files
+        for i in range(3):
+            plan.append((f"images/disk{i}.bin", ".bin", 32 * 1024 * 1024 * scale))
+        plan.append(("images/notes.txt", ".txt", 4000))
+    elif profile == "deep": #long directory chains
+        for branch in range(4 * scale):
+            path = f"b{branch:02d}"
+            for depth in range(30):
+                path += f"/l{depth:02d}"
+                for j in range(3):
+                    ext = (".txt", ".log", ".bin")[j]
+                    plan.append((f"{path}/f{j}{ext}", ext, rng.randint(200, 1500)))
+    elif profile == "mixed": #office-like mix including documents
+        exts = (".txt", ".csv", ".log", ".docx", ".pdf")
+        for i in range(300 * scale):
+            ext = exts[i % len(exts)]
+            plan.append((f"case{i % 12:02d}/{ext[1:]}/doc{i:05d}{ext}", ext, rng.randint(500, 20000)))
+    else:
+        raise ValueError(f"Unknown profile: {profile}")
+    return plan
+
+
+def generate_tree(root, profile: str, scale: int = 1, seed: int = 1) -> dict:
+    """
+    Writes a synthetic tree under root (which should be empty)
+    Returns {"files", "bytes"} for the tree
+    """
+    root = Path(root)
+    rng = random.Random(f"{profile}:{scale}:{seed}")
+    total = 0
+    plan = _plan(profile, scale, rng)
+    for rel, ext, size_hint in plan:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if ext == ".bin" and size_hint >= 1024 * 1024: #large binaries written in blocks
+            block = rng.randbytes(1024 * 1024)
+            with open(path, "wb") as f:
+                for k in range(size_hint // len(block)):
+                    f.write(block[k % 997:] + block[:k % 997]) #rotated so blocks differ
+            total += size_hint
+        else:
+            data = _file_bytes(rng, ext, size_hint)
+            path.write_bytes(data)
+            total += len(data)
+        os.utime(path, (FIXED_MTIME, FIXED_MTIME))
+    return {"files": len(plan), "bytes": total}
+
+
+def modify_tree(root, fraction: float = 0.01, seed: int = 1) -> list[str]:
+    """
+    Deterministically changes a fraction of the files under root (appends a line
+    to text files, flips a byte in others); returns the changed relative paths
+    """
+    root = Path(root)
+    files = sorted(p for p in root.rglob("*") if p.is_file())
+    rng = random.Random(f"modify:{seed}")
+    chosen = rng.sample(files, max(1, int(len(files) * fraction))) if files else []
+    for path in chosen:
+        if path.suffix in (".txt", ".csv", ".log"):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("modified by benchmark\n")
+        else:
+            with open(path, "r+b") as f:
+                f.seek(path.stat().st_size // 2)
+                b = f.read(1) or b"\0"
+                f.seek(path.stat().st_size // 2)
+                f.write(bytes([b[0] ^ 0xFF]))
+    return sorted(str(p.relative_to(root)) for p in chosen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic tree")
+    parser.add_argument("root")
+    parser.add_argument("--profile", choices=PROFILES, default="mixed")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    info = generate_tree(args.root, args.profile, args.scale, args.seed)
+    print(f"{args.profile} x{args.scale}: {info['files']} files, {info['bytes'] / 1e6:.1f} MB in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
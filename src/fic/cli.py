@@ -13,21 +13,67 @@ from pathlib import Path
 from datetime import datetime
 
 #custom modules from code already written
-from .scanner import build_baseline
-from .manifest import save, load
-from .compare import compare_baselines
-from .utils import to_hex_string, log_event
+from .scanner import build_baseline, rescan_paths, ScanOptions, PipelineOptions, SNAPSHOT_DIR_NAMES, tree_hash_options, tree_hash_mismatch
+from .pipeline import format_stats
+from .metrics import ScanMetrics, DEFAULT_SLOWEST
+from .exporter import MetricsExporter
+from .ignore import ExcludeRules, read_ignore_file
+from .store import SnapshotStore, STORE_DIR_NAME, manifest_text_hashes
+from .snapfile import SNAPSHOT_CODECS
+from .manifest import save, load, MANIFEST_FORMATS
+from .compare import compare_baselines, iter_changes, _index_files
+from .utils import to_hex_string, log_event, default_chunking, CHUNKING_METHODS, HASH_ALGORITHMS, screen_settings
+from .utils import tree_hash_settings
+from .watcher import InotifyWatcher, WatcherUnavailable
 
-SUPPORTED_HASHES = ["sha256", "md5", "sha1"]
+SUPPORTED_HASHES = HASH_ALGORITHMS
 
-def write_report(report: dict, report_path: str) -> None:
+def write_report(report: dict, report_path: str, metrics: ScanMetrics | None = None) -> None:
+    #metrics: added as the report's "metrics" section; the dump itself is timed as
+    #report_serialize, so that stage shows in the summary line but not in the file
     out = Path(report_path)
     out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(json.dumps(report, indent=4, ensure_ascii=False), encoding="utf-8")
+    if metrics is None:
+        out.write_text(json.dumps(report, indent=4, ensure_ascii=False), encoding="utf-8")
+        return
+    report = dict(report) #the caller's report is left without the section
+    report["metrics"] = metrics.as_dict()
+    with metrics.stage("report_serialize"):
+        text = json.dumps(report, indent=4, ensure_ascii=False)
+    out.write_text(text, encoding="utf-8")
 
 #create baseline
-def create_baseline(folder, output_path = "baseline.json", algorithm="sha256"):
+def create_baseline(
+    folder,
+    output_path = "baseline.json",
+    algorithm="sha256",
+    workers=1,
+    pool="thread",
+    fmt=None,
+    chunking="lines",
+    excludes=None,
+    snapshot_store=False,
+    compress_snapshots=None,
+    digests=None,
+    screen_min_size=None,
+    tree_min_size=None,
+    tree_segment_size=None,
+    tree_workers=0,
+    pipeline=None,
+    metrics=False,
+    slowest=DEFAULT_SLOWEST
+):
     #scans folder and saves file to baseline.json
+    #fmt: json, jsonl or binary, defaults from the output suffix (.jsonl / .vlb)
+    #excludes: extra --exclude globs, added to the folder's .veriliteignore
+    #snapshot_store: keep snapshots in a content-addressed store (see store.py)
+    #compress_snapshots: None, "zlib" or "lzma" (snapshots framed per chunk, see snapfile.py)
+    #digests: extra algorithms (e.g. md5) stored per file, computed in the same read as the main hash
+    #screen_min_size: MiB; files this large also get a sampled screen hash for verify --screen
+    #tree_min_size: MiB; files this large are tree-hashed in tree_segment_size MiB segments,
+    #using tree_workers threads per file (0: one per CPU)
+    #pipeline: PipelineOptions to run the scan as overlapping stages (stats are printed afterwards)
+    #metrics: time the scan stages and the slowest files, printed and logged as one summary line
 
     #check if folder exists
     if not os.path.exists(folder):
@@ -40,167 +86,557 @@ def create_baseline(folder, output_path = "baseline.json", algorithm="sha256"):
     log_event(f"Hash algorithm in use: {algorithm}")
 
     out_path = Path(output_path).resolve()
-    snapshot_dir = str((out_path.parent / "snapshots_baseline").resolve())
+    if snapshot_store: #content-addressed store, shared with verify runs
+        snapshot_dir = str((out_path.parent / STORE_DIR_NAME).resolve())
+    else:
+        snapshot_dir = str((out_path.parent / "snapshots_baseline").resolve())
+
+    digests = tuple(d for d in dict.fromkeys(digests or []) if d != algorithm)
+    options = ScanOptions(
+        chunking=default_chunking(chunking), snapshot_store=snapshot_store, snapshot_compression=compress_snapshots,
+        digests=digests, screen=screen_settings(screen_min_size) if screen_min_size is not None else None,
+        tree_hash=tree_hash_settings(tree_min_size, tree_segment_size) if tree_min_size is not None else None,
+        tree_workers=tree_workers
+    )
+    if digests:
+        print(f"Extra digests: {', '.join(digests)}")
+    if options.screen:
+        print(f"Pre-screen hashes for files of {screen_min_size} MiB or more")
+    if options.tree_hash:
+        print(
+            f"Tree hash for files of {tree_min_size} MiB or more "
+            f"({options.tree_hash['segment_size'] // (1024 * 1024)} MiB segments)"
+        )
+    if compress_snapshots:
+        print(f"Snapshot compression: {compress_snapshots}")
+    print(f"Text chunking: {chunking}")
+
+    patterns = read_ignore_file(folder) + list(excludes or [])
+    if patterns:
+        print(f"Excluding: {', '.join(patterns)}")
+
+    scan_metrics = ScanMetrics(slowest) if metrics else None
+    pipeline_stats = {}
+    baseline = build_baseline( #will return file path and hash
+        folder, algorithm, output_path, snapshot_dir=snapshot_dir, workers=workers, pool=pool, options=options,
+        excludes=patterns, pipeline=pipeline, pipeline_stats=pipeline_stats, metrics=scan_metrics
+    )
+    _print_pipeline_stats(pipeline_stats)
 
-    baseline = build_baseline(folder, algorithm, output_path, snapshot_dir=snapshot_dir) #will return file path and hash
+    if fmt is None:
+        fmt = {".jsonl": "jsonl", ".vlb": "binary"}.get(Path(output_path).suffix.lower(), "json")
 
     #save generated output
-    save(baseline, output_path, algorithm)
+    if scan_metrics is not None:
+        with scan_metrics.stage("manifest_save"):
+            save(baseline, output_path, algorithm, fmt=fmt)
+    else:
+        save(baseline, output_path, algorithm, fmt=fmt)
     print(f"Saved to {output_path}!")
+    _print_metrics(scan_metrics)
+
+    if snapshot_store:
+        _update_store_refs(SnapshotStore(snapshot_dir), out_path, "baseline", baseline["files"])
+
+def _print_pipeline_stats(stats: dict) -> None:
+    #queue depths and utilisation per stage, for tuning --workers/--extract-workers/--queue-size
+    if stats:
+        summary = format_stats(stats)
+        print(summary)
+        log_event(summary)
+
+def _print_metrics(metrics: ScanMetrics | None) -> None:
+    #one line per scan: where the time went, throughput and the slowest file
+    if metrics is None:
+        return
+    summary = metrics.summary()
+    print(summary)
+    log_event(summary)
+
+def _update_store_refs(store: SnapshotStore, baseline_path: Path, role: str, records) -> None:
+    """
+    Registers the snapshots a manifest uses in the store, then deletes blobs
+    that no manifest refers to any more
+    role: "baseline" or "current" (the latest verify scan against that baseline)
+    """
+    store.set_refs(f"{baseline_path.name}.{role}", manifest_text_hashes(records))
+    removed = store.gc()
+    if removed:
+        log_event(f"Snapshot store: removed {removed} unused snapshot(s)")
 
-def _snapshot_rel_path(manifest: dict, file_rel_path: str) -> str | None:
-    files = manifest.get("files", [])
-    for rec in files:
-        if rec.get("path") == file_rel_path:
-            text = rec.get("text")
-            if not text:
-                return None
-            return text.get("snapshot")
-    return None
-
-def _snapshot_abs_path(manifest: dict, file_rel_path: str) -> str | None:
+def _baseline_chunking(baseline: dict) -> dict:
+    """
+    Chunking settings the baseline was built with, so verify chunks the same way
+    Older manifests only record it per file, or not at all (20-line windows)
     """
-    Returns absolute path to the snapshot txt for a given file path in a manifest,
+    if baseline.get("chunking"):
+        return baseline["chunking"]
+    for rec in baseline.get("files", []):
+        text = rec.get("text")
+        if text and text.get("chunking"):
+            return dict(text.get("chunking"))
+    return default_chunking()
+
+def _snapshot_rel_path(record) -> str | None:
+    """Snapshot path (relative to the snapshot folder) stored in a file record, or None"""
+    if not record:
+        return None
+    text = record.get("text")
+    if not text:
+        return None
+    return text.get("snapshot")
+
+def _snapshot_abs_path(snap_root: Path, record) -> str | None:
+    """
+    Returns absolute path to the snapshot txt for a file record,
     or None if not available.
     """
-    snap_root = Path(manifest.get("snapshot_dir", "")).resolve()
-    files = manifest.get("files", [])
-
-    for rec in files:
-        if rec.get("path") == file_rel_path:
-            text = rec.get("text")
-            if not text:
-                return None
-            snap_rel = text.get("snapshot")
-            if not snap_rel:
-                return None
-            return str((snap_root / snap_rel).resolve())
-
-    return None
-
-def verify(folder, baseline_path="baseline.json", watch=False, interval=60, algorithm="sha256"):
+    snap_rel = _snapshot_rel_path(record)
+    if not snap_rel:
+        return None
+    #snap_root is already resolved, and snapshot folders are created by us (no symlinks)
+    return os.path.normpath(os.path.join(snap_root, snap_rel))
+
+def build_report(
+    baseline: dict,
+    current: dict,
+    modified: dict,
+    added: list,
+    deleted: list,
+    folder,
+    baseline_path,
+    algorithm,
+    base_idx: dict,
+    curr_idx: dict
+) -> dict:
+    """
+    Builds the JSON report for the GUI
+    Snapshot paths are looked up in the {path: record} indexes already built
+    for the comparison, so this is linear in the number of changes
+    """
+    base_snap_root = Path(baseline.get("snapshot_dir", "")).resolve()
+    curr_snap_root = Path(current.get("snapshot_dir", "")).resolve()
+
+    report = {
+        "schema_version": 1,
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "algorithm": algorithm,
+        "digests": list(baseline.get("digests") or []),
+        "folder": os.path.abspath(folder),
+        "baseline_path": os.path.abspath(baseline_path),
+        #both snapshot paths point into one content-addressed store (see store.py)
+        "snapshot_store": bool(baseline.get("snapshot_store")),
+
+        "summary": {
+            "modified": len(modified),
+            "added": len(added),
+            "deleted": len(deleted),
+        },
+
+        "modified": [],
+        "added": added,
+        "deleted": deleted,
+
+        #which check each file got when large files are pre-screened (None otherwise)
+        "checks": _check_summary(current),
+    }
+
+    for path, info in modified.items():
+        report["modified"].append(
+            _modified_entry(path, info, base_idx.get(path), curr_idx.get(path), base_snap_root, curr_snap_root)
+        )
+
+    return report
+
+def _check_summary(current: dict) -> dict | None:
+    """
+    Counts of files verified by a full hash or only by the sampled pre-screen,
+    with the paths of both kinds of pre-screened files:
+    screened (sample matched the baseline, not fully hashed) and
+    suspected (sample differed or was new, so the file was fully hashed)
+    """
+    if not current.get("screen"):
+        return None
+    screened, suspected = [], []
+    total = 0
+    for rec in current.get("files", []):
+        total += 1
+        check = rec.get("check")
+        if check == "screen":
+            screened.append(rec.get("path"))
+        elif check == "full":
+            suspected.append(rec.get("path"))
+    return {
+        "min_size": current["screen"].get("min_size"),
+        "full": total - len(screened),
+        "screen": len(screened),
+        "screened": screened,
+        "suspected": suspected,
+    }
+
+def _modified_entry(path: str, info: dict, b_rec, c_rec, base_snap_root: Path, curr_snap_root: Path) -> dict:
+    """One entry of the report's "modified" list"""
+    return {
+        "path": path,
+
+        "baseline_raw": info.get("baseline_raw"),
+        "current_raw": info.get("current_raw"),
+        "raw_changed": info.get("raw_changed"),
+        #tree-hashed files: segment size and the indices of the segments that changed
+        "segment_info": info.get("segment_info"),
+        #"screen" if the current raw hash was kept on a matching sample, "full" otherwise
+        "check": (c_rec.get("check") or "full") if c_rec is not None else None,
+        #secondary digests ({algorithm: hex}) when the baseline stores them
+        "baseline_digests": b_rec.get("digests") if b_rec is not None else None,
+        "current_digests": c_rec.get("digests") if c_rec is not None else None,
+
+        "text_changed": info.get("text_changed"),
+        "baseline_text_hash": info.get("baseline_text_hash"),
+        "current_text_hash": info.get("current_text_hash"),
+        "text_note": info.get("text_note"),
+
+        #includes changed_indices/added_indices/removed_indices
+        "chunk_info": info.get("chunk_info"),
+
+        #snapshot file locations
+        "baseline_snapshot_path": _snapshot_abs_path(base_snap_root, b_rec),
+        "current_snapshot_path": _snapshot_abs_path(curr_snap_root, c_rec),
+
+        #snapshot file locations (relative inside snapshots folder) - needed for ZIP bundles
+        "baseline_snapshot_rel": _snapshot_rel_path(b_rec),
+        "current_snapshot_rel": _snapshot_rel_path(c_rec),
+    }
+
+def _report_changes(
+    baseline: dict, current: dict, folder, baseline_path, algorithm, base_idx=None, metrics=None, exporter=None
+) -> bool:
+    """
+    Compares a scan against the baseline, writes the JSON report and prints the summary
+    base_idx: {path: record} index of the baseline, built once per verify run
+    metrics: ScanMetrics of this scan; compare and report times are added and
+    the whole set is written to the report's "metrics" section
+    exporter: MetricsExporter that serves this scan's results (watch mode)
+    Returns True if any change was detected
+    """
+    start = time.perf_counter()
+    if base_idx is None:
+        base_idx = _index_files(baseline)
+    curr_idx = _index_files(current)
+
+    modified, added, deleted = compare_baselines(baseline, current, base_idx=base_idx, curr_idx=curr_idx)
+    #compared dictionaries with the help of comapare.py
+    if metrics is not None:
+        metrics.add_stage("compare", time.perf_counter() - start)
+        start = time.perf_counter()
+
+    #JSON report for GUI
+    report_path = str(Path(baseline_path).with_suffix(".report.json"))
+    report = build_report(
+        baseline, current, modified, added, deleted, folder, baseline_path, algorithm, base_idx, curr_idx
+    )
+    if metrics is not None:
+        metrics.add_stage("report_build", time.perf_counter() - start)
+
+    write_report(report, report_path, metrics)
+    print(f"\nReport written: {report_path}")
+    _print_metrics(metrics)
+    if exporter is not None:
+        exporter.record_scan(current, metrics.as_dict() if metrics is not None else None, modified, added, deleted)
+    checks = report.get("checks")
+    if checks and checks["screen"]:
+        #a matching sample is not proof, make it visible which files relied on it
+        print(f"Pre-screen: {checks['screen']} file(s) checked by sampled blocks only, {checks['full']} fully hashed")
+        log_event(f"Pre-screen: {checks['screen']} sampled only, {len(checks['suspected'])} suspected and fully hashed")
+
+    return _print_changes(modified, added, deleted)
+
+def _print_changes(modified: dict, added: list, deleted: list) -> bool:
+    """
+    Prints the verification summary and logs the counts
+    Returns True if any change was detected
+    """
+    print("\n=== Integrity Verification Report ===") #report header
+
+    if modified: #if list has been modified
+        print("\n[MODIFIED FILES]") #header
+        for path, info in modified.items(): #loop
+            print(f"\nFile: {path}") #print modified file paths
+    
+            print(f"Baseline Hash: {info['baseline_raw']}")
+            print(f"Current Hash: {info['current_raw']}")
+
+            print(f"Baseline Hex: {to_hex_string(info['baseline_raw'])}")
+            print(f"Current Hex: {to_hex_string(info['current_raw'])}")
+
+            if info.get("text_changed") is True: #if extracted text print changed
+                print("Text Snapshot: CHANGED")
+            elif info.get("text_changed") is False: #if not, say unchanged
+                print("Text Snapshot: UNCHANGED")
+            elif info.get("text_note"):
+                print(f"Text Snapshot: {info['text_note']}") #special condition
+
+            si = info.get("segment_info") #tree-hashed file, shows where it changed
+            if si:
+                shown = ", ".join(str(i) for i in si["changed"][:20])
+                more = f" (+{len(si['changed']) - 20} more)" if len(si["changed"]) > 20 else ""
+                print(
+                    f"Changed segments ({si['segment_size'] // (1024 * 1024)} MiB each): "
+                    f"{len(si['changed'])}/{max(si['total_baseline'], si['total_current'])} [{shown}]{more}"
+                )
+
+            ci = info.get("chunk_info") #pulls chunk comparison and prints ratio
+            if ci:
+                print(f"Chunk Tamper Ratio: {ci['tamper_ratio']}")
+                print( #prints baseline v current chunk count and added/removed
+                        f"Chunks baseline/current: {ci['total_baseline']}/{ci['total_current']} "
+                        f"(added {ci['added']}, removed {ci['removed']})"
+                    )
+    if added:
+        print("\n[ADDED FILES]")
+        for path in added:
+            print(path)
+    if deleted:
+        print("\n[DELETED FILES]")
+        for path in deleted:
+            print(path)
+            
+    if not modified and not added and not deleted:
+        print("\nNo changes detected")
+        log_event("No changes detected")
+        return False
+
+    log_event(
+        f"Modified: {len(modified)} Added: {len(added)} Deleted: {len(deleted)}"
+    )
+    return True
+
+def _start_watcher(folder, baseline_path, snapshot_dir, excludes=None):
+    """
+    Starts an inotify watcher for event-driven watch mode
+    excludes: the baseline's exclude globs, excluded folders get no watches
+    Returns None (polling fallback) if inotify is unavailable
+    """
+    base_path = Path(baseline_path).resolve()
+    root = Path(folder).resolve()
+    rules = ExcludeRules(excludes or [])
+    try:
+        watcher = InotifyWatcher(
+            folder,
+            skip_dirs=[snapshot_dir, *(base_path.parent / name for name in SNAPSHOT_DIR_NAMES)],
+            skip=(lambda path, is_dir: rules.covers(os.path.relpath(path, root), is_dir)) if rules else None,
+            #files VeriLite rewrites itself would otherwise retrigger a scan
+            ignore_files=[base_path.with_suffix(".report.json"), Path("verilite.log").resolve()]
+        )
+    except WatcherUnavailable as e:
+        print(f"inotify unavailable ({e}), falling back to polling")
+        log_event(f"inotify unavailable, polling instead: {e}")
+        return None
+
+    print("Event-driven watch mode: only touched paths are rescanned")
+    return watcher
+
+def verify(
+    folder,
+    baseline_path="baseline.json",
+    watch=False,
+    interval=60,
+    algorithm=None,
+    workers=1,
+    pool="thread",
+    fast=False,
+    paranoid=0,
+    prune_dirs=False,
+    reuse_text=False,
+    screen=False,
+    screen_full_every=0,
+    tree_workers=0,
+    pipeline=None,
+    events=False,
+    debounce=1.0,
+    full_rescan=3600,
+    metrics=False,
+    slowest=DEFAULT_SLOWEST,
+    metrics_port=None
+):
+    """
+    Verifies folder against the baseline, once or repeatedly with watch=True
+    events: in watch mode, use inotify to rescan only touched paths, with a full
+    rescan every full_rescan seconds as a safety net (polling every interval
+    seconds is used when inotify is unavailable)
+    algorithm: normally None, the algorithm recorded in the baseline is used
+    prune_dirs: reuse the previous scan's listing of directories whose mtime and
+    entry count are unchanged (skipped on paranoid cycles)
+    reuse_text: copy the baseline's text block for files whose raw hash is
+    unchanged instead of extracting their text again
+    screen: for files at or above the baseline's pre-screen size, hash only sampled
+    blocks and trust the baseline's hashes if they match; a mismatch triggers a
+    full hash. screen_full_every: fully hash them anyway every Nth scan (0: never)
+    tree_workers: threads per tree-hashed file (0: one per CPU); the tree settings
+    themselves come from the baseline
+    pipeline: PipelineOptions to run full scans as overlapping stages (see build_baseline)
+    metrics: time every scan (walk, hash, extract, snapshot write, compare, report)
+    and keep the slowest files; written to the report's "metrics" section and
+    logged as a summary line. The first scan also includes the baseline load
+    metrics_port: serve the last scan's metrics in Prometheus text format on
+    http://127.0.0.1:<port>/metrics (see exporter.py); turns metrics on
+    """
     if not os.path.exists(folder): #check if folder exists
         print("Please enter a valid folder")
         return
+
+    exporter = None
+    if metrics_port is not None:
+        metrics = True #stage latencies come from the scan metrics
+        exporter = MetricsExporter(metrics_port)
+        try:
+            exporter.start()
+        except OSError as e:
+            print(f"ERROR: cannot serve metrics on port {metrics_port}: {e}")
+            return
+        print(f"Metrics endpoint: http://{exporter.host}:{exporter.port}/metrics")
+        log_event(f"Metrics endpoint on port {exporter.port}")
     
-    baseline = load(baseline_path, algorithm) #loads baseline into python dictionary
+    #loads baseline, records kept as compact FileRecords for the life of the run
+    scan_metrics = ScanMetrics(slowest) if metrics else None
+    if scan_metrics is not None:
+        with scan_metrics.stage("manifest_load"):
+            baseline = load(baseline_path, algorithm, compact_records=True)
+    else:
+        baseline = load(baseline_path, algorithm, compact_records=True)
     print(f"Using baseline: {baseline_path} (verified)")
 
+    #the scan must hash like the baseline did, whatever --hash says
+    manifest_algorithm = baseline.get("algorithm")
+    if manifest_algorithm and manifest_algorithm != algorithm:
+        if algorithm:
+            print(f"Baseline was built with {manifest_algorithm}, using it instead of {algorithm}")
+        algorithm = manifest_algorithm
+    algorithm = algorithm or "sha256"
+
     print(f"Hash algorithm in use: {algorithm.upper()}")
     log_event(f"Hash algorithm in use: {algorithm}")
 
+    if fast:
+        print("Fast mode: files with an unchanged size/mtime/ctime/inode are not rehashed")
+        if paranoid:
+            print(f"Paranoid: full rehash every {paranoid} scans")
+    if prune_dirs:
+        print("Directory pruning: unchanged directories are not listed again")
+    if reuse_text:
+        print("Reusing baseline text snapshots for files whose raw hash is unchanged")
+
+    base_path = Path(baseline_path).resolve()
+    options = ScanOptions( #current snapshots are written the same way as the baseline's
+        chunking=_baseline_chunking(baseline), snapshot_store=bool(baseline.get("snapshot_store")),
+        snapshot_compression=baseline.get("snapshot_compression"), digests=tuple(baseline.get("digests") or ()),
+        screen=baseline.get("screen"), tree_hash=tree_hash_options(baseline), tree_workers=tree_workers
+    )
+    store = None
+    if options.snapshot_store: #current snapshots go into the baseline's store, unchanged texts are not rewritten
+        current_snapshot_dir = str((base_path.parent / STORE_DIR_NAME).resolve())
+        store = SnapshotStore(current_snapshot_dir)
+        store.set_refs(f"{base_path.name}.baseline", manifest_text_hashes(baseline["files"]))
+    else:
+        current_snapshot_dir = str((base_path.parent / "snapshots_current").resolve())
+
+    excludes = baseline.get("excludes") or [] #same exclude rules the baseline was built with
+    watcher = _start_watcher(folder, baseline_path, current_snapshot_dir, excludes) if (watch and events) else None
+
     integrity_violated = False #tracks if any change was detected
+    base_idx = _index_files(baseline) #built once, shared by compare and the report
+    stat_cache = base_idx if fast else None #previous records trusted by stat tuple
+    prior_scan = baseline if prune_dirs else None #previous listing trusted by directory mtime
+    text_cache = base_idx if reuse_text else None #baseline text blocks reused when the raw hash matches
+    if screen and not options.screen:
+        print("Pre-screen: the baseline has no pre-screen settings (create it with --screen-min-size), ignoring")
+        screen = False
+    elif screen:
+        print(f"Pre-screen: files of {options.screen['min_size'] // (1024 * 1024)} MiB or more are checked by sampled blocks")
+        if screen_full_every:
+            print(f"Pre-screen: full hash every {screen_full_every} scans")
+    cycle = 0
     try:
         while True:
+            cycle += 1
+            full_rehash = not fast or (paranoid > 0 and cycle % paranoid == 0)
+            if fast and full_rehash:
+                print("Paranoid cycle: rehashing every file")
+                log_event(f"Paranoid full rehash (cycle {cycle})")
+
+            screen_cache = None #baseline records whose screen hash may stand in for a full hash
+            if screen and not (screen_full_every > 0 and cycle % screen_full_every == 0):
+                screen_cache = base_idx
+            elif screen:
+                print("Pre-screen cycle skipped: fully hashing large files")
+                log_event(f"Pre-screen full hash (cycle {cycle})")
+
             print(f"Scanning....... {folder}")
-            base_path = Path(baseline_path).resolve()
-            current_snapshot_dir = str((base_path.parent / "snapshots_current").resolve())
-            current = build_baseline(folder, algorithm, baseline_path, snapshot_dir=current_snapshot_dir)
-
-            modified, added, deleted = compare_baselines(baseline, current)
-            #compared dictionaries with the help of comapare.py
-
-            #JSON report for GUI
-            report_path = str(Path(baseline_path).with_suffix(".report.json"))
-
-            report = {
-                "schema_version": 1,
-                "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "algorithm": algorithm,
-                "folder": os.path.abspath(folder),
-                "baseline_path": os.path.abspath(baseline_path),
-
-                "summary": {
-                    "modified": len(modified),
-                    "added": len(added),
-                    "deleted": len(deleted),
-                },
-
-                "modified": [],
-                "added": added,
-                "deleted": deleted,
-            }
-
-            for path, info in modified.items():
-                report["modified"].append({
-                    "path": path,
-
-                    "baseline_raw": info.get("baseline_raw"),
-                    "current_raw": info.get("current_raw"),
-                    "raw_changed": info.get("raw_changed"),
-
-                    "text_changed": info.get("text_changed"),
-                    "baseline_text_hash": info.get("baseline_text_hash"),
-                    "current_text_hash": info.get("current_text_hash"),
-                    "text_note": info.get("text_note"),
-
-                    #includes changed_indices/added_indices/removed_indices
-                    "chunk_info": info.get("chunk_info"),
-
-                    #snapshot file locations
-                    "baseline_snapshot_path": _snapshot_abs_path(baseline, path),
-                    "current_snapshot_path": _snapshot_abs_path(current, path),
-
-                    #snapshot file locations (relative inside snapshots folder) - needed for ZIP bundles
-                    "baseline_snapshot_rel": _snapshot_rel_path(baseline, path),
-                    "current_snapshot_rel": _snapshot_rel_path(current, path),
-                })
-
-                
-
-            write_report(report, report_path)
-            print(f"\nReport written: {report_path}")
-
-            print("\n=== Integrity Verification Report ===") #report header
-
-            if modified: #if list has been modified
-                print("\n[MODIFIED FILES]") #header
-                for path, info in modified.items(): #loop
-                    print(f"\nFile: {path}") #print modified file paths
-            
-                    print(f"Baseline Hash: {info['baseline_raw']}")
-                    print(f"Current Hash: {info['current_raw']}")
-
-                    print(f"Baseline Hex: {to_hex_string(info['baseline_raw'])}")
-                    print(f"Current Hex: {to_hex_string(info['current_raw'])}")
-
-                    if info.get("text_changed") is True: #if extracted text print changed
-                        print("Text Snapshot: CHANGED")
-                    elif info.get("text_changed") is False: #if not, say unchanged
-                        print("Text Snapshot: UNCHANGED")
-                    elif info.get("text_note"):
-                        print(f"Text Snapshot: {info['text_note']}") #special condition
-
-                    ci = info.get("chunk_info") #pulls chunk comparison and prints ratio
-                    if ci:
-                        print(f"Chunk Tamper Ratio: {ci['tamper_ratio']}")
-                        print( #prints baseline v current chunk count and added/removed
-                                f"Chunks baseline/current: {ci['total_baseline']}/{ci['total_current']} "
-                                f"(added {ci['added']}, removed {ci['removed']})"
-                            )
-            if added:
-                print("\n[ADDED FILES]")
-                for path in added:
-                    print(path)
-            if deleted:
-                print("\n[DELETED FILES]")
-                for path in deleted:
-                    print(path)
-                    
-            if not modified and not added and not deleted:
-                print("\nNo changes detected")
-                log_event("No changes detected")
-            else: 
-                integrity_violated = True
-                log_event(
-                    f"Modified: {len(modified)} Added: {len(added)} Deleted: {len(deleted)}"
+            if metrics and cycle > 1: #fresh timings every scan, the first one kept the baseline load
+                scan_metrics = ScanMetrics(slowest)
+            pipeline_stats = {}
+            current = build_baseline(
+                folder, algorithm, baseline_path, snapshot_dir=current_snapshot_dir, workers=workers, pool=pool,
+                reference=None if full_rehash else stat_cache, options=options,
+                prior=None if (fast and full_rehash) else prior_scan, excludes=excludes,
+                text_reference=text_cache, screen_reference=screen_cache,
+                pipeline=pipeline, pipeline_stats=pipeline_stats, metrics=scan_metrics
             )
+            _print_pipeline_stats(pipeline_stats)
+            if fast: #next cycle trusts this scan's stat tuples
+                stat_cache = _index_files(current)
+            if prune_dirs:
+                prior_scan = current
+            if store is not None:
+                _update_store_refs(store, base_path, "current", current["files"])
+
+            if _report_changes(
+                baseline, current, folder, baseline_path, algorithm, base_idx, scan_metrics, exporter
+            ):
+                integrity_violated = True
         
             if not watch: #watch mode control, exit after one scan
                 break
-        
-            print(f"\nWaiting {interval} seconds before next scan....")
-            time.sleep(interval)
+
+            if watcher is None: #polling
+                print(f"\nWaiting {interval} seconds before next scan....")
+                time.sleep(interval)
+                continue
+
+            #event-driven: rescan touched paths until the next full safety-net rescan
+            print(f"\nWatching for changes (full rescan every {full_rescan} seconds)....")
+            deadline = time.monotonic() + full_rescan
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    touched = watcher.wait(remaining, debounce)
+                except WatcherUnavailable as e: #limit hit while adding watches for new folders
+                    print(f"inotify unavailable ({e}), falling back to polling")
+                    log_event(f"inotify unavailable, polling instead: {e}")
+                    watcher.close()
+                    watcher = None
+                    break
+
+                if touched is None: #kernel queue overflowed, events were lost
+                    log_event("inotify queue overflow, running full rescan")
+                    break
+                if not touched:
+                    continue
+
+                print(f"\nChange detected in {len(touched)} path(s), rescanning them....")
+                scan_metrics = ScanMetrics(slowest) if metrics else None
+                current = rescan_paths(
+                    current, touched, algorithm, baseline_path, workers=workers, pool=pool, options=options,
+                    text_reference=text_cache, screen_reference=screen_cache, metrics=scan_metrics
+                )
+                if fast:
+                    stat_cache = _index_files(current)
+                if prune_dirs:
+                    prior_scan = current
+                if store is not None:
+                    _update_store_refs(store, base_path, "current", current["files"])
+                if _report_changes(
+                    baseline, current, folder, baseline_path, algorithm, base_idx, scan_metrics, exporter
+                ):
+                    integrity_violated = True
         
     except  KeyboardInterrupt: #CTRL + C handling, clean exit
         print("\nMonitoring stopped by user")
@@ -211,14 +647,102 @@ def verify(folder, baseline_path="baseline.json", watch=False, interval=60, algo
                 sys.exit(1)
             else:
                 sys.exit(0)
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if exporter is not None:
+            exporter.close()
+
+
+
+def diff_manifests(old_path, new_path, algorithm=None):
+    """
+    Compares two saved manifests (e.g. nightly baselines from different hosts)
+    without touching the filesystems they describe
+    JSON Lines and binary manifests are streamed through a merge-join: each is
+    read once, one record per side at a time, and only the change lists grow
+    Each stream checks its signature when it is exhausted, so nothing read from
+    either manifest is printed or written before both have been fully verified
+    """
+    old = load(old_path, algorithm, stream=True)
+    new = load(new_path, algorithm, stream=True)
+
+    def verified_error(message):
+        #an error based on the headers is only reported once both files are trusted
+        for manifest in (old, new):
+            for _ in manifest["files"]:
+                pass
+        print(f"ERROR: {message}")
 
+    #hashes from different algorithms never match, so the comparison would be meaningless
+    if old.get("algorithm") != new.get("algorithm"):
+        verified_error(f"Manifests use different hash algorithms ({old.get('algorithm')} vs {new.get('algorithm')})")
+        return
+    #likewise a file tree-hashed on one side only (or in other segments) never matches
+    mismatch = tree_hash_mismatch(old, new)
+    if mismatch:
+        verified_error(f"Manifests use different tree-hash settings ({mismatch})")
+        return
+    algorithm = old.get("algorithm") or algorithm
+
+    for manifest in (old, new):
+        if isinstance(manifest["files"], list): #indented JSON is fully loaded anyway, older ones may be unsorted
+            manifest["files"].sort(key=lambda rec: rec.get("path") or "")
+
+    base_snap_root = Path(old.get("snapshot_dir", "")).resolve()
+    curr_snap_root = Path(new.get("snapshot_dir", "")).resolve()
 
+    modified, added, deleted = {}, [], []
+    report_modified = []
+    try:
+        for kind, path, info, b_rec, c_rec in iter_changes(old["files"], new["files"]):
+            if kind == "modified":
+                modified[path] = info
+                report_modified.append(
+                    _modified_entry(path, info, b_rec, c_rec, base_snap_root, curr_snap_root)
+                )
+            elif kind == "added":
+                added.append(path)
+            else:
+                deleted.append(path)
+    except ValueError as e:
+        verified_error(e)
+        return
+    #both streams are exhausted, so both signatures have matched
+    print(f"Using baseline: {old_path} (verified)")
+    print(f"Comparing against: {new_path} (verified)")
+
+    report = {
+        "schema_version": 1,
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "algorithm": algorithm,
+        "folder": new.get("base_dir"),
+        "baseline_path": os.path.abspath(old_path),
+        "compared_manifest": os.path.abspath(new_path),
+        "snapshot_store": bool(old.get("snapshot_store")) and bool(new.get("snapshot_store")),
+
+        "summary": {
+            "modified": len(modified),
+            "added": len(added),
+            "deleted": len(deleted),
+        },
+
+        "modified": report_modified,
+        "added": added,
+        "deleted": deleted,
+    }
+
+    report_path = str(Path(old_path).with_suffix(".diff.report.json"))
+    write_report(report, report_path)
+    print(f"\nReport written: {report_path}")
+
+    return _print_changes(modified, added, deleted)
 
 def main():
     #CLI entry point
     parser = argparse.ArgumentParser(description="VeriLite")
 
-    parser.add_argument("path", help="Path to folder")
+    parser.add_argument("path", help="Path to folder (or, with --diff, the older manifest)")
 
     #baseline flag to turn on baseline creation
     parser.add_argument(
@@ -233,6 +757,12 @@ def main():
         help="Verify folder against baseline"
     )
 
+    parser.add_argument(
+        "--diff",
+        metavar="MANIFEST",
+        help="Compare the manifest given as path against this newer manifest, without scanning"
+    )
+
     parser.add_argument(
         "--baseline",
         default="baseline.json",
@@ -245,6 +775,21 @@ def main():
         help="Output baseline filename (default: baseline.json)"
     )
 
+    parser.add_argument(
+        "--format",
+        dest="manifest_format",
+        choices=MANIFEST_FORMATS,
+        default=None,
+        help="Baseline manifest format (default: jsonl for .jsonl, binary for .vlb, otherwise json)"
+    )
+
+    parser.add_argument(
+        "--chunking",
+        choices=CHUNKING_METHODS,
+        default="lines",
+        help="Text snapshot chunking: fixed 20-line windows or content-defined (cdc) (default: lines)"
+    )
+
     parser.add_argument(
         "--watch",
         action="store_true",
@@ -258,28 +803,269 @@ def main():
         help="Time between scans in seconds (default: 60)"
     )
 
+    parser.add_argument(
+        "--events",
+        action="store_true",
+        help="With --watch, use inotify to rescan only changed paths (Linux, falls back to polling)"
+    )
+
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=1.0,
+        help="With --events, seconds of quiet before a burst of changes is rescanned (default: 1.0)"
+    )
+
+    parser.add_argument(
+        "--full-rescan",
+        type=int,
+        default=3600,
+        help="With --events, seconds between full safety-net rescans (default: 3600)"
+    )
+
     parser.add_argument(
     "--hash",
     dest="hash_algo",
     choices=SUPPORTED_HASHES,
-    default="sha256",
-    help="Hash algorithm to use (default: sha256). md5 and sha1 are legacy."
+    default=None,
+    help="Hash algorithm for --create-baseline (default: sha256). md5 and sha1 are legacy. "
+         "--verify and --diff use the algorithm recorded in the manifest."
 )
 
+    parser.add_argument(
+        "--digest",
+        action="append",
+        choices=SUPPORTED_HASHES,
+        metavar="ALGO",
+        help="With --create-baseline, also store this digest for every file (repeatable), "
+             "computed in the same read pass. --hash stays the digest verify compares on"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of files to hash in parallel (default: 1)"
+    )
+
+    parser.add_argument(
+        "--pool",
+        choices=["thread", "process"],
+        default="thread",
+        help="Worker pool type used when --workers > 1 (default: thread)"
+    )
+
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Verify only: skip rehashing files whose size/mtime/ctime/inode are unchanged"
+    )
+
+    parser.add_argument(
+        "--paranoid",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --fast, force a full rehash every Nth scan (default: 0, never)"
+    )
+
+    parser.add_argument(
+        "--screen-min-size",
+        type=int,
+        metavar="MB",
+        help="Baseline only: also store a sampled pre-screen hash (size, head, tail and 16 interior "
+             "1 MiB blocks) for files of at least MB MiB"
+    )
+
+    parser.add_argument(
+        "--screen",
+        action="store_true",
+        help="Verify only: check pre-screened files by their sampled blocks and fully hash them only "
+             "when the sample differs (the report lists which check each file got)"
+    )
+
+    parser.add_argument(
+        "--screen-full-every",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --screen, fully hash pre-screened files every Nth scan (default: 0, never)"
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run scans as overlapping stages (walk, read/hash, text extraction, snapshot write) connected "
+             "by bounded queues; --workers sets the read/hash threads. Stage statistics are printed"
+    )
+
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        metavar="N",
+        help="With --pipeline, text extraction threads (default: half of --workers, at least 1)"
+    )
+
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        metavar="N",
+        help="With --pipeline, maximum items waiting between two stages (default: 64)"
+    )
+
+    parser.add_argument(
+        "--pipeline-buffer-mb",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="With --pipeline, maximum MiB of file buffers read for text extraction held at once (default: 256)"
+    )
+
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Time every scan stage (walk, hash, extract, snapshot write, compare, report) and keep the "
+             "slowest files; verify adds a \"metrics\" section to the report, both log a summary line"
+    )
+
+    parser.add_argument(
+        "--metrics-slowest",
+        type=int,
+        default=DEFAULT_SLOWEST,
+        metavar="N",
+        help=f"With --metrics, how many of the slowest files to keep (default: {DEFAULT_SLOWEST})"
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="With --verify --watch, serve the last scan's metrics (duration, files, bytes, changes, stage "
+             "times, time since the last completed scan) in Prometheus format on 127.0.0.1:PORT/metrics"
+    )
+
+    parser.add_argument(
+        "--tree-hash-min-size",
+        type=int,
+        metavar="MB",
+        help="Baseline only: hash files of at least MB MiB as a tree of fixed segments, read and hashed "
+             "in parallel; verify then reports which segments changed"
+    )
+
+    parser.add_argument(
+        "--tree-segment-size",
+        type=int,
+        metavar="MB",
+        help="With --tree-hash-min-size, segment size in MiB (default: 64)"
+    )
+
+    parser.add_argument(
+        "--tree-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Threads hashing the segments of one tree-hashed file (default: 0, one per CPU)"
+    )
+
+    parser.add_argument(
+        "--snapshot-store",
+        action="store_true",
+        help="Baseline only: keep text snapshots in a shared content-addressed store (verify follows the baseline)"
+    )
+
+    parser.add_argument(
+        "--compress-snapshots",
+        choices=SNAPSHOT_CODECS,
+        default=None,
+        help="Baseline only: compress text snapshots, one frame per chunk (verify follows the baseline)"
+    )
+
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Baseline only: leave out matching files/folders (repeatable, added to .veriliteignore)"
+    )
+
+    parser.add_argument(
+        "--reuse-text",
+        action="store_true",
+        help="Verify only: keep the baseline text snapshot of files whose raw hash is unchanged"
+    )
+
+    parser.add_argument(
+        "--prune-dirs",
+        action="store_true",
+        help="Verify only: do not re-list directories whose mtime and entry count are unchanged"
+    )
+
 
     args = parser.parse_args()
 
     #gaurd against invalid flag combination
-    if args.create_baseline and args.verify:
-        print("ERROR: Please choose either --create-baseline or --verify, not both")
+    if sum([args.create_baseline, args.verify, args.diff is not None]) > 1:
+        print("ERROR: Please choose only one of --create-baseline, --verify or --diff")
+        return
+
+    if args.workers < 1:
+        print("ERROR: --workers must be at least 1")
+        return
+
+    pipeline = None
+    if args.pipeline:
+        if args.pool == "process": #the stages share queues and buffers, so they always run on threads
+            print("ERROR: --pipeline runs its stages on threads and cannot be combined with --pool process")
+            return
+        if (
+            args.queue_size < 1 or args.pipeline_buffer_mb < 1
+            or (args.extract_workers is not None and args.extract_workers < 1)
+        ):
+            print("ERROR: --queue-size, --pipeline-buffer-mb and --extract-workers must be at least 1")
+            return
+        pipeline = PipelineOptions(
+            hash_workers=args.workers,
+            extract_workers=args.extract_workers or max(1, args.workers // 2),
+            queue_size=args.queue_size,
+            buffer_bytes=args.pipeline_buffer_mb * 1024 * 1024
+        )
+
+    if args.metrics_port is not None and not (args.verify and args.watch):
+        print("ERROR: --metrics-port needs --verify --watch")
+        return
+
+    if args.metrics_slowest < 1:
+        print("ERROR: --metrics-slowest must be at least 1")
+        return
+
+    if args.tree_segment_size is not None and args.tree_segment_size < 1:
+        print("ERROR: --tree-segment-size must be at least 1")
         return
 
-    if args.create_baseline:
-        create_baseline(args.path, args.output, algorithm=args.hash_algo)
+    if args.diff is not None:
+        diff_manifests(args.path, args.diff, algorithm=args.hash_algo)
+    elif args.create_baseline:
+        create_baseline(
+            args.path, args.output, algorithm=args.hash_algo or "sha256", workers=args.workers, pool=args.pool,
+            fmt=args.manifest_format, chunking=args.chunking, excludes=args.exclude,
+            snapshot_store=args.snapshot_store, compress_snapshots=args.compress_snapshots, digests=args.digest,
+            screen_min_size=args.screen_min_size, tree_min_size=args.tree_hash_min_size,
+            tree_segment_size=args.tree_segment_size, tree_workers=args.tree_workers, pipeline=pipeline,
+            metrics=args.metrics, slowest=args.metrics_slowest
+        )
     elif args.verify:
-        verify(args.path, args.baseline, watch=args.watch, interval=args.interval, algorithm=args.hash_algo)
+        verify(
+            args.path, args.baseline, watch=args.watch, interval=args.interval,
+            algorithm=args.hash_algo, workers=args.workers, pool=args.pool,
+            fast=args.fast, paranoid=args.paranoid, prune_dirs=args.prune_dirs, reuse_text=args.reuse_text,
+            screen=args.screen, screen_full_every=args.screen_full_every, tree_workers=args.tree_workers,
+            pipeline=pipeline,
+            events=args.events, debounce=args.debounce, full_rescan=args.full_rescan,
+            metrics=args.metrics, slowest=args.metrics_slowest, metrics_port=args.metrics_port
+        )
     else:
-        print("Use --create-baseline or --verify")
+        print("Use --create-baseline, --verify or --diff")
 
 #let main run
 if __name__ == "__main__":
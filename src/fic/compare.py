@@ -5,7 +5,11 @@
 
 #imports
 from __future__ import annotations
-from typing import Dict, List, Tuple, Any
+from bisect import bisect_left #longest increasing subsequence for chunk alignment
+from difflib import SequenceMatcher #fallback alignment for small gaps
+from typing import Dict, List, Tuple, Any, Iterable, Iterator
+from .records import FileRecord, TextInfo
+from .merkle import changed_dirs, paths_in_dirs
 #dict = dictionary where keys and vals are strings
 #list = list of strings
 #tuple = fixed size container of multiple values
@@ -55,6 +59,7 @@ def compare_manifests(
 def _index_files(baseline: Dict[str, Any]) -> Dict[str, Dict[str, Any]]: #takes baseline dict and builds index
     """
     Turns baseline files into a dict keyed by path for fast lookup
+    files may be a list or any iterable of records (e.g. a streamed v5 manifest)
     """
     files = baseline.get("files", []) #gets file list
     idx: Dict[str, Dict[str, Any]] = {} #creates lookup dict
@@ -65,104 +70,378 @@ def _index_files(baseline: Dict[str, Any]) -> Dict[str, Dict[str, Any]]: #takes
     return idx #returns index
 
 
+def _field_pair(b, c, key: str) -> tuple:
+    """
+    Returns key from both sides for comparison
+    When both are compact records the raw digest bytes are compared directly,
+    otherwise the JSON (hex string) values are used
+    """
+    if isinstance(b, (FileRecord, TextInfo)) and isinstance(c, (FileRecord, TextInfo)):
+        return getattr(b, key), getattr(c, key)
+    return b.get(key), c.get(key)
+
+
+def _chunk_pair(b_text, c_text) -> tuple:
+    """Chunk digest lists from both text blocks, as raw bytes when both are compact"""
+    if isinstance(b_text, TextInfo) and isinstance(c_text, TextInfo):
+        return b_text.chunk_digests(), c_text.chunk_digests()
+    return b_text.get("chunks"), c_text.get("chunks")
+
+
 def compare_baselines(  #makes 2 baseline dicts
     baseline: Dict[str, Any],
-    current: Dict[str, Any]
+    current: Dict[str, Any],
+    base_idx: Dict[str, Any] | None = None,
+    curr_idx: Dict[str, Any] | None = None
 ) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
     """Compare two BASELINE dicts
+    Records may be plain dicts or compact FileRecords (see records.py)
+    base_idx/curr_idx: optional {path: record} indexes from _index_files, so a
+    caller that needs them afterwards (e.g. the report) builds them only once
+    If both sides carry Merkle directory digests (see merkle.py), files in
+    directories whose digest is unchanged are skipped without being compared
 
     Returns:
     - modified: dict keyed by file path with raw + optional text comparisons
     - added: files only in current
     - deleted: files only in baseline
     """
-    base_idx = _index_files(baseline)  #converts files into dict for lookup
-    curr_idx = _index_files(current)
-
-    base_paths = set(base_idx.keys())  #sets of files for set maths
-    curr_paths = set(curr_idx.keys())
+    if base_idx is None:
+        base_idx = _index_files(baseline)  #converts files into dict for lookup
+    if curr_idx is None:
+        curr_idx = _index_files(current)
+
+    #with Merkle digests on both sides only files in changed directories need comparing
+    dirty = changed_dirs(baseline.get("merkle"), current.get("merkle"))
+    if dirty is None:
+        base_paths = set(base_idx.keys())  #sets of files for set maths
+        curr_paths = set(curr_idx.keys())
+    elif not dirty:  #root digests match, nothing changed
+        return {}, [], []
+    else:
+        base_paths = set(paths_in_dirs(sorted(base_idx), dirty))
+        curr_paths = set(paths_in_dirs(sorted(curr_idx), dirty))
 
     added = sorted(curr_paths - base_paths)  #added/deleted file lists
     deleted = sorted(base_paths - curr_paths)
 
     modified: Dict[str, Dict[str, Any]] = {}  #holds per-file change info
 
-    for path in (base_paths & curr_paths):  #loops each path in common
-        b = base_idx[path]
-        c = curr_idx[path]
-
-        b_raw = b.get("raw_hash")  #compares raw file hashes
-        c_raw = c.get("raw_hash")
-        raw_changed = (b_raw != c_raw)
-
-        b_text = b.get("text")  #gets snapshot info block or none
-        c_text = c.get("text")
-
-        text_changed = None  #default unknown/unavailable state
-        text_note = None
-
-        if b_text is not None:  #if baseline had text snapshot info
-            if c_text is None:  #but current doesnt
-                text_note = "text_unavailable_now"  #take note
-            else:  #or compare snapshot hashes
-                text_changed = (b_text.get("hash") != c_text.get("hash"))
-
-        #chunk comparison
-        chunk_info = None
-        if b_text is not None and c_text is not None: #only if b and c have text blocks
-            b_chunks = b_text.get("chunks") #pulls chunk-hash lists from each text block
-            c_chunks = c_text.get("chunks")
-
-            if isinstance(b_chunks, list) and isinstance(c_chunks, list): #makes sure both are lists 
-                min_len = min(len(b_chunks), len(c_chunks))
-
-                changed_indices = []
-                for i in range(min_len):
-                    if b_chunks[i] != c_chunks[i]:
-                        changed_indices.append(i)
-
-                #chunks that exist only on one side, modified
-                added_indices = list(range(min_len, len(c_chunks)))
-                removed_indices = list(range(min_len, len(b_chunks)))
-
-                #for existing counts
-                added_count = len(added_indices)
-                removed_count = len(removed_indices)
-
-                #tamper ratio: how many baseline chunks differ at same index
-                total = max(len(b_chunks), 1)
-                tamper_ratio = round(len(changed_indices)/total, 4)
-
-                chunk_info = { #dict summarising chunk-based changes
-                    "method": "lines",
-                    "max_lines": (b_text.get("chunking") or {}).get("max_lines", 20),
-                    "total_baseline": len(b_chunks),
-                    "total_current": len(c_chunks),
-
-                    #location-aware fields for the GUI
-                    "changed_indices": changed_indices,
-                    "added_indices": added_indices,
-                    "removed_indices": removed_indices,
-
-                    #counts
-                    "changed": len(changed_indices),
-                    "added": added_count,
-                    "removed": removed_count,
-                    "tamper_ratio": tamper_ratio,
-                }
-
-        if raw_changed or (text_changed is True): #decided if modified and store details
-            modified[path] = {
-                "baseline_raw": b_raw,
-                "current_raw": c_raw,
-                "raw_changed": raw_changed,
+    for path in sorted(base_paths & curr_paths):  #loops each path in common
+        info = compare_records(base_idx[path], curr_idx[path])
+        if info is not None:
+            modified[path] = info
 
-                "text_changed": text_changed,
-                "baseline_text_hash": b_text.get("hash") if b_text else None,
-                "current_text_hash": c_text.get("hash") if c_text else None,
-                "text_note": text_note,
+    return modified, added, deleted
 
-                "chunk_info": chunk_info
-            }
 
-    return modified, added, deleted
+def _chunk_info(b_text, c_text) -> Dict[str, Any] | None:
+    """Chunk-level comparison of two text blocks, or None if either has no chunk list"""
+    chunking = b_text.get("chunking") or {"method": "lines", "max_lines": 20}
+    if (c_text.get("chunking") or {"method": "lines", "max_lines": 20}) != chunking:
+        return None #chunks were cut differently, positions cannot be compared
+
+    b_chunks, c_chunks = _chunk_pair(b_text, c_text) #pulls chunk-hash lists from each text block
+
+    if not (isinstance(b_chunks, list) and isinstance(c_chunks, list)): #makes sure both are lists 
+        return None
+
+    aligned = align_chunks(b_chunks, c_chunks)
+
+    changed_pairs = [] #(baseline, current) chunks in the same place with different content
+    added_indices = [] #current chunks with no baseline counterpart
+    removed_indices = [] #baseline chunks with no current counterpart
+    current_to_baseline: List[int | None] = [None] * len(c_chunks)
+
+    for b_i, c_i, kind in aligned:
+        if c_i is not None:
+            current_to_baseline[c_i] = b_i
+        if kind == "changed":
+            changed_pairs.append((b_i, c_i))
+        elif kind == "added":
+            added_indices.append(c_i)
+        elif kind == "removed":
+            removed_indices.append(b_i)
+
+    #chunks deleted in one place and inserted unchanged elsewhere were moved, not rewritten
+    moved = _match_moves(b_chunks, c_chunks, removed_indices, added_indices)
+    if moved:
+        moved_b = {b_i for b_i, _ in moved}
+        moved_c = {c_i for _, c_i in moved}
+        removed_indices = [i for i in removed_indices if i not in moved_b]
+        added_indices = [i for i in added_indices if i not in moved_c]
+        for b_i, c_i in moved:
+            current_to_baseline[c_i] = b_i
+
+    changed_indices = [c_i for _, c_i in changed_pairs] #positions in the current snapshot
+
+    #tamper ratio: share of baseline chunks that were rewritten or deleted
+    total = max(len(b_chunks), 1)
+    tamper_ratio = round((len(changed_pairs) + len(removed_indices))/total, 4)
+
+    return { #dict summarising chunk-based changes
+        "method": chunking.get("method", "lines"),
+        "max_lines": chunking.get("max_lines", 20),
+        "chunking": dict(chunking), #full settings so the GUI can re-split the snapshots
+        "alignment": "patience",
+        "total_baseline": len(b_chunks),
+        "total_current": len(c_chunks),
+
+        #location-aware fields for the GUI
+        #changed/added/moved are current chunk indices, removed are baseline chunk indices
+        "changed_indices": changed_indices,
+        "added_indices": added_indices,
+        "removed_indices": removed_indices,
+        "moved": [[b_i, c_i] for b_i, c_i in moved],
+        #baseline chunk shown next to each current chunk (None for inserted chunks)
+        "current_to_baseline": current_to_baseline,
+
+        #counts
+        "changed": len(changed_indices),
+        "added": len(added_indices),
+        "removed": len(removed_indices),
+        "moved_count": len(moved),
+        "tamper_ratio": tamper_ratio,
+    }
+
+
+def _match_moves(b_chunks: list, c_chunks: list, removed: list, added: list) -> list:
+    """Pairs removed baseline chunks with added current chunks that have the same hash"""
+    if not removed or not added:
+        return []
+    by_hash: Dict[Any, List[int]] = {} #chunk hash -> removed baseline positions
+    for b_i in removed:
+        by_hash.setdefault(b_chunks[b_i], []).append(b_i)
+    moved = []
+    for c_i in added:
+        positions = by_hash.get(c_chunks[c_i])
+        if positions:
+            moved.append((positions.pop(0), c_i))
+    return moved
+
+
+def _unique_positions(seq: list, lo: int, hi: int) -> Dict[Any, int]:
+    """hash -> position for hashes that occur exactly once in seq[lo:hi]"""
+    seen: Dict[Any, int] = {}
+    dup = set()
+    for i in range(lo, hi):
+        h = seq[i]
+        if h in seen:
+            dup.add(h)
+        else:
+            seen[h] = i
+    for h in dup:
+        del seen[h]
+    return seen
+
+
+def _longest_increasing(pairs: list) -> list:
+    """Longest run of (a, b) pairs increasing in b (pairs arrive sorted by a), patience sorting"""
+    tails: List[int] = [] #b value ending the best run of each length
+    tail_idx: List[int] = []
+    prev = [-1] * len(pairs)
+    for k, (_, b) in enumerate(pairs):
+        pos = bisect_left(tails, b)
+        if pos == len(tails):
+            tails.append(b)
+            tail_idx.append(k)
+        else:
+            tails[pos] = b
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos > 0 else -1
+    run = []
+    k = tail_idx[-1] if tail_idx else -1
+    while k != -1:
+        run.append(pairs[k])
+        k = prev[k]
+    run.reverse()
+    return run
+
+
+def _matching_pairs(a: list, b: list) -> list:
+    """
+    Patience diff: positions (i, j) with a[i] == b[j] forming an in-order matching
+    Hashes unique on both sides anchor the match (hash -> position index plus a
+    longest increasing subsequence), and the gaps between anchors are solved the
+    same way, so it stays near-linear on long chunk lists
+    Gaps without unique hashes fall back to difflib when they are small
+    """
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        #common prefix and suffix
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo >= ahi or blo >= bhi:
+            continue
+
+        a_unique = _unique_positions(a, alo, ahi)
+        b_unique = _unique_positions(b, blo, bhi)
+        pairs = sorted((i, b_unique[h]) for h, i in a_unique.items() if h in b_unique)
+        anchors = _longest_increasing(pairs)
+
+        if not anchors:
+            if (ahi - alo) * (bhi - blo) <= 4_000_000: #small gap, exact matching is cheap enough
+                sm = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for i, j, n in sm.get_matching_blocks():
+                    matches.extend((alo + i + k, blo + j + k) for k in range(n))
+            continue
+
+        #solve the gaps around each anchor
+        prev_a, prev_b = alo, blo
+        for i, j in anchors:
+            matches.append((i, j))
+            stack.append((prev_a, i, prev_b, j))
+            prev_a, prev_b = i + 1, j + 1
+        stack.append((prev_a, ahi, prev_b, bhi))
+
+    matches.sort()
+    return matches
+
+
+def align_chunks(b_chunks: list, c_chunks: list) -> List[Tuple[int | None, int | None, str]]:
+    """
+    Aligns two chunk-hash sequences
+    Returns (baseline_index, current_index, kind) in order, where kind is
+    "same", "changed" (a rewritten chunk in the same place), "added" or "removed"
+    Within each gap between matched chunks, leftover chunks are paired up as
+    changed and any remainder is added/removed
+    """
+    out: List[Tuple[int | None, int | None, str]] = []
+    prev_b, prev_c = 0, 0
+    for b_i, c_i in _matching_pairs(b_chunks, c_chunks) + [(len(b_chunks), len(c_chunks))]:
+        gap_b = list(range(prev_b, b_i))
+        gap_c = list(range(prev_c, c_i))
+        paired = min(len(gap_b), len(gap_c))
+        for k in range(paired):
+            out.append((gap_b[k], gap_c[k], "changed"))
+        for k in gap_b[paired:]:
+            out.append((k, None, "removed"))
+        for k in gap_c[paired:]:
+            out.append((None, k, "added"))
+        if b_i < len(b_chunks):
+            out.append((b_i, c_i, "same"))
+        prev_b, prev_c = b_i + 1, c_i + 1
+    return out
+
+
+def _segment_info(b, c) -> Dict[str, Any] | None:
+    """
+    Segments that differ between two tree-hashed records (see utils.calculate_tree_hash)
+    None unless both sides were tree-hashed with the same segment size
+    """
+    b_seg = b.get("segments")
+    c_seg = c.get("segments")
+    if not b_seg or not c_seg or b_seg.get("size") != c_seg.get("size"):
+        return None
+    b_digests = b_seg.get("digests") or []
+    c_digests = c_seg.get("digests") or []
+    changed = [
+        i for i in range(max(len(b_digests), len(c_digests)))
+        if i >= len(b_digests) or i >= len(c_digests) or b_digests[i] != c_digests[i]
+    ]
+    return {
+        "segment_size": b_seg.get("size"),
+        "total_baseline": len(b_digests),
+        "total_current": len(c_digests),
+        "changed": changed, #segment i covers bytes [i * segment_size, (i + 1) * segment_size)
+    }
+
+
+def compare_records(b, c) -> Dict[str, Any] | None:
+    """
+    Compares the baseline and current record of one path
+    Returns the change details if the file was modified, otherwise None
+    """
+    b_raw, c_raw = _field_pair(b, c, "raw_hash")  #compares raw file hashes
+    raw_changed = (b_raw != c_raw)
+
+    b_text = b.get("text")  #gets snapshot info block or none
+    c_text = c.get("text")
+
+    text_changed = None  #default unknown/unavailable state
+    text_note = None
+
+    if b_text is not None:  #if baseline had text snapshot info
+        if c_text is None:  #but current doesnt
+            text_note = "text_unavailable_now"  #take note
+        else:  #or compare snapshot hashes
+            b_hash, c_hash = _field_pair(b_text, c_text, "hash")
+            text_changed = (b_hash != c_hash)
+    elif c_text is None:  #neither side has text, e.g. tree-hashed files are not extracted
+        text_note = c.get("text_note") or b.get("text_note")
+
+    if not raw_changed and text_changed is not True: #unchanged, skip the chunk work
+        return None
+
+    #chunk comparison, only if b and c have text blocks
+    chunk_info = None
+    if b_text is not None and c_text is not None:
+        chunk_info = _chunk_info(b_text, c_text)
+
+    return { #change details
+        "baseline_raw": b.get("raw_hash"),
+        "current_raw": c.get("raw_hash"),
+        "raw_changed": raw_changed,
+        #tree-hashed files only: which fixed-size segments differ
+        "segment_info": _segment_info(b, c) if raw_changed else None,
+
+        "text_changed": text_changed,
+        "baseline_text_hash": b_text.get("hash") if b_text else None,
+        "current_text_hash": c_text.get("hash") if c_text else None,
+        "text_note": text_note,
+
+        "chunk_info": chunk_info
+    }
+
+
+def iter_changes(
+    base_records: Iterable[Any],
+    curr_records: Iterable[Any]
+) -> Iterator[Tuple[str, str, Dict[str, Any] | None, Any, Any]]:
+    """
+    Streaming merge-join of two path-sorted record streams (e.g. iter_records of
+    two v5/v6 manifests), holding only one record from each side at a time
+
+    Yields (kind, path, info, baseline_record, current_record) where kind is
+    "modified", "added" or "deleted" and info is the compare_records result
+    Raises ValueError if either stream is not sorted by path
+    """
+    def sorted_stream(records, side):
+        last = None
+        for rec in records:
+            path = rec.get("path")
+            if not path:
+                continue
+            if last is not None and path <= last:
+                raise ValueError(f"{side} records are not sorted by path ({last!r} then {path!r})")
+            last = path
+            yield path, rec
+
+    done = object() #sentinel for an exhausted stream
+    base_iter = sorted_stream(base_records, "baseline")
+    curr_iter = sorted_stream(curr_records, "current")
+    b = next(base_iter, done)
+    c = next(curr_iter, done)
+
+    while b is not done or c is not done:
+        if c is done or (b is not done and b[0] < c[0]): #only in baseline
+            yield "deleted", b[0], None, b[1], None
+            b = next(base_iter, done)
+        elif b is done or c[0] < b[0]: #only in current
+            yield "added", c[0], None, None, c[1]
+            c = next(curr_iter, done)
+        else: #same path on both sides
+            info = compare_records(b[1], c[1])
+            if info is not None:
+                yield "modified", b[0], info, b[1], c[1]
+            b = next(base_iter, done)
+            c = next(curr_iter, done)
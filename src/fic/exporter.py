@@ -0,0 +1,165 @@
+# File: exporter.py
+# Description: Local HTTP endpoint exposing watch-mode scan metrics in Prometheus text format
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import threading #the server runs beside the watch loop
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8" #Prometheus text exposition format
+
+
+def _escape(value: str) -> str:
+    #label values escape backslash, double quote and newline
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class MetricsExporter:
+    """
+    Serves the state of the last scan on http://host:port/metrics
+    The watch loop calls record_scan after every scan and the server thread
+    only reads that state, under a lock, when it is scraped
+
+    exporter = MetricsExporter(9108)
+    exporter.start()
+    exporter.record_scan(current, metrics.as_dict(), modified, added, deleted)
+    exporter.close()
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+        self._last: dict | None = None #state of the last completed scan
+        self._last_success: float | None = None #time.time() of the last completed scan
+        self._scans = 0
+        self._violations = 0 #scans that found at least one change
+        self._started = time.time()
+
+    def start(self) -> None:
+        """Binds the port (OSError if it is taken) and serves from a daemon thread"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args): #scrapes would flood the console
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1] #port 0 picks a free one
+        self._thread = threading.Thread(target=self._server.serve_forever, name="verilite-metrics", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def record_scan(self, current: dict, metrics: dict | None, modified, added, deleted) -> None:
+        """
+        Stores the result of a completed scan
+        current: the scan (build_baseline/rescan_paths result)
+        metrics: ScanMetrics.as_dict() of the scan, or None
+        """
+        files = current.get("files", [])
+        state = {
+            "files": len(files),
+            "bytes": sum(rec.get("size", 0) for rec in files),
+            "modified": len(modified),
+            "added": len(added),
+            "deleted": len(deleted),
+            "metrics": metrics or {},
+        }
+        with self._lock:
+            self._last = state
+            self._last_success = time.time()
+            self._scans += 1
+            if modified or added or deleted:
+                self._violations += 1
+
+    def render(self) -> str:
+        """The metrics page"""
+        with self._lock:
+            last = self._last
+            last_success = self._last_success
+            scans = self._scans
+            violations = self._violations
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if labels:
+                    label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {_number(value)}")
+                else:
+                    lines.append(f"{name} {_number(value)}")
+
+        metric("verilite_up", "gauge", "Whether the watch loop is running", [({}, 1)])
+        metric("verilite_scans_total", "counter", "Scans completed since start", [({}, scans)])
+        metric(
+            "verilite_integrity_violation_scans_total", "counter",
+            "Scans that found modified, added or deleted files", [({}, violations)]
+        )
+        now = time.time()
+        #before the first scan this counts from startup, so a stuck first scan still alerts
+        metric(
+            "verilite_seconds_since_last_successful_scan", "gauge",
+            "Seconds since the last scan completed (since startup if none has)",
+            [({}, now - (last_success if last_success is not None else self._started))]
+        )
+        if last is None:
+            return "\n".join(lines) + "\n"
+
+        m = last["metrics"]
+        metric("verilite_last_success_timestamp_seconds", "gauge", "Unix time of the last completed scan",
+               [({}, last_success)])
+        if "elapsed_seconds" in m:
+            metric("verilite_last_scan_duration_seconds", "gauge", "Wall time of the last scan",
+                   [({}, m["elapsed_seconds"])])
+        metric("verilite_last_scan_files", "gauge", "Files in the last scan", [({}, last["files"])])
+        metric("verilite_last_scan_bytes", "gauge", "Total size of the files in the last scan",
+               [({}, last["bytes"])])
+        if "bytes_hashed" in m:
+            metric("verilite_last_scan_bytes_hashed", "gauge", "Bytes read by full hashes in the last scan",
+                   [({}, m["bytes_hashed"])])
+            metric("verilite_last_scan_files_hashed", "gauge", "Files fully hashed in the last scan",
+                   [({}, m["files_hashed"])])
+        metric(
+            "verilite_last_scan_changes", "gauge", "Changed files found by the last scan, by kind",
+            [({"kind": kind}, last[kind]) for kind in ("modified", "added", "deleted")]
+        )
+        if m.get("stages"):
+            metric(
+                "verilite_last_scan_stage_seconds", "gauge", "Wall time of each stage of the last scan",
+                [({"stage": name}, seconds) for name, seconds in m["stages"].items()]
+            )
+        if m.get("file_stages"):
+            metric(
+                "verilite_last_scan_file_step_seconds", "gauge",
+                "Per-file step time of the last scan, summed over all files and workers",
+                [({"step": name}, seconds) for name, seconds in m["file_stages"].items()]
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,128 @@
+# File: ignore.py
+# Description: Exclude rules from .veriliteignore and --exclude globs
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import os
+import re
+from pathlib import Path
+
+IGNORE_FILE = ".veriliteignore"
+
+
+def read_ignore_file(folder) -> list[str]:
+    """
+    Patterns from folder/.veriliteignore, one glob per line
+    Blank lines and lines starting with # are skipped
+    """
+    path = Path(folder) / IGNORE_FILE
+    if not path.is_file():
+        return []
+    patterns = []
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            patterns.append(line)
+    return patterns
+
+
+def _translate(glob: str) -> str:
+    """
+    Glob -> regex source; unlike fnmatch, "*" and "?" never cross a "/",
+    "**/" matches any number of directories and a trailing "**" everything below
+    """
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**", i):
+            i += 2
+            if glob.startswith("/", i): #"a/**/b" also matches "a/b"
+                out.append("(?:.*/)?")
+                i += 1
+            else:
+                out.append(".*")
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and glob[j] == "!":
+                j += 1
+            if j < n and glob[j] == "]": #"[]]" holds a literal bracket
+                j += 1
+            j = glob.find("]", j)
+            if j < 0: #unclosed, taken literally like fnmatch does
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                elif body.startswith("^"):
+                    body = "\\" + body
+                out.append(f"[{body}]")
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class ExcludeRules:
+    """
+    Compiled exclude globs, matched against relative paths using "/" separators,
+    with .gitignore-like rules:
+    - "name" or "*.tmp" matches an entry with that name at any depth
+    - "docs/build" (contains a slash) or "/build" (leading slash) matches that
+      path from the scan root; "*" stays within one directory, "**" spans several
+    - a trailing "/" ("cache/") only matches directories
+    - a leading "!" re-includes what an earlier pattern excluded; the last
+      matching pattern wins ("\\!name" matches a literal "!name")
+    An excluded directory is pruned, so nothing under it is ever listed, and a
+    "!" pattern cannot bring back a file whose directory is excluded
+    """
+
+    def __init__(self, patterns=()):
+        self.patterns = list(patterns)
+        self._rules = [] #(regex, re-include, directories only, matched against the whole path)
+        for pattern in self.patterns:
+            negate = pattern.startswith("!")
+            if negate:
+                pattern = pattern[1:]
+            elif pattern.startswith("\\!"):
+                pattern = pattern[1:]
+            dir_only = pattern.endswith("/")
+            glob = pattern.rstrip("/")
+            anchored = "/" in glob #a slash anywhere but the end ties the pattern to the scan root
+            glob = glob.lstrip("/")
+            if not glob:
+                continue
+            regex = re.compile(f"(?s:{_translate(glob)})\\Z")
+            self._rules.append((regex, negate, dir_only, anchored))
+        self._rules.reverse() #searched from the last pattern, which wins
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def match(self, rel: str, is_dir: bool) -> bool:
+        """True if the entry at rel (relative path, os.sep or "/" separated) is excluded"""
+        rel = rel.replace(os.sep, "/")
+        name = rel.rpartition("/")[2]
+        for regex, negate, dir_only, anchored in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel if anchored else name):
+                return not negate
+        return False
+
+    def covers(self, rel: str, is_dir: bool = False) -> bool:
+        """True if rel or any directory above it is excluded (for single touched paths)"""
+        parts = rel.replace(os.sep, "/").split("/")
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), True):
+                return True
+        return self.match(rel, is_dir)
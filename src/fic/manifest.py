@@ -3,43 +3,179 @@
 # Author: Theo Pakieser
 # Date: 22/10/2025
 
+import gc #paused while a whole manifest is parsed
 import json
+import struct #length prefixes in the binary manifest
 import sys #terminate program safely
+from contextlib import contextmanager
 from pathlib import Path #cross platform file path handling
-from .utils import calculate_hash
+from typing import Iterator
+from .utils import calculate_hash, new_hasher, read_file_bytes
+from .records import BINARY_MAGIC, BINARY_VERSION, compact, decode_record, encode_record, json_default
 
+MANIFEST_FORMATS = ["json", "jsonl", "binary"]
+JSONL_SCHEMA_VERSION = 5 #one header line, then one file record per line
+BINARY_SCHEMA_VERSION = 6 #magic, JSON header, then length-prefixed packed records
 
-def save(data, output_path:str, algorithm: str):
+_U32 = struct.Struct("<I")
+_LOAD_BUFFER = 1 << 20 #read size when streaming a manifest in
+
+
+class ManifestWriter:
+    """
+    Streaming writer for the JSON Lines manifest (schema v5)
+    Records are written one at a time and the signature hash is updated
+    with exactly the bytes written, so the file is never re-read to sign it
+
+    with ManifestWriter(path, header, algorithm) as w:
+        for rec in records:
+            w.write(rec)
+    w.signature -> hex digest of the whole file
+    """
+
+    def __init__(self, output_path, header: dict, algorithm: str):
+        self.output_path = Path(output_path)
+        self._hash = new_hasher(algorithm)
+        self._file = open(self.output_path, "wb")
+        self.signature = None
+        self.count = 0
+
+        header = {k: v for k, v in header.items() if k != "files"}
+        self._write_header(header)
+
+    def _emit(self, data: bytes) -> None:
+        self._hash.update(data)
+        self._file.write(data)
+
+    def _write_header(self, header: dict) -> None:
+        header["schema_version"] = JSONL_SCHEMA_VERSION
+        header["format"] = "jsonl"
+        self._write_line(header)
+
+    def _write_line(self, obj) -> None:
+        #compact, key-sorted lines so the same data always gives the same bytes
+        line = json.dumps(
+            obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=json_default
+        ) + "\n"
+        self._emit(line.encode("utf-8"))
+
+    def write(self, record: dict) -> None:
+        self._write_line(record)
+        self.count += 1
+
+    def close(self) -> str:
+        if not self._file.closed:
+            self._file.close()
+            self.signature = self._hash.hexdigest()
+        return self.signature
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BinaryManifestWriter(ManifestWriter):
+    """
+    Streaming writer for the compact binary manifest (schema v6):
+    magic + version, length-prefixed JSON header, then one length-prefixed
+    packed record per file (see records.encode_record)
+    """
+
+    def _write_header(self, header: dict) -> None:
+        header["schema_version"] = BINARY_SCHEMA_VERSION
+        header["format"] = "binary"
+        data = json.dumps(header, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        self._emit(BINARY_MAGIC + bytes([BINARY_VERSION]) + _U32.pack(len(data)) + data)
+
+    def write(self, record) -> None:
+        data = encode_record(record)
+        self._emit(_U32.pack(len(data)) + data)
+        self.count += 1
+
+
+#legacy .sig files hold only the hex digest, its length tells the algorithm apart
+_LEGACY_SIG_ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256"}
+
+
+def signature_path(manifest_path, fmt: str = "json") -> Path:
+    """
+    Where the signature of a manifest lives
+    Indented JSON keeps baseline.sig; the streaming formats append to the full
+    name (baseline.jsonl.sig, baseline.vlb.sig) so manifests of different
+    formats with the same stem never overwrite each other's signature
+    """
+    manifest_path = Path(manifest_path)
+    if fmt in ("jsonl", "binary"):
+        return manifest_path.with_name(manifest_path.name + ".sig")
+    return manifest_path.with_suffix(".sig")
+
+
+def _write_signature(output_path: Path, sig: str, algorithm: str, fmt: str = "json") -> None:
+    #creat path for signature file
+    sig_path = signature_path(output_path, fmt)
+
+    #write "algorithm:hex digest" to baseline.sig
+    with open(sig_path, "w", encoding="utf-8") as f:
+        f.write(f"{algorithm}:{sig}")
+
+
+def read_signature(sig_path: Path, algorithm: str | None = None) -> tuple[str, str]:
+    """
+    Returns (algorithm, hex digest) stored in a .sig file
+    Legacy files hold only the digest: algorithm is used if given, otherwise
+    it is inferred from the digest length (md5, sha1 or sha256)
+    """
+    stored = sig_path.read_text().strip()
+    if ":" in stored:
+        algo, _, digest = stored.partition(":")
+        return algo, digest
+    return algorithm or _LEGACY_SIG_ALGORITHMS.get(len(stored), "sha256"), stored
+
+
+def save(data, output_path:str, algorithm: str, fmt: str = "json"):
     """
   Saves the baseline manifest and generated a cryptographic signature
   to make any baseline tampering detectable
+  fmt: "json" (single indented document), "jsonl" (streaming v5 format) or
+  "binary" (compact v6 format); for the streaming formats data["files"] may
+  be any iterable of records
     """
     #make the output_path a Path object
     output_path = Path(output_path)
 
+    if fmt in ("jsonl", "binary"):
+        writer_cls = BinaryManifestWriter if fmt == "binary" else ManifestWriter
+        with writer_cls(output_path, data, algorithm) as writer:
+            for record in data.get("files", []):
+                writer.write(record)
+        _write_signature(output_path, writer.signature, algorithm, fmt)
+        print("Baseline has been saved and signed successfully")
+        return
+
     #writes baseline with UTF-8 encoding
     with open(output_path, "w", encoding = "utf-8") as f:
-        json.dump(data, f, indent=4, sort_keys=True, ensure_ascii=False)
+        json.dump(data, f, indent=4, sort_keys=True, ensure_ascii=False, default=json_default)
 
     #calculate hash of stored baseline file
     sig = calculate_hash(output_path, algorithm)
-    #creat path for signature file
-    sig_path = output_path.with_suffix(".sig")
-
-#write signature hash to baseline.sig
-    with open(sig_path, "w", encoding="utf-8") as f:
-        f.write(sig)
+    _write_signature(output_path, sig, algorithm)
 
     print("Baseline has been saved and signed successfully")
 
-def verify_signature(baseline_path: Path, algorithm: str):
-    """
-    Verfies integrity of the baseline file
-    If verification fails, program is terminated immediately
-    """
+def _manifest_format(path: Path) -> str:
+    if is_binary(path):
+        return "binary"
+    return "jsonl" if is_jsonl(path) else "json"
 
+
+def _expected_signature(baseline_path: Path, algorithm: str | None = None) -> tuple[str, str]:
+    """(algorithm, hex digest) from the baseline's .sig, terminates if it is missing or unusable"""
     #creat expected path to sig file
-    sig_path=baseline_path.with_suffix(".sig")
+    sig_path = signature_path(baseline_path, _manifest_format(baseline_path))
+    if not sig_path.exists(): #streaming manifests signed before .jsonl.sig/.vlb.sig names
+        sig_path = baseline_path.with_suffix(".sig")
 
     #make sure sig file exists, if missing print error and terminate
     if not sig_path.exists():
@@ -47,22 +183,191 @@ def verify_signature(baseline_path: Path, algorithm: str):
         sys.exit(1)
 
     #load stored signature and read expected hash value
-    stored_sig = sig_path.read_text().strip()
+    sig_algorithm, stored_sig = read_signature(sig_path, algorithm)
+    try:
+        new_hasher(sig_algorithm)
+    except ValueError: #unknown algorithm name in the .sig
+        print(f"ERROR: Baseline signature uses an unsupported algorithm ({sig_algorithm})")
+        sys.exit(1)
+    return sig_algorithm, stored_sig
 
-    #hash the current baseline again
-    current_sig = calculate_hash(baseline_path, algorithm)
 
-    #compare hashes
+def _check_signature(stored_sig: str, current_sig: str) -> None:
+    #compare hashes, terminate on mismatch
     if stored_sig != current_sig:
         print("ERROR: Basline file has be tampered with... closing program")
         sys.exit(1)
 
 
+def verify_signature(baseline_path: Path, algorithm: str | None = None) -> str:
+    """
+    Verfies integrity of the baseline file with the algorithm named in its .sig
+    (algorithm only matters for legacy .sig files without one)
+    If verification fails, program is terminated immediately
+    Returns the algorithm the signature was checked with
+    """
+    sig_algorithm, stored_sig = _expected_signature(baseline_path, algorithm)
+    #hash the current baseline again
+    _check_signature(stored_sig, calculate_hash(baseline_path, sig_algorithm))
+    return sig_algorithm
+
+
+class _SignedReader:
+    """
+    Binary file wrapper that hashes every byte read through it, so a manifest
+    can be parsed and its signature checked in the same read pass
+    """
+
+    def __init__(self, f, algorithm: str):
+        self._f = f
+        self._hash = new_hasher(algorithm)
+
+    def read(self, n: int = -1) -> bytes:
+        data = self._f.read(n)
+        self._hash.update(data)
+        return data
+
+    def readline(self) -> bytes:
+        line = self._f.readline()
+        self._hash.update(line)
+        return line
+
+    def __iter__(self):
+        for line in self._f:
+            self._hash.update(line)
+            yield line
+
+    def hexdigest(self) -> str:
+        """Digest of the whole file, including anything the parser did not read"""
+        while True:
+            block = self._f.read(1 << 20)
+            if not block:
+                break
+            self._hash.update(block)
+        return self._hash.hexdigest()
+
+
+def is_jsonl(path) -> bool:
+    """True if the manifest at path is in the JSON Lines (v5) format"""
+    with open(path, "rb") as f:
+        first = f.readline(1 << 20) #header line only, never the whole file
+    if first.startswith(BINARY_MAGIC):
+        return False
+    try:
+        header = json.loads(first)
+    except ValueError: #indented JSON starts with a lone "{"
+        return False
+    return isinstance(header, dict) and header.get("format") == "jsonl"
+
+
+def is_binary(path) -> bool:
+    """True if the manifest at path is in the compact binary (v6) format"""
+    with open(path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _read_binary_header(f) -> dict:
+    f.read(len(BINARY_MAGIC) + 1) #magic + version
+    (n,) = _U32.unpack(f.read(_U32.size))
+    return json.loads(f.read(n).decode("utf-8"))
 
-def load(path:str, algorithm:str):
+
+def read_header(path) -> dict:
+    """Returns the header of a JSON Lines or binary manifest (everything except files)"""
+    if is_binary(path):
+        with open(path, "rb") as f:
+            return _read_binary_header(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.readline())
+
+
+def _binary_records(f) -> Iterator:
+    #f is positioned just after the header
+    while True:
+        prefix = f.read(_U32.size)
+        if len(prefix) < _U32.size:
+            break
+        (n,) = _U32.unpack(prefix)
+        yield decode_record(f.read(n))
+
+
+def _jsonl_records(f) -> Iterator:
+    #f is a binary file positioned just after the header line
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_records(path) -> Iterator:
+    """
+    Yields the file records of a JSON Lines manifest (dicts) or a binary
+    manifest (FileRecords) one at a time
+    """
+    binary = is_binary(path)
+    with open(path, "rb") as f:
+        if binary:
+            _read_binary_header(f)
+            yield from _binary_records(f)
+        else:
+            f.readline() #skip header
+            yield from _jsonl_records(f)
+
+
+def _signed_stream(baseline_path: Path, binary: bool, sig_algorithm: str, stored_sig: str) -> Iterator:
+    """
+    Reads a JSON Lines or binary manifest once, hashing the bytes as they are parsed
+    Yields the header first, then every record; the signature is checked after
+    the last record, before the stream reports that it is exhausted, so nothing
+    read from it can be trusted (written out or reported) until then
+    A truncated or altered file usually fails to parse first: the rest of the file
+    is then hashed anyway, so it is reported as tampering like any other mismatch
+    """
+    with open(baseline_path, "rb", buffering=_LOAD_BUFFER) as f:
+        reader = _SignedReader(f, sig_algorithm)
+        try:
+            if binary:
+                yield _read_binary_header(reader)
+                yield from _binary_records(reader)
+            else:
+                yield json.loads(reader.readline())
+                yield from _jsonl_records(reader)
+        except (ValueError, struct.error, KeyError, TypeError):
+            _check_signature(stored_sig, reader.hexdigest()) #hashes what the parser did not read
+            #signed, but unreadable: written by a broken or newer writer
+            print("ERROR: Baseline file could not be parsed... closing program")
+            sys.exit(1)
+        _check_signature(stored_sig, reader.hexdigest())
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Turns the cyclic garbage collector off while a manifest is parsed
+    Parsing only creates new dicts and lists, but each collection rescans
+    every object created so far, which adds up on manifests with millions of records
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load(path:str, algorithm: str | None = None, stream: bool = False, compact_records: bool = False):
     """
     Loads basline manifest only after verifying its integrity
     Returns trusted baseline data or terminates immediately
+    The signature algorithm comes from the .sig file; algorithm is only needed
+    for legacy .sig files (see read_signature)
+    The file is read once: the bytes are hashed as they are parsed, and nothing
+    is returned before the signature matches
+    JSON Lines and binary manifests are parsed record by record; with stream=True,
+    "files" is a lazy iterator that checks the signature when it reaches the end,
+    so the caller must exhaust it before writing or reporting anything it read
+    (the header included), e.g. a merge-join such as --diff
+    compact_records: return FileRecords instead of dicts (binary manifests always do)
     """
     baseline_path = Path(path)
 
@@ -71,9 +376,28 @@ def load(path:str, algorithm:str):
         print("ERROR: No baseline file found")
         sys.exit(1)
 
-    #terminate if tampering is detected
-    verify_signature(baseline_path, algorithm)
+    sig_algorithm, stored_sig = _expected_signature(baseline_path, algorithm)
 
-    #load trusted baseline
-    with open(baseline_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    binary = is_binary(baseline_path)
+    if binary or is_jsonl(baseline_path):
+        records = _signed_stream(baseline_path, binary, sig_algorithm, stored_sig)
+        data = next(records) #an unreadable header already ends the program inside the stream
+        if compact_records:
+            records = map(compact, records)
+        if stream:
+            data["files"] = records
+        else:
+            with _gc_paused():
+                data["files"] = list(records) #list() runs the signature check
+        return data
+
+    #one read into memory, hashed and parsed from the same buffer
+    raw = read_file_bytes(baseline_path)
+    #terminate if tampering is detected
+    _check_signature(stored_sig, new_hasher(sig_algorithm, raw).hexdigest())
+    with _gc_paused():
+        data = json.loads(raw)
+        del raw #only the parsed manifest is kept
+        if compact_records:
+            data["files"] = [compact(rec) for rec in data.get("files", [])]
+    return data
@@ -0,0 +1,141 @@
+# File: merkle.py
+# Description: Per-directory Merkle digests over the manifest file records
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import os
+import struct #length prefixes inside directory digests
+from bisect import bisect_left #skips whole subtrees in a sorted path list
+from .records import FileRecord
+from .utils import new_hasher
+
+MERKLE_VERSION = 1
+
+_U32 = struct.Struct("<I")
+_FILE = b"f"
+_DIR = b"d"
+
+
+def _digest_bytes(value) -> bytes:
+    """Hex digest or raw digest -> bytes, so dict and compact records give the same tree"""
+    if value is None:
+        return b""
+    if isinstance(value, bytes):
+        return value
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        return value.encode("utf-8")
+
+
+def leaf_content(record) -> bytes:
+    """
+    Bytes a file contributes to its directory digest
+    Covers exactly what compare_records looks at: the raw hash and the text snapshot hash
+    """
+    if isinstance(record, FileRecord):
+        raw = record.raw_hash
+        text_hash = record.text.hash if record.text is not None else None
+    else:
+        raw = record.get("raw_hash")
+        text = record.get("text")
+        text_hash = text.get("hash") if text else None
+    raw = _digest_bytes(raw)
+    return _U32.pack(len(raw)) + raw + _digest_bytes(text_hash)
+
+
+def _parent(path: str, sep: str) -> tuple[str, str]:
+    #"a/b/c.txt" -> ("a/b", "c.txt"), top-level entries have the root "" as parent
+    parent, _, name = path.rpartition(sep)
+    return parent, name
+
+
+def build_tree(records, algorithm: str, sep: str = os.sep) -> dict:
+    """
+    Builds the Merkle tree of a list of file records
+    Each directory digest hashes its entries sorted by name (type, name, file
+    content or child directory digest), so equal digests mean equal subtrees
+    Returns {"version", "algorithm", "root", "dirs": {dir path: hex digest}}
+    where the root directory is ""
+    """
+    entries: dict[str, list] = {"": []} #dir path -> [(name, type, content)]
+    for rec in records:
+        parent, name = _parent(rec.get("path"), sep)
+        entries.setdefault(parent, []).append((name, _FILE, leaf_content(rec)))
+
+    #make sure every ancestor directory exists, even if it holds no files directly
+    for d in list(entries):
+        while d:
+            d, _ = _parent(d, sep)
+            if d in entries:
+                break
+            entries[d] = []
+
+    dirs: dict[str, str] = {}
+    #deepest directories first, so child digests are ready before their parent
+    for d in sorted(entries, key=lambda p: p.count(sep) + (1 if p else 0), reverse=True):
+        h = new_hasher(algorithm)
+        for name, kind, content in sorted(entries[d]):
+            name_bytes = name.encode("utf-8", "surrogateescape")
+            h.update(kind + _U32.pack(len(name_bytes)) + name_bytes + _U32.pack(len(content)) + content)
+        digest = h.digest()
+        dirs[d] = digest.hex()
+        if d:
+            parent, name = _parent(d, sep)
+            entries[parent].append((name, _DIR, digest))
+
+    return {
+        "version": MERKLE_VERSION,
+        "algorithm": algorithm,
+        "root": dirs[""],
+        "dirs": dict(sorted(dirs.items())),
+    }
+
+
+def changed_dirs(b_tree: dict, c_tree: dict) -> set | None:
+    """
+    Directories whose digest differs between two trees (or exists on one side only)
+    Returns None if the trees cannot be compared (missing, other algorithm/version)
+    """
+    if not b_tree or not c_tree:
+        return None
+    if b_tree.get("algorithm") != c_tree.get("algorithm") or b_tree.get("version") != c_tree.get("version"):
+        return None
+    if b_tree.get("root") == c_tree.get("root"):
+        return set()
+    b_dirs = b_tree.get("dirs", {})
+    c_dirs = c_tree.get("dirs", {})
+    return {d for d in b_dirs.keys() | c_dirs.keys() if b_dirs.get(d) != c_dirs.get(d)}
+
+
+def paths_in_dirs(paths: list, dirs: set, sep: str = os.sep) -> list:
+    """
+    Paths (sorted) whose parent directory is in dirs
+    A directory outside dirs is unchanged, so its whole subtree is skipped with
+    one bisect instead of being walked file by file
+    """
+    after_sep = chr(ord(sep) + 1) #"a/" <= every path under a/ < "a" + after_sep
+    out = []
+    i = 0
+    n = len(paths)
+    while i < n:
+        path = paths[i]
+        parent, _ = _parent(path, sep)
+        if parent in dirs:
+            out.append(path)
+            i += 1
+            continue
+
+        #climb to the highest unchanged ancestor, then jump past its subtree
+        top = parent
+        while top:
+            up, _ = _parent(top, sep)
+            if up in dirs:
+                break
+            top = up
+        if not top: #root unchanged, nothing left to compare
+            break
+        i = bisect_left(paths, top + after_sep, i + 1)
+    return out
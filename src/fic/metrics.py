@@ -0,0 +1,114 @@
+# File: metrics.py
+# Description: Optional per-stage timing and throughput of a scan or verify run
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import heapq #keeps only the slowest files
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_SLOWEST = 10
+
+#per-file step timings are carried inside the record under this key (so they
+#come back from process pools too) and removed by ScanMetrics.take_records
+TIMINGS_KEY = "_timings"
+
+
+class ScanMetrics:
+    """
+    Timings of one scan/verify cycle
+    stages: wall seconds of the run-level stages (manifest_load, walk, scan,
+    compare, report_build, report_serialize)
+    file_stages: seconds spent per file in hash, extract and snapshot write,
+    summed over all files (so over workers too, it can exceed the wall time)
+    Only created when metrics are turned on; every caller checks for None first,
+    so a run without metrics does no timing at all
+    """
+
+    def __init__(self, slowest: int = DEFAULT_SLOWEST):
+        self.slowest_n = slowest
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.file_stages: dict[str, float] = {"hash": 0.0, "extract": 0.0, "write": 0.0}
+        self.extract_by_kind: dict[str, float] = {}
+        self.files = 0
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+        self._slowest: list[tuple[float, str]] = [] #min-heap of (seconds, path)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Adds the wall time of the with block to stages[name]"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_file(self, path: str, timings: dict) -> None:
+        """Adds one file's step timings ({"hash", "extract", "write", "bytes", "kind"})"""
+        total = 0.0
+        with self._lock:
+            self.files += 1
+            for step in ("hash", "extract", "write"):
+                seconds = timings.get(step, 0.0)
+                self.file_stages[step] += seconds
+                total += seconds
+            if timings.get("kind") and timings.get("extract"):
+                kind = timings["kind"]
+                self.extract_by_kind[kind] = self.extract_by_kind.get(kind, 0.0) + timings["extract"]
+            if timings.get("bytes"):
+                self.files_hashed += 1
+                self.bytes_hashed += timings["bytes"]
+            entry = (total, path)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def take_records(self, records) -> None:
+        """Collects and removes the timings carried by freshly built records"""
+        for rec in records:
+            if isinstance(rec, dict):
+                timings = rec.pop(TIMINGS_KEY, None)
+                if timings is not None:
+                    self.add_file(rec.get("path"), timings)
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        scan = self.stages.get("scan") or elapsed
+        return {
+            "elapsed_seconds": round(elapsed, 4),
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "file_stages": {k: round(v, 4) for k, v in self.file_stages.items()},
+            "extract_by_kind": {k: round(v, 4) for k, v in sorted(self.extract_by_kind.items())},
+            "files": self.files,
+            "files_hashed": self.files_hashed,
+            "bytes_hashed": self.bytes_hashed,
+            "files_per_second": round(self.files / scan, 1) if scan > 0 else None,
+            "mb_per_second": round(self.bytes_hashed / 1e6 / scan, 2) if scan > 0 else None,
+            "slowest": [
+                {"path": path, "seconds": round(seconds, 4)}
+                for seconds, path in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def summary(self) -> str:
+        """One line for log_event"""
+        d = self.as_dict()
+        stages = " ".join(f"{k}={v:.2f}s" for k, v in d["stages"].items())
+        files = " ".join(f"{k}={v:.2f}s" for k, v in d["file_stages"].items())
+        slowest = f", slowest {d['slowest'][0]['path']} ({d['slowest'][0]['seconds']:.2f}s)" if d["slowest"] else ""
+        return (
+            f"Metrics: {stages} | per-file {files} | {d['files']} files, "
+            f"{d['bytes_hashed'] / 1e6:.1f} MB hashed, {d['files_per_second']} files/s, {d['mb_per_second']} MB/s"
+            f"{slowest}"
+        )
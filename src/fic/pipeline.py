@@ -0,0 +1,247 @@
+# File: pipeline.py
+# Description: Thread pipeline of scan stages connected by bounded queues
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import queue #bounded queues between stages give backpressure
+import threading
+import time
+import traceback #a failing item is reported and dropped, like _safe_build_record
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+_STOP = object() #end of input, one per worker
+
+
+class Finished:
+    """Returned by a stage for an item that is complete and skips the later stages"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage: func(item) runs on workers threads
+    func returns the item for the next stage, a Finished(result) to end early,
+    or None to drop the item
+    """
+    name: str
+    func: Callable
+    workers: int = 1
+
+
+class ByteBudget:
+    """
+    Caps the bytes of file buffers in flight between stages
+    A stage acquires a file's size before reading it and the stage that drops
+    the buffer releases it; acquire blocks while the budget is used up
+    One item larger than the whole budget is let through once nothing else
+    is held, so a single huge file cannot stall the pipeline. Callers are
+    served in arrival order, so a stream of small files cannot keep the
+    budget from ever draining for a waiting large one
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.used = 0
+        self.peak = 0
+        self.wait = 0.0 #seconds spent blocked in acquire, summed over threads
+        self._cond = threading.Condition()
+        self._next_ticket = 0 #arrival order of acquire calls
+        self._serving = 0 #ticket allowed to take the budget next
+
+    def _fits(self, n: int) -> bool:
+        return not self.used or self.used + n <= self.limit
+
+    def acquire(self, n: int) -> None:
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            if ticket != self._serving or not self._fits(n):
+                start = time.perf_counter()
+                while ticket != self._serving or not self._fits(n):
+                    self._cond.wait()
+                self.wait += time.perf_counter() - start
+            self._serving += 1
+            self.used += n
+            if self.used > self.peak:
+                self.peak = self.used
+            self._cond.notify_all() #the next caller in line may fit as well
+
+    def release(self, n: int) -> None:
+        with self._cond:
+            self.used -= n
+            self._cond.notify_all()
+
+    def as_dict(self) -> dict:
+        return {"limit_bytes": self.limit, "peak_bytes": self.peak, "wait_seconds": round(self.wait, 4)}
+
+
+class _StageStats:
+    #counters for one stage and its input queue, updated under a lock
+    def __init__(self, name: str, workers: int, capacity: int):
+        self.name = name
+        self.workers = workers
+        self.capacity = capacity
+        self.items = 0
+        self.busy = 0.0 #seconds spent in func, summed over workers
+        self.put_wait = 0.0 #seconds the previous stage spent blocked on this queue (backpressure)
+        self.max_depth = 0
+        self.depth_total = 0 #queue depth summed over every put, for the mean
+        self.puts = 0
+        self.lock = threading.Lock()
+
+    def as_dict(self, wall: float) -> dict:
+        capacity = wall * self.workers
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy, 4),
+            "utilisation": round(self.busy / capacity, 4) if capacity > 0 else 0.0,
+            "queue_capacity": self.capacity,
+            "queue_max_depth": self.max_depth,
+            "queue_mean_depth": round(self.depth_total / self.puts, 2) if self.puts else 0.0,
+            "blocked_put_seconds": round(self.put_wait, 4),
+        }
+
+
+class Pipeline:
+    """
+    Runs items from a source iterator through a list of stages, each on its own
+    worker threads, connected by queues of at most queue_size items
+    A full queue blocks the stage feeding it, so at most about
+    queue_size * len(stages) items are in flight at once; items that carry
+    whole file buffers must also hold a ByteBudget (budget=...), since the
+    item count alone does not bound their memory
+
+    pipeline = Pipeline([Stage("hash", f, 4), Stage("write", g)], queue_size=64)
+    results = pipeline.run(source)
+    pipeline.stats -> per-stage items, utilisation and queue depths
+
+    Results come back in completion order
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 64, budget: ByteBudget | None = None):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.budget = budget #only reported here, the stage functions acquire and release it
+        self.stats: dict = {}
+
+    def run(self, source: Iterable) -> list:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        counters = [_StageStats(s.name, s.workers, self.queue_size) for s in self.stages]
+        source_stats = _StageStats("source", 1, 0)
+        results = []
+        errors = []
+
+        def put(index: int, item) -> None:
+            q = queues[index]
+            c = counters[index]
+            start = time.perf_counter()
+            q.put(item)
+            waited = time.perf_counter() - start
+            depth = q.qsize()
+            with c.lock:
+                c.put_wait += waited
+                c.puts += 1
+                c.depth_total += depth
+                if depth > c.max_depth:
+                    c.max_depth = depth
+
+        def feed() -> None:
+            start = time.perf_counter()
+            blocked = 0.0
+            try:
+                for item in source:
+                    source_stats.items += 1
+                    before = time.perf_counter()
+                    put(0, item)
+                    blocked += time.perf_counter() - before
+            except BaseException as e: #reported after the pipeline has drained
+                errors.append(e)
+            finally:
+                source_stats.busy = time.perf_counter() - start - blocked
+
+        def work(index: int) -> None:
+            stage = self.stages[index]
+            q = queues[index]
+            c = counters[index]
+            last = index == len(self.stages) - 1
+            while True:
+                item = q.get()
+                if item is _STOP:
+                    return
+                start = time.perf_counter()
+                try:
+                    out = stage.func(item)
+                except Exception:
+                    traceback.print_exc()
+                    out = None
+                item = None #not kept alive (with its buffer) while blocked on the next queue
+                elapsed = time.perf_counter() - start
+                with c.lock:
+                    c.items += 1
+                    c.busy += elapsed
+                if out is None:
+                    continue
+                if isinstance(out, Finished):
+                    results.append(out.value)
+                elif last:
+                    results.append(out)
+                else:
+                    put(index + 1, out)
+
+        wall_start = time.perf_counter()
+        threads = []
+        for index, stage in enumerate(self.stages):
+            group = [threading.Thread(target=work, args=(index,), daemon=True) for _ in range(max(1, stage.workers))]
+            for t in group:
+                t.start()
+            threads.append(group)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        feeder.join()
+
+        #drain stage by stage: a stage only stops once everything before it has finished
+        for index, group in enumerate(threads):
+            for _ in group:
+                queues[index].put(_STOP)
+            for t in group:
+                t.join()
+
+        wall = time.perf_counter() - wall_start
+        self.stats = {
+            "wall_seconds": round(wall, 4),
+            "queue_size": self.queue_size,
+            "source": {"items": source_stats.items, "busy_seconds": round(source_stats.busy, 4)},
+            "stages": {c.name: c.as_dict(wall) for c in counters},
+        }
+        if self.budget is not None:
+            self.stats["buffer"] = self.budget.as_dict()
+        if errors:
+            raise errors[0]
+        return results
+
+
+def format_stats(stats: dict) -> str:
+    """One line per stage, for the console and the log"""
+    lines = [f"Pipeline: {stats['wall_seconds']:.2f}s, queue size {stats['queue_size']}"]
+    buffer = stats.get("buffer")
+    if buffer:
+        lines[0] += (
+            f", buffers peak {buffer['peak_bytes'] / 1e6:.1f}/{buffer['limit_bytes'] / 1e6:.0f} MB "
+            f"(waited {buffer['wait_seconds']:.2f}s)"
+        )
+    for name, s in stats["stages"].items():
+        lines.append(
+            f"  {name:<8} workers={s['workers']:<3} items={s['items']:<7} "
+            f"util={s['utilisation'] * 100:5.1f}% queue max/mean={s['queue_max_depth']}/{s['queue_mean_depth']} "
+            f"blocked={s['blocked_put_seconds']:.2f}s"
+        )
+    return "\n".join(lines)
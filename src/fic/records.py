@@ -0,0 +1,322 @@
+# File: records.py
+# Description: Compact in-memory file records and the binary manifest encoding
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import json
+import struct #fixed-width fields of the binary encoding
+import sys #string interning for repeated values
+
+BINARY_MAGIC = b"VLMB" #first bytes of a binary manifest
+BINARY_VERSION = 1
+
+#size, mtime, ctime, mode, mtime_ns, ctime_ns, inode
+_STAT = struct.Struct("<QqqIqqQ")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+#flag bits in each binary record
+_HAS_TEXT = 1
+_HAS_EXTRA = 2
+_HAS_STAT_NS = 4
+
+#record keys stored in slots, anything else goes in extra
+_RECORD_KEYS = ("path", "ext", "size", "mtime", "ctime", "mode", "mtime_ns", "ctime_ns", "inode", "raw_hash", "text")
+_TEXT_KEYS = ("kind", "hash", "snapshot", "chunking", "chunks")
+
+_chunking_cache: dict[str, dict] = {} #identical chunking settings share one dict
+
+
+def _shared_chunking(chunking: dict | None) -> dict | None:
+    if chunking is None:
+        return None
+    key = json.dumps(chunking, sort_keys=True)
+    return _chunking_cache.setdefault(key, chunking)
+
+
+def _unhex(value):
+    """Hex digest -> raw bytes (values that are not hex are kept as they are)"""
+    if isinstance(value, str):
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _hex(value):
+    return value.hex() if isinstance(value, bytes) else value
+
+
+class TextInfo:
+    """
+    Compact form of a record's "text" block
+    hash is the raw digest and chunks is every chunk digest packed into one bytes blob
+    get() returns the same values as the JSON dict (hex strings, list of hex chunks)
+    """
+    __slots__ = ("kind", "hash", "snapshot", "chunking", "chunks", "extra")
+
+    def __init__(self, kind, hash, snapshot, chunking, chunks, extra=None):
+        self.kind = kind
+        self.hash = hash
+        self.snapshot = snapshot
+        self.chunking = chunking
+        self.chunks = chunks
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TextInfo":
+        digest = _unhex(d.get("hash"))
+        chunk_list = d.get("chunks")
+        if chunk_list is None:
+            chunks = None
+        else:
+            packed = [_unhex(c) for c in chunk_list]
+            size = len(digest) if isinstance(digest, bytes) else None
+            if all(isinstance(c, bytes) and len(c) == size for c in packed):
+                chunks = b"".join(packed)
+            else: #not fixed-size digests, keep the list
+                chunks = list(chunk_list)
+        extra = {k: v for k, v in d.items() if k not in _TEXT_KEYS} or None
+        return cls(
+            sys.intern(d["kind"]) if d.get("kind") else d.get("kind"),
+            digest,
+            d.get("snapshot"),
+            _shared_chunking(d.get("chunking")),
+            chunks,
+            extra
+        )
+
+    @property
+    def digest_size(self) -> int:
+        return len(self.hash) if isinstance(self.hash, bytes) else 0
+
+    def chunk_digests(self) -> list:
+        """Chunk digests as a list of raw bytes (or the stored list if not packed)"""
+        if not isinstance(self.chunks, bytes):
+            return list(self.chunks or [])
+        n = self.digest_size
+        return [self.chunks[i:i + n] for i in range(0, len(self.chunks), n)]
+
+    def get(self, key, default=None):
+        if key == "hash":
+            return _hex(self.hash)
+        if key == "chunks":
+            if self.chunks is None:
+                return default
+            return [_hex(c) for c in self.chunk_digests()]
+        if key in _TEXT_KEYS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return (self.extra or {}).get(key, default)
+
+    def to_dict(self) -> dict:
+        d = {k: self.get(k) for k in _TEXT_KEYS}
+        d.update(self.extra or {})
+        return d
+
+
+class FileRecord:
+    """
+    Compact form of one manifest file record (slots instead of a dict, raw digest bytes)
+    Behaves like the JSON dict for reading: rec.get("raw_hash") returns the hex
+    digest and rec.get("text") returns a TextInfo, so compare and the report
+    writer accept either form
+    """
+    __slots__ = _RECORD_KEYS + ("extra",)
+
+    def __init__(self, path, ext, size, mtime, ctime, mode, mtime_ns, ctime_ns, inode, raw_hash, text, extra=None):
+        self.path = path
+        self.ext = ext
+        self.size = size
+        self.mtime = mtime
+        self.ctime = ctime
+        self.mode = mode
+        self.mtime_ns = mtime_ns
+        self.ctime_ns = ctime_ns
+        self.inode = inode
+        self.raw_hash = raw_hash
+        self.text = text
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "FileRecord":
+        text = d.get("text")
+        extra = {k: v for k, v in d.items() if k not in _RECORD_KEYS} or None
+        return cls(
+            d.get("path"),
+            sys.intern(d.get("ext") or ""),
+            d.get("size"),
+            d.get("mtime"),
+            d.get("ctime"),
+            d.get("mode"),
+            d.get("mtime_ns"),
+            d.get("ctime_ns"),
+            d.get("inode"),
+            _unhex(d.get("raw_hash")),
+            TextInfo.from_dict(text) if text else None,
+            extra
+        )
+
+    def get(self, key, default=None):
+        if key == "raw_hash":
+            return _hex(self.raw_hash)
+        if key in _RECORD_KEYS:
+            return getattr(self, key)
+        return (self.extra or {}).get(key, default)
+
+    def __getitem__(self, key):
+        if key not in _RECORD_KEYS and key not in (self.extra or {}):
+            raise KeyError(key)
+        return self.get(key)
+
+    def keys(self):
+        return list(_RECORD_KEYS) + list(self.extra or {})
+
+    def to_dict(self) -> dict:
+        d = {k: self.get(k) for k in _RECORD_KEYS}
+        if self.text is not None:
+            d["text"] = self.text.to_dict()
+        d.update(self.extra or {})
+        return d
+
+
+def compact(record):
+    """Dict record -> FileRecord (FileRecords are returned unchanged)"""
+    return record if isinstance(record, FileRecord) else FileRecord.from_dict(record)
+
+
+def as_dict(record) -> dict:
+    """Record of either form -> new plain JSON dict"""
+    return record.to_dict() if isinstance(record, FileRecord) else dict(record)
+
+
+def json_default(obj):
+    """json.dump default= hook so manifests holding FileRecords serialise normally"""
+    if isinstance(obj, (FileRecord, TextInfo)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+#binary encoding
+def _pack_str(value: str | None, width: struct.Struct) -> bytes:
+    data = (value or "").encode("utf-8")
+    return width.pack(len(data)) + data
+
+
+def _pack_bytes(value, width: struct.Struct) -> bytes:
+    data = value if isinstance(value, bytes) else (value or "").encode("utf-8")
+    return width.pack(len(data)) + data
+
+
+def encode_record(record) -> bytes:
+    """
+    Encodes one record (dict or FileRecord) as:
+    path, ext, stat fields, raw digest, flags, then optional text block and extra JSON
+    """
+    rec = compact(record)
+    flags = 0
+    if rec.text is not None:
+        flags |= _HAS_TEXT
+    if rec.extra:
+        flags |= _HAS_EXTRA
+    if rec.mtime_ns is not None:
+        flags |= _HAS_STAT_NS
+
+    parts = [
+        _pack_str(rec.path, _U16),
+        _pack_str(rec.ext, _U8),
+        _STAT.pack(
+            rec.size or 0, rec.mtime or 0, rec.ctime or 0, rec.mode or 0,
+            rec.mtime_ns or 0, rec.ctime_ns or 0, rec.inode or 0
+        ),
+        _pack_bytes(rec.raw_hash, _U8),
+        _U8.pack(flags),
+    ]
+
+    if rec.text is not None:
+        t = rec.text
+        #chunk list that could not be packed is stored as JSON in the text extra
+        t_extra = dict(t.extra or {})
+        blob = t.chunks
+        if blob is not None and not isinstance(blob, bytes):
+            t_extra["chunks"] = blob
+            blob = b""
+        parts += [
+            _pack_str(t.kind, _U8),
+            _pack_str(t.snapshot, _U16),
+            _pack_str(json.dumps(t.chunking, sort_keys=True) if t.chunking is not None else "", _U16),
+            _pack_bytes(t.hash, _U8),
+            _U32.pack(0xFFFFFFFF if blob is None else len(blob)),
+            blob or b"",
+            _pack_str(json.dumps(t_extra, sort_keys=True) if t_extra else "", _U32),
+        ]
+
+    if rec.extra:
+        parts.append(_pack_str(json.dumps(rec.extra, sort_keys=True, ensure_ascii=False), _U32))
+
+    return b"".join(parts)
+
+
+class _Reader:
+    """Cursor over one encoded record"""
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def fixed(self, fmt: struct.Struct):
+        values = fmt.unpack_from(self.buf, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def raw(self, n: int) -> bytes:
+        data = bytes(self.buf[self.pos:self.pos + n])
+        self.pos += n
+        return data
+
+    def sized(self, width: struct.Struct) -> bytes:
+        (n,) = self.fixed(width)
+        return self.raw(n)
+
+    def text(self, width: struct.Struct) -> str:
+        return self.sized(width).decode("utf-8")
+
+
+def decode_record(buf) -> FileRecord:
+    """Inverse of encode_record"""
+    r = _Reader(buf)
+    path = r.text(_U16)
+    ext = sys.intern(r.text(_U8))
+    size, mtime, ctime, mode, mtime_ns, ctime_ns, inode = r.fixed(_STAT)
+    raw_hash = r.sized(_U8) or None #None (no digest) is stored as zero bytes
+    (flags,) = r.fixed(_U8)
+
+    if not flags & _HAS_STAT_NS:
+        mtime_ns = ctime_ns = inode = None
+
+    text = None
+    if flags & _HAS_TEXT:
+        kind = sys.intern(r.text(_U8))
+        snapshot = r.text(_U16) or None
+        chunking_json = r.text(_U16)
+        digest = r.sized(_U8) or None
+        (blob_len,) = r.fixed(_U32)
+        blob = None if blob_len == 0xFFFFFFFF else r.raw(blob_len)
+        t_extra_json = r.text(_U32)
+        t_extra = json.loads(t_extra_json) if t_extra_json else None
+        if t_extra and "chunks" in t_extra:
+            blob = t_extra.pop("chunks")
+        text = TextInfo(
+            kind or None, digest, snapshot,
+            _shared_chunking(json.loads(chunking_json)) if chunking_json else None,
+            blob, t_extra or None
+        )
+
+    extra = json.loads(r.text(_U32)) if flags & _HAS_EXTRA else None
+
+    return FileRecord(path, ext, size, mtime, ctime, mode, mtime_ns, ctime_ns, inode, raw_hash, text, extra)
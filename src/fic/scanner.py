@@ -6,17 +6,76 @@
 
 #Imports
 from __future__ import annotations
-import os #legacy functions
+import os #legacy functions and directory listing
+import time #recent directory changes are not trusted for pruning; per-file step timings
 import traceback #print stackable traces for debugging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor #worker pools for parallel hashing
+from functools import partial #binds the per-scan arguments for pool workers
+from dataclasses import dataclass, field, replace #per-scan record options
 from pathlib import Path #path handling and recursive scanning
-from .snapshot import extract_text_snapshot #snapshot extraction function
-from .utils import calculate_hash, calculate_text_hash, calculate_chunk_hashes
+from .snapshot import extract_text_snapshot, is_extractable #snapshot extraction function
+from .records import as_dict #reference records may be compact FileRecords
+from .merkle import build_tree #directory digests stored in the manifest
+from .pipeline import Pipeline, Stage, Finished, ByteBudget #staged scan with bounded queues
+from .metrics import ScanMetrics, TIMINGS_KEY #optional per-stage timings (build_baseline(metrics=...))
+from .ignore import ExcludeRules #--exclude / .veriliteignore globs
+from .store import SnapshotStore, STORE_DIR_NAME #content-addressed snapshots
+from .snapfile import encode_snapshot, COMPRESSED_SUFFIX #compressed snapshots framed per chunk
+from .utils import calculate_hash, calculate_hashes, calculate_bytes_hashes, calculate_text_hash, calculate_chunk_hashes
+from .utils import read_file_bytes, default_chunking, calculate_sample_hash, calculate_tree_hash, tree_algorithm
+
+#set on tree-hashed records of text-like files, whose text is not extracted
+TREE_TEXT_NOTE = "text_not_extracted_tree_hashed"
+
+@dataclass(frozen = True) #immutable so one instance can be shared by every worker
+class ScanOptions:
+    """
+    Settings that change how each file record is built
+    chunking: how text snapshots are split into hashed chunks (stored in the manifest)
+    snapshot_store: write snapshots to a content-addressed SnapshotStore at the
+    snapshot root instead of mirroring the source tree
+    snapshot_compression: None for plain .txt snapshots, or "zlib"/"lzma" for
+    compressed snapshots framed per chunk (see snapfile.py)
+    digests: extra algorithms hashed in the same read pass as the primary one,
+    stored per file as {"digests": {algorithm: hex}} (raw_hash stays the primary)
+    screen: None, or sampled pre-screen settings (utils.screen_settings); files of
+    at least screen["min_size"] bytes also get a "screen_hash" next to raw_hash
+    tree_hash: None, or tree-hash settings (utils.tree_hash_settings); files of at
+    least tree_hash["min_size"] bytes are hashed in segments, raw_hash is then the
+    tree root (tagged "raw_algorithm": "tree-<algorithm>") and "segments" holds
+    the segment size and digests. tree_workers: threads per file, 0 for one per CPU
+    metrics: time the hash/extract/write steps of every file and carry them in
+    record["_timings"] (set by build_baseline(metrics=...), which removes them again)
+    """
+    chunking: dict = field(default_factory=default_chunking)
+    snapshot_store: bool = False
+    snapshot_compression: str | None = None
+    digests: tuple[str, ...] = ()
+    screen: dict | None = None
+    tree_hash: dict | None = None
+    tree_workers: int = 0
+    metrics: bool = False
+
+
+@dataclass(frozen = True)
+class PipelineOptions:
+    """
+    Worker counts and queue size of the staged scan (build_baseline(pipeline=...))
+    queue_size bounds every queue between stages, which caps how many items
+    (and extracted texts) wait at once
+    buffer_bytes caps the file buffers read for text extraction that are held
+    between the read/hash and extract stages, whatever the file sizes
+    """
+    hash_workers: int = 4
+    extract_workers: int = 2
+    queue_size: int = 64
+    buffer_bytes: int = 256 * 1024 * 1024
 
 
 def scan_folder(file_path: str) -> list[str]: #legacy helper
     """
     Returns a flat list of absolute file paths inside a folder'
-    (Legacy helper - still useable but baseline building uses Path.rglob)
+    (Legacy helper - still useable but baseline building uses _walk_files)
     """
     f = []
     for dirpath, dirnames, filenames in os.walk(file_path):
@@ -51,63 +110,663 @@ def snapshot_output_path(snapshot_root: Path, base_root: Path, file_path: Path)
     rel = file_path.relative_to(base_root) #converts absolute file into relative path
     return (snapshot_root / rel).with_suffix(file_path.suffix + ".txt") #joins snapshot root and relative path
 
-def save_snapshot(out_path: Path, text: str) -> None: #writes extracted text to disk
+def save_snapshot(out_path: Path, text: str, compression: str | None = None, chunking: dict | None = None) -> None:
     """
     Writes the extracted/normalised text snapshot to disk.
+    compression: "zlib"/"lzma" writes a compressed snapshot with one frame per chunk
     """
     out_path.parent.mkdir(parents=True, exist_ok=True) #creates parent folder if not there
+    if compression:
+        out_path.write_bytes(encode_snapshot(text, chunking, compression))
+        return
     #writes text snapshot, replaces errors, forces newlines
     out_path.write_text(text, encoding="utf-8", errors="replace", newline="\n") 
 
+#files and directories modified this recently (ns) are not trusted by the next scan:
+#a change within the same timestamp tick (coarse on FAT, SMB, ...) keeps the old mtime
+_RACY_NS = 2_000_000_000
+
+def stat_matches(stat: os.stat_result, record: dict | None) -> bool:
+    """
+    True if a stat result matches the stat tuple stored in a previous record
+    (size, mtime, ctime and inode, all at nanosecond resolution)
+    Records written before these fields existed never match, nor do records
+    whose file was still racy when it was hashed (see _stat_fields)
+    """
+    if not record or record.get("mtime_ns") is None or record.get("ctime_ns") is None:
+        return False
+    return (
+        record.get("size") == stat.st_size
+        and record.get("mtime_ns") == stat.st_mtime_ns
+        and record.get("ctime_ns") == stat.st_ctime_ns
+        and record.get("inode") == stat.st_ino
+    )
+
+def _stat_fields(stat: os.stat_result, started_ns: int) -> dict:
+    """
+    Stat fields of a record; started_ns: time.time_ns() before the file was read
+    A file changed within _RACY_NS of being read could be rewritten again in the
+    same timestamp tick with the same size, so its stat tuple is left out (like
+    in records written before it existed) and fast verify rehashes it next time
+    """
+    racy = started_ns - max(stat.st_mtime_ns, stat.st_ctime_ns) <= _RACY_NS
+    return {
+        "size": stat.st_size,
+        "mtime": int(stat.st_mtime),
+        "ctime": int(stat.st_ctime),
+        "mode": stat.st_mode,
+        "mtime_ns": None if racy else stat.st_mtime_ns, #full resolution stat tuple used by fast verify
+        "ctime_ns": None if racy else stat.st_ctime_ns,
+        "inode": None if racy else stat.st_ino,
+    }
+
 #builds single json record for one file
-def build_file_record(file_path: Path, base_root: Path, snapshot_root: Path, algorithm: str) -> dict:
+def build_file_record(
+    file_path: Path,
+    base_root: Path,
+    snapshot_root: Path,
+    algorithm: str,
+    reference: dict | None = None,
+    options: ScanOptions | None = None,
+    stat: os.stat_result | None = None,
+    text_reference: dict | None = None,
+    screen_reference: dict | None = None
+) -> dict:
     """
     Builds single record for baseline/verification and includes:
-    - raw hash
+    - raw hash (algorithm), plus any options.digests from the same read
     - metadata
     - optional extracted text snapshot hash and saved snapshot txt
+    If a reference record is given and its stat tuple still matches the file,
+    the reference is trusted and returned without rehashing (fast verify)
+    stat: stat result already taken by the directory walker (DirEntry.stat)
+    text_reference: optional baseline record; if the raw hash still matches it,
+    its text block is copied instead of extracting the text again
+    screen_reference: optional baseline record; for a file large enough to be
+    pre-screened whose screen hash still matches it, the baseline's hashes are
+    kept without a full read and the record is marked "check": "screen".
+    A mismatch means a likely change, so the file is fully hashed ("check": "full");
+    an empty dict stands for a file that is not in the baseline, which is
+    always fully hashed and also marked "check": "full"
+    """
+    options = options or ScanOptions()
+    if options.metrics:
+        return _timed_file_record(
+            file_path, base_root, snapshot_root, algorithm, reference, options, stat, text_reference, screen_reference
+        )
+    record, data, finished = _hash_file(
+        file_path, base_root, algorithm, reference, options, stat, text_reference, screen_reference
+    )
+    if finished:
+        return record
+    text = _extract_text(file_path, data, algorithm, options)
+    del data
+    return _write_text(record, file_path, base_root, snapshot_root, options, text)
+
+def _timed_file_record(
+    file_path: Path,
+    base_root: Path,
+    snapshot_root: Path,
+    algorithm: str,
+    reference: dict | None,
+    options: ScanOptions,
+    stat: os.stat_result | None,
+    text_reference: dict | None,
+    screen_reference: dict | None
+) -> dict:
+    #build_file_record with each step timed, kept apart so the untimed path has no overhead
+    start = time.perf_counter()
+    record, data, finished = _hash_file(
+        file_path, base_root, algorithm, reference, options, stat, text_reference, screen_reference
+    )
+    timings = record.setdefault(TIMINGS_KEY, {"bytes": 0}) #reused or screened records hashed nothing
+    timings["hash"] = time.perf_counter() - start
+    if finished:
+        return record
+    start = time.perf_counter()
+    text = _extract_text(file_path, data, algorithm, options)
+    del data
+    timings["extract"] = time.perf_counter() - start
+    if text is not None:
+        timings["kind"] = text[0]
+        start = time.perf_counter()
+        record = _write_text(record, file_path, base_root, snapshot_root, options, text)
+        timings["write"] = time.perf_counter() - start
+    return record
+
+#the three steps of build_file_record, also run as separate stages by the scan pipeline
+def _hash_file(
+    file_path: Path,
+    base_root: Path,
+    algorithm: str,
+    reference: dict | None,
+    options: ScanOptions,
+    stat: os.stat_result | None,
+    text_reference: dict | None,
+    screen_reference: dict | None
+) -> tuple[dict, bytearray | None, bool]:
+    """
+    Stat, read and hash step
+    Returns (record, file bytes kept for the extractor or None, finished); when
+    finished is True the record is complete (reused, screened, or its text block
+    was copied) and needs no extraction
     """
-    stat = file_path.stat() #reads metadata from FS
+    started = time.time_ns() #before the read, for the racy check in _stat_fields
+    if stat is None:
+        stat = file_path.stat() #reads metadata from FS
+
+    if stat_matches(stat, reference): #unchanged stat tuple, skip rehashing
+        return as_dict(reference), None, True
+
+    screen_hash = None
+    if options.screen is not None and stat.st_size >= options.screen["min_size"]:
+        screen_hash = calculate_sample_hash(file_path, algorithm, options.screen)
+        if screen_reference is not None and screen_reference.get("screen_hash") == screen_hash:
+            return _screened_record(screen_reference, stat, started), None, True
+
+    segments = None
+    algorithms = (algorithm,) + options.digests
+    tree_hashed = _is_tree_hashed(stat.st_size, options)
+    if tree_hashed:
+        #huge file: segments hashed in parallel; extra digests still need one sequential pass
+        raw_hash, segments = calculate_tree_hash(
+            file_path, algorithm, options.tree_hash["segment_size"], options.tree_workers
+        )
+        algorithms = options.digests
+
+    if _keeps_bytes(file_path, stat.st_size, options): #read once, the same bytes feed the raw hash and the extractor
+        data = read_file_bytes(file_path)
+        hashes = calculate_bytes_hashes(data, algorithms)
+    else: #no snapshot needed, just stream it through the hashers
+        data = None
+        hashes = calculate_hashes(str(file_path), algorithms) if algorithms else {}
+    if segments is None:
+        raw_hash = hashes[algorithm]
 
     record = { #record dict
         "path": str(file_path.relative_to(base_root)),
         "ext": file_path.suffix.lower(),
-        "size": stat.st_size,
-        "mtime": int(stat.st_mtime),
-        "ctime": int(getattr(stat, "st_mode", 0)),
-        "mode": int(getattr(stat, "st_ctime", 0)),
-        "raw_hash": calculate_hash(str(file_path), algorithm),
+        **_stat_fields(stat, started),
+        "raw_hash": raw_hash,
         "text": None #no snapshot info by default
     }
+    if segments is not None: #raw_hash is a tree root, not a plain digest of the file
+        record["raw_algorithm"] = tree_algorithm(algorithm)
+        record["segments"] = {"size": options.tree_hash["segment_size"], "digests": segments}
+        if is_extractable(file_path): #a second whole-file read just for text would double the I/O
+            record["text_note"] = TREE_TEXT_NOTE
+    if options.digests: #secondary digests for tools that need another algorithm
+        record["digests"] = {algo: hashes[algo] for algo in options.digests}
+    if options.metrics: #bytes actually read by the full hash, removed again by ScanMetrics
+        record[TIMINGS_KEY] = {"bytes": stat.st_size}
+    if screen_hash is not None:
+        record["screen_hash"] = screen_hash
+        if screen_reference is not None: #screened, but suspected changed (or new): fully hashed
+            record["check"] = "full"
+
+    if text_reference is not None and text_reference.get("raw_hash") == raw_hash:
+        reused = _reusable_text(text_reference, options)
+        if reused is not False: #same bytes give the same text, skip extraction
+            record["text"] = reused
+            return record, None, True
+
+    return record, data, data is None #no bytes kept: not a file type with a text snapshot
+
+def _is_tree_hashed(size: int, options: ScanOptions) -> bool:
+    return options.tree_hash is not None and size >= options.tree_hash["min_size"]
+
+def _keeps_bytes(file_path: Path, size: int, options: ScanOptions) -> bool:
+    """True if the whole file is read into memory for the text extractor"""
+    return is_extractable(file_path) and not _is_tree_hashed(size, options)
+
+def _extract_text(file_path: Path, data, algorithm: str, options: ScanOptions) -> tuple | None:
+    """
+    Text extraction and hashing step
+    Returns (kind, text, text hash, chunk hashes), or None if there is no text to keep
+    """
+    snap = extract_text_snapshot(file_path, data) #extracts snapshot and stores text/chunks
+    if snap is None or not snap.text.strip(): #file type not supported or no text
+        return None
+    text_hash = calculate_text_hash(snap.text, algorithm) #hashes extracted text
+    #list of chunk hashes
+    chunks = calculate_chunk_hashes(snap.text, algorithm, chunking=options.chunking)
+    return snap.kind, snap.text, text_hash, chunks
+
+def _write_text(
+    record: dict,
+    file_path: Path,
+    base_root: Path,
+    snapshot_root: Path,
+    options: ScanOptions,
+    text: tuple | None
+) -> dict:
+    """Snapshot write step: saves the extracted text and adds the text block to the record"""
+    if text is None:
+        return record
+    kind, snap_text, text_hash, chunks = text
 
-    snap = extract_text_snapshot(file_path) #extracts snapshot and stores text/chunks
-    if snap is not None and snap.text.strip():#proceed if file type is supported
+    compression = options.snapshot_compression
+    if options.snapshot_store: #one blob per distinct text, skipped if already stored
+        if compression:
+            encode = partial(encode_snapshot, snap_text, options.chunking, compression)
+            snap_rel = SnapshotStore(snapshot_root).put(text_hash, encode, ".txt" + COMPRESSED_SUFFIX)
+        else:
+            snap_rel = SnapshotStore(snapshot_root).put(text_hash, partial(snap_text.encode, "utf-8", "replace"))
+    else:
         out_path = snapshot_output_path(snapshot_root, base_root, file_path) #figures out where to save snapshot
-        save_snapshot(out_path, snap.text)#writes to disk
-
-        record["text"] = { #adds text block 
-            "kind": snap.kind,
-            "hash": calculate_text_hash(snap.text, algorithm), #hashes extracted text
-            "snapshot": str(out_path.relative_to(snapshot_root)), #stores snapshot file's path relative to snapshot_root
-            "chunking": { #chunking settings
-                "method": "lines",
-                "max_lines": 20
-            },
-            "chunks": calculate_chunk_hashes(snap.text, algorithm, max_lines=20) #stores list of chunk hashes
-        }
+        if compression:
+            out_path = out_path.with_name(out_path.name + COMPRESSED_SUFFIX)
+        save_snapshot(out_path, snap_text, compression, options.chunking)#writes to disk
+        snap_rel = str(out_path.relative_to(snapshot_root))
+
+    record["text"] = { #adds text block 
+        "kind": kind,
+        "hash": text_hash,
+        "snapshot": snap_rel, #snapshot file's path relative to snapshot_root
+        "chunking": dict(options.chunking), #chunking settings
+        "chunks": chunks
+    }
+    return record
+
+def _tree_header(tree_hash: dict | None, algorithm: str) -> dict | None:
+    #manifest copy of the settings, with the algorithm tag used by tree-hashed records
+    if tree_hash is None:
+        return None
+    return {"min_size": tree_hash["min_size"], "segment_size": tree_hash["segment_size"],
+            "algorithm": tree_algorithm(algorithm)}
 
+def tree_hash_options(manifest: dict) -> dict | None:
+    """ScanOptions.tree_hash matching the settings a manifest was built with"""
+    tree = manifest.get("tree_hash")
+    if not tree:
+        return None
+    return {"min_size": tree["min_size"], "segment_size": tree["segment_size"]}
+
+def tree_hash_mismatch(old: dict, new: dict) -> str | None:
+    """
+    Why two manifests' tree-hash settings make their raw hashes incomparable, or None
+    A file hashed whole on one side and in segments on the other (or with other
+    segment sizes) never matches, even when its bytes are the same
+    """
+    old_tree, new_tree = tree_hash_options(old), tree_hash_options(new)
+    if old_tree == new_tree:
+        return None
+
+    def describe(tree):
+        if tree is None:
+            return "off"
+        return f"from {tree['min_size'] // (1024 * 1024)} MiB, {tree['segment_size'] // (1024 * 1024)} MiB segments"
+    return f"{describe(old_tree)} vs {describe(new_tree)}"
+
+def _screened_record(reference, stat: os.stat_result, started_ns: int) -> dict:
+    """Baseline record trusted on its screen hash, with the current stat fields"""
+    record = as_dict(reference)
+    record.update(_stat_fields(stat, started_ns))
+    record["check"] = "screen" #raw_hash was not recomputed
     return record
 
+def _reusable_text(reference, options: ScanOptions):
+    """
+    Text block of a reference record as a plain dict (or None if it had none),
+    or False if it was chunked with other settings and cannot be reused
+    """
+    text = reference.get("text")
+    if text is None:
+        return None
+    text = text.to_dict() if hasattr(text, "to_dict") else dict(text)
+    if text.get("chunking") != options.chunking:
+        return False
+    return text
+
 def iter_files(base_root: Path): #generator that yields every file under base_root
     """
     Generator: yields all files under base_root
+    (Legacy helper - baseline building uses _walk_files, which prunes excluded folders)
+    """
+    for file_path, _ in _walk_files(base_root, base_root, _Excludes(), {}):
+        yield file_path
+
+#folders VeriLite writes next to a manifest, never scanned
+SNAPSHOT_DIR_NAMES = ("snapshots", "snapshots_baseline", "snapshots_current", STORE_DIR_NAME)
+
+@dataclass(frozen = True)
+class _Excludes:
+    """What the walker leaves out: VeriLite's own output files/folders and the exclude rules"""
+    files: frozenset = frozenset()
+    dirs: frozenset = frozenset()
+    rules: ExcludeRules = field(default_factory=ExcludeRules)
+
+def _excludes_for(baseline_path: Path, snapshot_root: Path, patterns=()) -> _Excludes:
+    out_dir = baseline_path.parent
+    return _Excludes(
+        files=frozenset({
+            baseline_path, baseline_path.with_suffix(".sig"), baseline_path.with_name(baseline_path.name + ".sig"),
+            baseline_path.with_suffix(".report.json")
+        }),
+        dirs=frozenset({snapshot_root, *(out_dir / name for name in SNAPSHOT_DIR_NAMES)}),
+        rules=ExcludeRules(patterns or ()),
+    )
+
+def _safe_build_record(
+    file_path: Path,
+    reference: dict | None,
+    stat: os.stat_result | None,
+    text_reference: dict | None,
+    screen_reference: dict | None,
+    base_root: Path,
+    snapshot_root: Path,
+    algorithm: str,
+    options: ScanOptions
+) -> dict | None:
+    """
+    Wraps build_file_record so one unreadable file does not stop a pool
+    Returns None (after printing the trace) if the record could not be built
     """
-    for p in base_root.rglob("*"): #resursive search
-        if p.is_file(): #only actual files and not directories
-            yield p
+    try:
+        return build_file_record(
+            file_path, base_root, snapshot_root, algorithm, reference=reference, options=options, stat=stat,
+            text_reference=text_reference, screen_reference=screen_reference
+        )
+    except Exception:
+        traceback.print_exc()
+        return None
+
+def _build_records(build, workers: int, pool: str, file_paths: list[Path], *columns: list) -> list[dict]:
+    """
+    Runs build(path, *per-file values) for every file, either inline or on a thread/process pool
+    columns: one list per extra argument (reference, stat, ...), aligned with file_paths
+    Executor.map keeps results in input order so output stays deterministic
+    """
+    if workers <= 1:
+        results = map(build, file_paths, *columns)
+        return [rec for rec in results if rec is not None]
+
+    executor_cls = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    with executor_cls(max_workers=workers) as executor:
+        #larger chunks cut the pickling overhead for process pools
+        chunksize = max(1, len(file_paths) // (workers * 16)) if pool == "process" else 1
+        results = executor.map(build, file_paths, *columns, chunksize=chunksize)
+        return [rec for rec in results if rec is not None]
+
+def _is_excluded(path: Path, base_root: Path, excludes: _Excludes, is_dir: bool = False) -> bool:
+    """
+    True if a single path (e.g. one reported by inotify) would be left out by the walker
+    The walker itself prunes excluded folders and never needs this per file
+    """
+    if path in excludes.files or path in excludes.dirs:
+        return True
+    if any(parent in excludes.dirs for parent in path.parents):
+        return True
+    return bool(excludes.rules) and excludes.rules.covers(str(path.relative_to(base_root)), is_dir)
+
+def _dir_key(directory: Path, base_root: Path) -> str:
+    """Relative directory path used as the dir_stats key ("" for the root)"""
+    return "" if directory == base_root else str(directory.relative_to(base_root))
+
+def _prior_children(scan: dict) -> dict:
+    """
+    {dir key: ([file names], [subdirectory names])} rebuilt from an earlier scan,
+    so a directory that has not changed can be walked without listing it
+    """
+    children: dict[str, tuple[list, list]] = {}
+    for rec in scan.get("files", []):
+        parent, _, name = rec.get("path").rpartition(os.sep)
+        children.setdefault(parent, ([], []))[0].append(name)
+    for d in scan.get("dir_stats", {}):
+        if d:
+            parent, _, name = d.rpartition(os.sep)
+            children.setdefault(parent, ([], []))[1].append(name)
+    return children
+
+def _walk_files(
+    scan_root: Path,
+    base_root: Path,
+    excludes: _Excludes,
+    dir_stats: dict,
+    prior: dict | None = None
+) -> list[tuple[Path, os.stat_result | None]]:
+    """List form of _iter_walk"""
+    return list(_iter_walk(scan_root, base_root, excludes, dir_stats, prior))
+
+def _iter_walk(
+    scan_root: Path,
+    base_root: Path,
+    excludes: _Excludes,
+    dir_stats: dict,
+    prior: dict | None = None
+):
+    """
+    Yields every file under scan_root that belongs in the manifest, as
+    (path, stat) pairs, and records {"mtime_ns", "entries"} for each directory
+    walked in dir_stats
+    Built on os.scandir: entry types come from the DirEntry, the file stat is
+    taken once here and reused for the record, and excluded folders are pruned
+    before they are descended into
+    prior: an earlier scan (build_baseline result); a directory whose mtime and
+    entry count still match it is not listed again, its files and subdirectories
+    are taken from that scan instead (their stat is then None)
+    Symlinked files are included, symlinked directories are not descended into
+    Files come in walk order; dir_stats is complete once the generator is exhausted
+    """
+    prior_stats = prior.get("dir_stats", {}) if prior else {}
+    children = _prior_children(prior) if prior_stats else {}
+    rules = excludes.rules if excludes.rules else None
+    now = time.time_ns()
+
+    stack = [scan_root]
+    while stack:
+        directory = stack.pop()
+        key = _dir_key(directory, base_root)
+        try:
+            mtime_ns = directory.stat().st_mtime_ns #taken before listing, so later changes never match
+        except OSError: #vanished or unreadable
+            continue
+
+        known = prior_stats.get(key)
+        names = children.get(key, ([], []))
+        if (
+            known and known.get("mtime_ns") is not None and known["mtime_ns"] == mtime_ns
+            and len(names[0]) + len(names[1]) == known.get("entries")
+        ): #unchanged since the earlier scan, reuse its listing
+            dir_stats[key] = known
+            yield from ((directory / name, None) for name in names[0])
+            stack.extend(directory / name for name in names[1])
+            continue
+
+        prefix = key + os.sep if key else ""
+        files, dirs = [], []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if entry.is_symlink():
+                            continue
+                        path = Path(entry.path)
+                        if path in excludes.dirs or (rules and rules.match(prefix + entry.name, True)):
+                            continue #pruned, never listed
+                        dirs.append(path)
+                    elif entry.is_file():
+                        if rules and rules.match(prefix + entry.name, False):
+                            continue
+                        path = Path(entry.path)
+                        if path in excludes.files:
+                            continue
+                        try:
+                            files.append((path, entry.stat()))
+                        except OSError: #removed since listing
+                            continue
+        except OSError:
+            continue
+
+        dir_stats[key] = {
+            #a directory changed within the last moment could change again in the same
+            #mtime tick, so it is never trusted by the next scan
+            "mtime_ns": mtime_ns if now - mtime_ns > _RACY_NS else None,
+            "entries": len(files) + len(dirs),
+        }
+        yield from files
+        stack.extend(dirs)
+
+def _collect_files(
+    scan_root: Path,
+    base_root: Path,
+    excludes: _Excludes,
+    dir_stats: dict | None = None,
+    prior: dict | None = None
+) -> list[tuple[Path, os.stat_result | None]]:
+    """
+    Lists every file under scan_root that belongs in the manifest as (path, stat),
+    sorted by the same relative path string stored in record["path"]
+    dir_stats/prior: see _walk_files
+    """
+    found = _walk_files(scan_root, base_root, excludes, {} if dir_stats is None else dir_stats, prior)
+
+    #deterministic order, keyed on the same string stored in record["path"]
+    found.sort(key=lambda item: str(item[0].relative_to(base_root)))
+    return found
+
+def _records_for(
+    found: list[tuple[Path, os.stat_result | None]],
+    base_root: Path,
+    snapshot_root: Path,
+    algorithm: str,
+    workers: int,
+    pool: str,
+    reference: dict | None,
+    options: ScanOptions,
+    text_reference: dict | None = None,
+    screen_reference: dict | None = None
+) -> list[dict]:
+    """
+    Builds records for the given (path, stat) pairs, pairing each with its
+    previous record when a reference index is supplied, and with its baseline
+    record when a text_reference or screen_reference index is supplied (see build_file_record)
+    """
+    file_paths = [path for path, _ in found]
+    stats = [stat for _, stat in found]
+    indexed = reference or text_reference or screen_reference is not None
+    rels = [str(p.relative_to(base_root)) for p in file_paths] if indexed else None
+
+    #previous record for each file (None when not trusting stat data)
+    references = [reference.get(rel) for rel in rels] if reference else [None] * len(file_paths)
+    #baseline record for each file (None unless text blocks may be reused)
+    text_references = [text_reference.get(rel) for rel in rels] if text_reference else [None] * len(file_paths)
+    #baseline record for each file (None unless large files are pre-screened, {} for files new since the baseline)
+    screen_references = (
+        [screen_reference.get(rel, {}) for rel in rels] if screen_reference is not None else [None] * len(file_paths)
+    )
+
+    build = partial(
+        _safe_build_record, base_root=base_root, snapshot_root=snapshot_root, algorithm=algorithm, options=options
+    )
+    return _build_records(build, workers, pool, file_paths, references, stats, text_references, screen_references)
+
+def _pipeline_records(
+    walk,
+    base_root: Path,
+    snapshot_root: Path,
+    algorithm: str,
+    options: ScanOptions,
+    pipeline: PipelineOptions,
+    reference: dict | None = None,
+    text_reference: dict | None = None,
+    screen_reference: dict | None = None,
+    stats: dict | None = None
+) -> list[dict]:
+    """
+    Builds records with the staged pipeline:
+    walker -> read/hash pool -> extractor pool -> snapshot writer
+    The stages are the steps of build_file_record, so records are identical;
+    they are sorted by path at the end since stages finish out of order
+    A file that may be read whole for extraction first takes its size from a
+    ByteBudget of pipeline.buffer_bytes, given back once the extractor is done
+    with the buffer (or straight away if the bytes were not kept)
+    With options.metrics every stage adds its time to the record's timings
+    """
+    timed = options.metrics
+
+    budget = ByteBudget(pipeline.buffer_bytes)
+
+    def hash_stage(item):
+        file_path, stat = item
+        rel = str(file_path.relative_to(base_root))
+        held = 0
+        size = (stat or file_path.stat()).st_size
+        if _keeps_bytes(file_path, size, options): #the whole file may be kept for the extractor
+            held = size
+            budget.acquire(held)
+        start = time.perf_counter() if timed else 0.0
+        try:
+            record, data, finished = _hash_file(
+                file_path, base_root, algorithm,
+                reference.get(rel) if reference else None, options, stat,
+                text_reference.get(rel) if text_reference else None,
+                screen_reference.get(rel, {}) if screen_reference is not None else None
+            )
+        except BaseException:
+            budget.release(held)
+            raise
+        if data is None: #reused, screened or streamed: no buffer travels on
+            budget.release(held)
+            held = 0
+        if timed:
+            record.setdefault(TIMINGS_KEY, {"bytes": 0})["hash"] = time.perf_counter() - start
+        return Finished(record) if finished else (file_path, record, data, held)
+
+    def extract_stage(item):
+        file_path, record, data, held = item
+        start = time.perf_counter() if timed else 0.0
+        try:
+            text = _extract_text(file_path, data, algorithm, options)
+        finally:
+            del data, item
+            budget.release(held)
+        if timed:
+            record[TIMINGS_KEY]["extract"] = time.perf_counter() - start
+            if text is not None:
+                record[TIMINGS_KEY]["kind"] = text[0]
+        return Finished(record) if text is None else (file_path, record, text)
+
+    def write_stage(item):
+        file_path, record, text = item
+        if not timed:
+            return _write_text(record, file_path, base_root, snapshot_root, options, text)
+        start = time.perf_counter()
+        record = _write_text(record, file_path, base_root, snapshot_root, options, text)
+        record[TIMINGS_KEY]["write"] = time.perf_counter() - start
+        return record
+
+    runner = Pipeline([
+        Stage("hash", hash_stage, pipeline.hash_workers),
+        Stage("extract", extract_stage, pipeline.extract_workers),
+        Stage("write", write_stage, 1), #one writer keeps snapshot writes sequential on disk
+    ], queue_size=pipeline.queue_size, budget=budget)
+    records = runner.run(walk)
+    if stats is not None:
+        stats.update(runner.stats)
+
+    #deterministic order, the same as _collect_files
+    records.sort(key=lambda rec: rec["path"])
+    return records
 
 #creates baseline schema dict for directory
-def build_baseline(base_dir: str, algorithm: str, baseline_path: str = "baseline.json", snapshot_dir: str | None = None) -> dict:    
+def build_baseline(
+    base_dir: str,
+    algorithm: str,
+    baseline_path: str = "baseline.json",
+    snapshot_dir: str | None = None,
+    workers: int = 1,
+    pool: str = "thread",
+    reference: dict | None = None,
+    options: ScanOptions | None = None,
+    prior: dict | None = None,
+    excludes: list[str] | None = None,
+    text_reference: dict | None = None,
+    screen_reference: dict | None = None,
+    pipeline: PipelineOptions | None = None,
+    pipeline_stats: dict | None = None,
+    metrics: ScanMetrics | None = None
+) -> dict:
     """
     Scans a directory and retuns the following:
     {
@@ -115,34 +774,178 @@ def build_baseline(base_dir: str, algorithm: str, baseline_path: str = "baseline
       algorithm,
       base_dir,
       snapshot_dir,
+      chunking,
+      excludes,
+      snapshot_store,
+      snapshot_compression,
+      digests,
+      screen,
+      tree_hash,
+      dir_stats,
+      merkle,
       files: []
     }
+    Files are always sorted by relative path so the manifest (and its signature)
+    is identical whatever the number of workers
+    reference: optional {path: record} index from a previous scan; files whose
+    stat tuple is unchanged reuse that record instead of being rehashed
+    options: per-record settings such as the chunking method (ScanOptions)
+    prior: optional earlier scan; directories whose mtime and entry count are
+    unchanged since then are not listed again (see _walk_files)
+    excludes: glob patterns (see ignore.ExcludeRules); stored in the manifest
+    so verify leaves out exactly the same paths
+    text_reference: optional {path: record} index of the baseline; a file whose
+    raw hash still matches keeps the baseline's text block, skipping extraction
+    screen_reference: optional {path: record} index of the baseline; large files
+    whose sampled screen hash still matches are not fully hashed (options.screen)
+    pipeline: run walk, read/hash, extract and snapshot write as overlapping
+    stages (see _pipeline_records) instead of one file at a time on a pool;
+    the result is the same. pipeline_stats: filled with the stage statistics
+    metrics: optional ScanMetrics, filled with the walk/scan/merkle wall times
+    and the per-file hash, extract and write timings (see metrics.py)
     """
+    options = options or ScanOptions()
+    if metrics is not None:
+        options = replace(options, metrics=True)
+        if pipeline is not None and pipeline_stats is None:
+            pipeline_stats = {} #the walk time comes from the pipeline's source statistics
     base_root = Path(base_dir).resolve() #turns input into absolute normalised path
     baseline_path = Path(baseline_path).resolve() #where baseline file will be written to
 
     snapshot_root = Path(snapshot_dir).resolve() if snapshot_dir else (baseline_path.parent / "snapshots")    
-    records = [] #list of per file record dicts
+    dir_stats: dict[str, dict] = {} #per-directory mtime and entry count, lets a later scan skip listing
+    scan_excludes = _excludes_for(baseline_path, snapshot_root, excludes)
 
-    for file_path in iter_files(base_root): #loop every file
-        #skips if file and sig in scanned folder
-        if file_path == baseline_path or file_path == baseline_path.with_suffix(".sig"):
-            continue
+    if pipeline is not None: #the walker feeds the pipeline directly, files are hashed while listing goes on
+        walk = _iter_walk(base_root, base_root, scan_excludes, dir_stats, prior)
+        start = time.perf_counter()
+        records = _pipeline_records(
+            walk, base_root, snapshot_root, algorithm, options, pipeline, reference, text_reference,
+            screen_reference, pipeline_stats
+        )
+        if metrics is not None: #walking overlaps the other stages, its own time is the source's busy time
+            metrics.add_stage("walk", pipeline_stats["source"]["busy_seconds"])
+            metrics.add_stage("scan", time.perf_counter() - start)
+    else:
+        start = time.perf_counter()
+        found = _collect_files( #files to be hashed
+            base_root, base_root, scan_excludes, dir_stats=dir_stats, prior=prior
+        )
+        walked = time.perf_counter()
+        records = _records_for( #list of per file record dicts
+            found, base_root, snapshot_root, algorithm, workers, pool, reference, options, text_reference,
+            screen_reference
+        )
+        if metrics is not None:
+            metrics.add_stage("walk", walked - start)
+            metrics.add_stage("scan", time.perf_counter() - walked)
 
-        if snapshot_root in file_path.parents: #skips scanning inside snapshots
-            continue
-
-        try:#builds record and appends to list
-            records.append(build_file_record(file_path, base_root, snapshot_root, algorithm))
-        except Exception:
-            traceback.print_exc()
+    if metrics is not None: #timings leave the records before they reach the manifest
+        metrics.take_records(records)
+        start = time.perf_counter()
+        merkle = build_tree(records, algorithm)
+        metrics.add_stage("merkle", time.perf_counter() - start)
+    else:
+        merkle = build_tree(records, algorithm)
 
     baseline = {
         "schema_version": 4,
         "algorithm": algorithm,
         "base_dir": str(base_root),
         "snapshot_dir": str(snapshot_root),
+        "chunking": dict(options.chunking), #verify re-chunks with the same settings
+        "excludes": list(excludes or []),
+        "snapshot_store": options.snapshot_store, #snapshot_dir is a SnapshotStore shared with verify
+        "snapshot_compression": options.snapshot_compression,
+        "digests": list(options.digests), #secondary algorithms, hashed per file alongside raw_hash
+        "screen": options.screen, #sampled pre-screen settings for very large files, or None
+        "tree_hash": _tree_header(options.tree_hash, algorithm), #segmented hashing of huge files, or None
+        "dir_stats": dict(sorted(dir_stats.items())),
+        "merkle": merkle, #per-directory digests, lets compare skip unchanged subtrees
         "files": records
     }
 
-    return baseline
\ No newline at end of file
+    return baseline
+
+def rescan_paths(
+    scan: dict,
+    touched,
+    algorithm: str,
+    baseline_path: str = "baseline.json",
+    workers: int = 1,
+    pool: str = "thread",
+    options: ScanOptions | None = None,
+    text_reference: dict | None = None,
+    screen_reference: dict | None = None,
+    metrics: ScanMetrics | None = None
+) -> dict:
+    """
+    Returns a copy of a build_baseline result with only the touched paths rebuilt
+    Used by event-driven watch mode instead of rescanning the whole tree
+    - a touched file is rehashed, or dropped if it no longer exists
+    - a touched directory is rescanned recursively, or dropped with everything under it
+    text_reference, screen_reference, metrics: see build_baseline
+    """
+    base_root = Path(scan["base_dir"])
+    snapshot_root = Path(scan["snapshot_dir"])
+    options = options or ScanOptions(
+        chunking=scan.get("chunking") or default_chunking(), snapshot_store=bool(scan.get("snapshot_store")),
+        snapshot_compression=scan.get("snapshot_compression"), digests=tuple(scan.get("digests") or ()),
+        screen=scan.get("screen"), tree_hash=tree_hash_options(scan)
+    )
+    if metrics is not None:
+        options = replace(options, metrics=True)
+    start = time.perf_counter()
+    baseline_path = Path(baseline_path).resolve()
+    excludes = _excludes_for(baseline_path, snapshot_root, scan.get("excludes"))
+
+    idx = {rec["path"]: rec for rec in scan.get("files", [])} #current records keyed by path
+    dir_stats = dict(scan.get("dir_stats", {}))
+    to_build = {} #rel path -> absolute file path
+
+    for path in touched:
+        path = Path(path)
+        try:
+            rel = str(path.relative_to(base_root))
+        except ValueError: #event outside the monitored folder
+            continue
+
+        if rel == ".": #root itself touched, caller should do a full scan instead
+            prefix = ""
+        else:
+            prefix = rel + os.sep
+
+        #forget the old state of this path and anything under it
+        for old in [p for p in idx if p == rel or p.startswith(prefix)]:
+            del idx[old]
+        for old in [p for p in to_build if p == rel or p.startswith(prefix)]:
+            del to_build[old]
+        #the parent's entries may have changed, and the touched subtree is walked again
+        for old in [d for d in dir_stats if d == rel or d.startswith(prefix)]:
+            del dir_stats[old]
+        dir_stats.pop(_dir_key(path.parent, base_root) if path != base_root else "", None)
+
+        if path.is_dir():
+            if rel == "." or not _is_excluded(path, base_root, excludes, is_dir=True):
+                for file_path, stat in _collect_files(path, base_root, excludes, dir_stats=dir_stats):
+                    to_build[str(file_path.relative_to(base_root))] = (file_path, stat)
+        elif path.is_file() and not _is_excluded(path, base_root, excludes):
+            to_build[rel] = (path, None)
+
+    found = [to_build[rel] for rel in sorted(to_build)]
+    walked = time.perf_counter()
+    records = _records_for(
+        found, base_root, snapshot_root, algorithm, workers, pool, None, options, text_reference, screen_reference
+    )
+    if metrics is not None:
+        metrics.add_stage("walk", walked - start)
+        metrics.add_stage("scan", time.perf_counter() - walked)
+        metrics.take_records(records)
+    for rec in records:
+        idx[rec["path"]] = rec
+
+    updated = dict(scan)
+    updated["files"] = [idx[p] for p in sorted(idx)]
+    updated["dir_stats"] = dict(sorted(dir_stats.items()))
+    updated["merkle"] = build_tree(updated["files"], algorithm)
+    return updated
@@ -0,0 +1,130 @@
+# File: snapfile.py
+# Description: Compressed text snapshots framed per chunk, with lazy chunk reads
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import lzma
+import struct #header and frame table
+import zlib
+from pathlib import Path
+from .utils import chunk_line_bounds, chunk_spans
+
+SNAPSHOT_CODECS = ["zlib", "lzma"]
+COMPRESSED_SUFFIX = ".vlz" #appended to the snapshot name, e.g. report.pdf.txt.vlz
+
+FRAMED_MAGIC = b"VLSZ"
+FRAMED_VERSION = 1
+
+_CODEC_IDS = {"zlib": 1, "lzma": 2}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+_HEADER = struct.Struct("<4sBBI") #magic, version, codec, frame count
+#offset, compressed length, raw length, start line, end line (exclusive), chunk index (-1 for a blank frame)
+_FRAME = struct.Struct("<QIIIIi")
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "lzma":
+        return lzma.compress(data, preset=6)
+    return zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "lzma":
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+def encode_snapshot(text: str, chunking: dict | None, codec: str) -> bytes:
+    """
+    Encodes a text snapshot as one compressed frame per chunk:
+    header, frame table, then the frames
+    Frames follow the same line ranges as chunk_spans (blank ranges get a frame
+    too, so the frames together give back the exact text), and the table maps
+    each frame to its chunk index, so one chunk can be read on its own
+    """
+    lines = text.splitlines(keepends=True)
+    bounds = chunk_line_bounds(text.splitlines(), chunking)
+    if not bounds or bounds[-1][1] < len(lines):
+        bounds.append((bounds[-1][1] if bounds else 0, len(lines)))
+
+    frames = []
+    chunk_index = 0
+    for start, end in bounds:
+        segment = "".join(lines[start:end])
+        has_chunk = bool("\n".join(segment.splitlines()).strip())
+        raw = segment.encode("utf-8", errors="replace")
+        frames.append((start, end, chunk_index if has_chunk else -1, raw, _compress(codec, raw)))
+        if has_chunk:
+            chunk_index += 1
+
+    offset = _HEADER.size + _FRAME.size * len(frames)
+    table, data = [], []
+    for start, end, index, raw, packed in frames:
+        table.append(_FRAME.pack(offset, len(packed), len(raw), start, end, index))
+        data.append(packed)
+        offset += len(packed)
+
+    header = _HEADER.pack(FRAMED_MAGIC, FRAMED_VERSION, _CODEC_IDS[codec], len(frames))
+    return header + b"".join(table) + b"".join(data)
+
+
+def is_framed(path) -> bool:
+    """True if the snapshot at path is a compressed framed snapshot"""
+    with open(path, "rb") as f:
+        return f.read(len(FRAMED_MAGIC)) == FRAMED_MAGIC
+
+
+class FramedSnapshot:
+    """
+    Reads a framed snapshot lazily
+    Behaves like the list returned by chunk_spans: len() is the number of
+    non-blank chunks and snap[i] returns (start_line, end_line, chunk_text),
+    decompressing only that chunk's frame
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, version, codec_id, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != FRAMED_MAGIC or version != FRAMED_VERSION:
+                raise ValueError(f"{self.path} is not a framed snapshot")
+            self.codec = _CODEC_NAMES[codec_id]
+            self.frames = [_FRAME.unpack(f.read(_FRAME.size)) for _ in range(count)]
+        self._chunks = [frame for frame in self.frames if frame[5] >= 0] #in chunk order
+
+    def _read_frame(self, frame) -> str:
+        offset, comp_len = frame[0], frame[1]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return _decompress(self.codec, f.read(comp_len)).decode("utf-8", errors="replace")
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def __getitem__(self, index: int) -> tuple[int, int, str]:
+        frame = self._chunks[index]
+        text = self._read_frame(frame)
+        return frame[3], frame[4], "\n".join(text.splitlines()).strip()
+
+    def text(self) -> str:
+        """The whole snapshot (every frame decompressed)"""
+        return "".join(self._read_frame(frame) for frame in self.frames)
+
+
+def read_snapshot_text(path) -> str:
+    """Full text of a snapshot, plain or framed"""
+    if is_framed(path):
+        return FramedSnapshot(path).text()
+    return Path(path).read_text(encoding="utf-8", errors="replace")
+
+
+def snapshot_spans(path, chunking: dict | None):
+    """
+    Chunk spans of a snapshot file, as chunk_spans would return them
+    Framed snapshots are read lazily, frame by frame
+    """
+    if is_framed(path):
+        return FramedSnapshot(path)
+    return chunk_spans(read_snapshot_text(path), chunking)
@@ -8,6 +8,7 @@ from __future__ import annotations #stores types as strings, resolves them later
 from dataclasses import dataclass #imports @dataclass to autogenerate _init_ and _repr, etc
 from pathlib import Path #path fields
 from typing import Optional #not every file will produce a text snapshot
+import io #wraps already-read bytes for python-docx
 import re #regex module, strips space/tabs
 
 TEXT_EXTS = { #list of file extensions treated as plain text
@@ -15,6 +16,12 @@ TEXT_EXTS = { #list of file extensions treated as plain text
     ".md", ".py", ".cs", ".java", ".js", ".ts", ".html", ".css"
     }
 
+SNAPSHOT_EXTS = TEXT_EXTS | {".pdf", ".docx"} #every extension that produces a text snapshot
+
+def is_extractable(path: Path) -> bool:
+    """True if extract_text_snapshot would produce a snapshot for this file type"""
+    return path.suffix.lower() in SNAPSHOT_EXTS
+
 @dataclass (frozen = True) #makes class a dataclass, immutable after creation
                             #to prevent accidental mutation of snapshots during scanning/verification
 class TextSnapshot: #class definition
@@ -36,28 +43,30 @@ def normalise_text(s : str) -> str: #make extracted text stable
     #enforce exactly one trailing newline, if empty, return empty string
     return out + "\n" if out else ""
 
-def _read_text(path : Path) -> str: #reads plaintext and returns decoded string
-    raw = path.read_bytes() #reads files as bytes
+def _read_text(path : Path, data: Optional[bytes] = None) -> str: #reads plaintext and returns decoded string
+    raw = path.read_bytes() if data is None else data #reads files as bytes unless already read
     try:
         return raw.decode("utf-8") #attempts decode
     except UnicodeDecodeError:#if it fails, tries other decodes
         return raw.decode("latin-1", errors="replace" )
     
-def _pdf_text(path : Path) -> str: #extracts text from pdf
+def _pdf_text(path : Path, data: Optional[bytes] = None) -> str: #extracts text from pdf
     try:
         import fitz #pymupdf
         parts = []
-        with fitz.open(path) as doc: #opens pdfs safely and ensures closed propoerly
+        #opens from memory when the bytes were already read for hashing
+        source = fitz.open(path) if data is None else fitz.open(stream=data, filetype="pdf")
+        with source as doc: #opens pdfs safely and ensures closed propoerly
             for page in doc:
                 parts.append(page.get_text("text")) #extracts plaintext from each page
         return "".join(parts) #combines pages into one big string
     except Exception: #invalid or corrupt PDF
         return ""
 
-def _docx_text(path : Path) -> str: #extracts from word doc
+def _docx_text(path : Path, data: Optional[bytes] = None) -> str: #extracts from word doc
     try: 
         from docx import Document
-        doc = Document(path)
+        doc = Document(path if data is None else io.BytesIO(data))
 
         parts = []
         for p in doc.paragraphs:
@@ -75,17 +84,21 @@ def _docx_text(path : Path) -> str: #extracts from word doc
     except Exception:
         return ""
 
-def extract_text_snapshot(path: Path) -> Optional[TextSnapshot]: #choose extract based on extension
+def extract_text_snapshot(path: Path, data: Optional[bytes] = None) -> Optional[TextSnapshot]: #choose extract based on extension
+    """
+    data: the file's bytes if the caller already read them, so the file
+    is not read from disk a second time
+    """
     ext = path.suffix.lower() #takes files ext and makes them all lowercase
 
     if ext in TEXT_EXTS:
-        return TextSnapshot(normalise_text(_read_text(path)), "text")
+        return TextSnapshot(normalise_text(_read_text(path, data)), "text")
     
     if ext == ".pdf":
-        return TextSnapshot(normalise_text(_pdf_text(path)), "pdf_text")
+        return TextSnapshot(normalise_text(_pdf_text(path, data)), "pdf_text")
     
     if ext == ".docx":
-        return TextSnapshot(normalise_text(_docx_text(path)), "docx_text")
+        return TextSnapshot(normalise_text(_docx_text(path, data)), "docx_text")
     
     return None # unsupported file type will retun none in baseline
 
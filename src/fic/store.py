@@ -0,0 +1,152 @@
+# File: store.py
+# Description: Content-addressed snapshot store shared by baseline and verify scans
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import json
+import os
+import tempfile #blobs and ref lists are written to a temp file, then renamed into place
+import time
+from collections import Counter
+from pathlib import Path
+
+STORE_DIR_NAME = "snapshot_store"
+OBJECTS_DIR = "objects"
+REFS_DIR = "refs"
+#blobs and temp files younger than this are never collected: another scan sharing
+#the store may still be writing them or not have registered its refs yet
+GC_GRACE_SECONDS = 3600
+
+
+class SnapshotStore:
+    """
+    Text snapshots stored once per text hash:
+        <root>/objects/ab/abcdef....txt
+    Manifests keep the blob path relative to the root as text["snapshot"], so an
+    unchanged text is never written twice, whichever scan produced it
+
+    Each manifest (the baseline, or a verify run's current scan) registers the
+    hashes it uses under refs/<name>.json. A blob's reference count is the number
+    of ref lists naming it, and gc() deletes blobs no list refers to
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    #blobs
+    def rel_path(self, text_hash: str, suffix: str = ".txt") -> str:
+        """Blob path relative to the store root, as stored in the manifest"""
+        return os.path.join(OBJECTS_DIR, text_hash[:2], text_hash + suffix)
+
+    def path_for(self, text_hash: str, suffix: str = ".txt") -> Path:
+        return self.root / self.rel_path(text_hash, suffix)
+
+    def put(self, text_hash: str, encode, suffix: str = ".txt") -> str:
+        """
+        Stores a snapshot under its text hash unless a blob already exists
+        encode: callable returning the blob bytes, only called when the blob is new
+        suffix: ".txt" for plain text, ".txt.vlz" for framed compressed snapshots
+        Safe with several workers: the blob is renamed into place in one step
+        Returns the blob path relative to the store root
+        """
+        rel = self.rel_path(text_hash, suffix)
+        path = self.root / rel
+        if path.exists():
+            return rel
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(encode())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return rel
+
+    def blobs(self) -> dict[str, Path]:
+        """{blob file name: blob path} for every blob in the store"""
+        found = {}
+        objects = self.root / OBJECTS_DIR
+        if not objects.is_dir():
+            return found
+        for bucket in os.scandir(objects):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.startswith(".tmp-"):
+                    #<hash>.txt or <hash>.txt.vlz, the same text may be stored both ways
+                    found[entry.name] = Path(entry.path)
+        return found
+
+    #references
+    def _refs_path(self, name: str) -> Path:
+        return self.root / REFS_DIR / (name + ".json")
+
+    def set_refs(self, name: str, hashes) -> None:
+        """Replaces the list of blobs used by the manifest called name"""
+        path = self._refs_path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(sorted(set(hashes)), f)
+        os.replace(tmp, path)
+
+    def refcounts(self) -> Counter:
+        """{text hash: number of manifests that use it}"""
+        counts: Counter = Counter()
+        refs = self.root / REFS_DIR
+        if not refs.is_dir():
+            return counts
+        for entry in os.scandir(refs):
+            if entry.name.endswith(".json") and not entry.name.startswith(".tmp-"):
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    counts.update(json.load(f))
+        return counts
+
+    def gc(self, grace: float = GC_GRACE_SECONDS) -> int:
+        """
+        Deletes blobs with no references (and leftover temp files), returns how many
+        blobs were removed; anything modified in the last grace seconds is kept
+        """
+        counts = self.refcounts()
+        cutoff = time.time() - grace
+        removed = 0
+        for name, path in self.blobs().items():
+            #file name up to the first dot is the text hash
+            if counts[name.split(".", 1)[0]] == 0 and _older_than(path, cutoff):
+                path.unlink(missing_ok=True)
+                removed += 1
+
+        objects = self.root / OBJECTS_DIR
+        if objects.is_dir():
+            for bucket in os.scandir(objects):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    if entry.name.startswith(".tmp-") and _older_than(entry.path, cutoff): #interrupted write
+                        os.remove(entry.path)
+                if not os.listdir(bucket.path):
+                    os.rmdir(bucket.path)
+        return removed
+
+
+def _older_than(path, cutoff: float) -> bool:
+    try:
+        return os.stat(path).st_mtime < cutoff
+    except FileNotFoundError: #removed meanwhile
+        return False
+
+
+def manifest_text_hashes(records) -> list[str]:
+    """Text hashes (hex) used by a list of file records, dicts or FileRecords"""
+    hashes = []
+    for rec in records:
+        text = rec.get("text")
+        if text and text.get("hash"):
+            hashes.append(text.get("hash"))
+    return hashes
@@ -6,25 +6,238 @@
 
 #Imports
 import hashlib
+import os
+import threading
+import zlib #crc32 line hashes for content-defined chunking
+from concurrent.futures import ThreadPoolExecutor #segments of one huge file hashed in parallel
+from functools import lru_cache, partial #hash constructors are resolved once per name
 from datetime import datetime
 
+#algorithms offered by the CLI; "blake2b-256" means BLAKE2b with a 256-bit digest
+HASH_ALGORITHMS = [
+    "sha256", "md5", "sha1", "sha512",
+    "blake2b", "blake2b-256", "blake2b-160", "blake2s", "blake2s-128",
+    "sha3_256", "sha3_384", "sha3_512",
+]
+
+MIN_BLOCK_SIZE = 64 * 1024 #smallest read size, also the rounding unit
+MAX_BLOCK_SIZE = 4 * 1024 * 1024 #largest read size, used for very big files
+
+_local = threading.local() #one reusable read buffer per worker thread
+
+@lru_cache(maxsize=None)
+def _hasher_factory(algorithm: str):
+    """
+    Constructor for an algorithm name, looked up once per name
+    Names are hashlib names, plus "blake2b-<bits>" / "blake2s-<bits>" for BLAKE2
+    with a shorter digest
+    """
+    name, _, bits = algorithm.lower().partition("-")
+    if bits:
+        if name not in ("blake2b", "blake2s") or not bits.isdigit():
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+        constructor = getattr(hashlib, name)
+        size = int(bits) // 8
+        if int(bits) % 8 or not 1 <= size <= constructor.MAX_DIGEST_SIZE:
+            raise ValueError(f"Unsupported digest size for {name}: {bits} bits")
+        return partial(constructor, digest_size=size)
+
+    constructor = getattr(hashlib, name, None)
+    if constructor is not None and name in hashlib.algorithms_guaranteed:
+        return constructor #direct constructors skip hashlib.new's name lookup
+    try:
+        hashlib.new(name)
+    except ValueError:
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}") from None
+    return partial(hashlib.new, name)
+
+def new_hasher(algorithm: str, data=b""):
+    """Returns a new hash object for algorithm (see HASH_ALGORITHMS), fed with data"""
+    h = _hasher_factory(algorithm)()
+    if data:
+        h.update(data)
+    return h
+
+def choose_block_size(file_size: int) -> int:
+    """
+    Picks a read size for a file of the given size:
+    small files are read in a single call, larger files in 1 MiB blocks
+    and files of 64 MiB or more in 4 MiB blocks
+    """
+    if file_size >= 64 * 1024 * 1024:
+        return MAX_BLOCK_SIZE
+    #round up to the next 64 KiB so small files fit in one read
+    rounded = -(-max(file_size, 1) // MIN_BLOCK_SIZE) * MIN_BLOCK_SIZE
+    return min(rounded, 1024 * 1024)
+
+def _read_buffer(size: int) -> memoryview:
+    """
+    Returns a writable view of at least size bytes from this thread's buffer,
+    growing it only when a bigger block is needed
+    """
+    buf = getattr(_local, "buffer", None)
+    if buf is None or len(buf) < size:
+        buf = bytearray(size)
+        _local.buffer = buf
+    return memoryview(buf)[:size]
+
 #Calculate the hash of a given file
-def calculate_hash(file_path, algorithm:str):
+def calculate_hash(file_path, algorithm:str, block_size: int | None = None):
     """Calculate hash of file using a specificed algorithm."""
-    hash_function = hashlib.new(algorithm)
+    return calculate_hashes(file_path, (algorithm,), block_size)[algorithm]
 
-    #opens file in binary mode
-    with open(file_path, 'rb') as file:
-        #reads the file in chucks of 8192 bytes, useful for large files 
+def calculate_hashes(file_path, algorithms, block_size: int | None = None) -> dict[str, str]:
+    """
+    Hashes a file with several algorithms in one read pass
+    Every block is fed to each hasher before the next read
+    Returns {algorithm: hex digest}
+    """
+    hashers = {algo: new_hasher(algo) for algo in dict.fromkeys(algorithms)} #duplicates hashed once
+    updates = [h.update for h in hashers.values()]
+
+    #opens file in binary mode, unbuffered since reads go straight into our own buffer
+    with open(file_path, 'rb', buffering=0) as file:
+        if block_size is None: #block size adapts to the file size
+            block_size = choose_block_size(os.fstat(file.fileno()).st_size)
+        view = _read_buffer(block_size)
         while True:
-            chunk = file.read(8192)
-            if not chunk:
+            n = file.readinto(view)
+            if not n:
+                break
+            #updates every hasher with the same block of data
+            block = view[:n]
+            for update in updates:
+                update(block)
+
+    #returns final hashes as hexidecimal strings
+    return {algo: h.hexdigest() for algo, h in hashers.items()}
+
+#sampled pre-screen of very large files: size, head, tail and strided interior blocks
+DEFAULT_SCREEN = {"min_size": 1024 * 1024 * 1024, "block_size": 1024 * 1024, "blocks": 16}
+
+def screen_settings(min_size_mb: int | None = None) -> dict:
+    """Pre-screen settings stored in the manifest, for files of at least min_size_mb MiB"""
+    screen = dict(DEFAULT_SCREEN)
+    if min_size_mb is not None:
+        screen["min_size"] = min_size_mb * 1024 * 1024
+    return screen
+
+def sample_offsets(size: int, block_size: int, blocks: int) -> list[int]:
+    """
+    Start offsets of the sampled blocks: head, tail and blocks interior blocks
+    evenly strided between them (fewer when the file is small enough to overlap)
+    """
+    if size <= block_size:
+        return [0]
+    last = size - block_size
+    interior = [last * (i + 1) // (blocks + 1) for i in range(blocks)]
+    return sorted(set([0, *interior, last]))
+
+def calculate_sample_hash(file_path, algorithm: str, screen: dict) -> str:
+    """
+    Quick-screen digest of a file: its size plus a fixed set of sampled blocks
+    The same file always gives the same digest, and any change of size or of a
+    sampled block changes it; changes elsewhere in the file are not seen, so a
+    match only means the file is likely unchanged
+    """
+    block_size = screen["block_size"]
+    h = new_hasher(algorithm)
+    with open(file_path, 'rb', buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        h.update(size.to_bytes(8, "little"))
+        view = _read_buffer(block_size)
+        for offset in sample_offsets(size, block_size, screen["blocks"]):
+            file.seek(offset)
+            n = file.readinto(view)
+            h.update(offset.to_bytes(8, "little"))
+            h.update(view[:n])
+    return h.hexdigest()
+
+#tree hash of huge files: fixed segments hashed in parallel, combined into one root digest
+DEFAULT_TREE_HASH = {"min_size": 4 * 1024 * 1024 * 1024, "segment_size": 64 * 1024 * 1024}
+
+def tree_hash_settings(min_size_mb: int | None = None, segment_size_mb: int | None = None) -> dict:
+    """Tree-hash settings stored in the manifest"""
+    tree = dict(DEFAULT_TREE_HASH)
+    if min_size_mb is not None:
+        tree["min_size"] = min_size_mb * 1024 * 1024
+    if segment_size_mb is not None:
+        tree["segment_size"] = segment_size_mb * 1024 * 1024
+    return tree
+
+def tree_algorithm(algorithm: str) -> str:
+    """Algorithm tag of a tree-hashed raw_hash, e.g. "tree-sha256" """
+    return "tree-" + algorithm
+
+def _hash_segment(fd: int, offset: int, length: int, algorithm: str) -> bytes:
+    #positional reads, so every worker shares one descriptor without seeking
+    h = new_hasher(algorithm)
+    end = offset + length
+    while offset < end:
+        block = os.pread(fd, min(MAX_BLOCK_SIZE, end - offset), offset)
+        if not block: #file shrank while reading
+            break
+        h.update(block)
+        offset += len(block)
+    return h.digest()
+
+def calculate_tree_hash(file_path, algorithm: str, segment_size: int, workers: int | None = None) -> tuple[str, list[str]]:
+    """
+    Splits a file into fixed segments, hashes them in parallel with positional
+    reads, then hashes the size, the segment size and the segment digests into
+    a root digest. The root only changes with the content, whatever the number
+    of workers, and comparing segment digests tells which segments changed
+    Returns (root hex digest, [segment hex digests])
+    """
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        offsets = range(0, max(size, 1), segment_size)
+        hash_one = partial(_hash_segment, fd, length=segment_size, algorithm=algorithm)
+        workers = min(workers or os.cpu_count() or 1, len(offsets))
+        if workers <= 1:
+            segments = [hash_one(offset) for offset in offsets]
+        else: #hashlib releases the GIL on large buffers, so threads hash in parallel
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                segments = list(executor.map(hash_one, offsets))
+    finally:
+        os.close(fd)
+
+    root = new_hasher(algorithm)
+    root.update(b"tree" + size.to_bytes(8, "little") + segment_size.to_bytes(8, "little"))
+    for digest in segments:
+        root.update(digest)
+    return root.hexdigest(), [digest.hex() for digest in segments]
+
+def read_file_bytes(file_path) -> bytearray:
+    """
+    Reads a whole file into one preallocated buffer with readinto
+    Used when the same bytes feed both the raw hash and the text extractor
+    """
+    with open(file_path, 'rb', buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        data = bytearray(size)
+        view = memoryview(data)
+        pos = 0
+        while pos < size:
+            n = file.readinto(view[pos:])
+            if not n: #file shrank while reading
                 break
-            #updates object with each chunk of data
-            hash_function.update(chunk)
+            pos += n
+        view.release()
+        if pos < size:
+            del data[pos:]
+        else:
+            data += file.read() #file grew while reading
+    return data
+
+def calculate_bytes_hash(data, algorithm: str) -> str:
+    """Hash of an in-memory buffer, equal to calculate_hash of the same file bytes"""
+    return new_hasher(algorithm, data).hexdigest()
 
-    #returns final hash as hexidecimal string
-    return hash_function.hexdigest()
+def calculate_bytes_hashes(data, algorithms) -> dict[str, str]:
+    """{algorithm: hex digest} of an in-memory buffer, see calculate_hashes"""
+    return {algo: new_hasher(algo, data).hexdigest() for algo in dict.fromkeys(algorithms)}
 
 
 def to_hex_string(hash_str: str) -> str: #takes hash string and returns formatted version
@@ -40,32 +253,105 @@ def log_event(message, log_file="verilite.log"): #logs
         f.write(f"{timestamp} | {message}\n")
 
 def calculate_text_hash(text: str, algorithm: str) -> str: #hashes content not file bytes
-    h = hashlib.new(algorithm) #creates new obj of hash algo
+    h = new_hasher(algorithm) #creates new obj of hash algo
     h.update(text.encode("utf-8", errors="replace")) #converts to bytes
     return h.hexdigest() #returns final as lowercase hex string
 
-def chunk_text(text: str, max_lines: int = 20) -> list[str]: #splits text string into chunks
+CHUNKING_METHODS = ["lines", "cdc"]
+
+#fixed windows of N lines (the original scheme)
+LINES_CHUNKING = {"method": "lines", "max_lines": 20}
+#content-defined: boundaries depend on the last few lines, so an insertion only
+#changes the chunks around it instead of shifting every later window
+CDC_CHUNKING = {"method": "cdc", "avg_lines": 16, "min_lines": 4, "max_lines": 64}
+
+_MASK64 = (1 << 64) - 1
+_GEAR_MULT = 0x9E3779B97F4A7C15 #spreads the 32-bit line CRC over 64 bits
+
+def default_chunking(method: str = "lines") -> dict:
+    """Chunking settings stored in the manifest for a method name"""
+    return dict(CDC_CHUNKING if method == "cdc" else LINES_CHUNKING)
+
+def _cdc_boundaries(lines: list[str], avg_lines: int, min_lines: int, max_lines: int) -> list[tuple[int, int]]:
     """
-    Split text into chunks of N lines
-    This is stable and works across txt/pdf/docx snapshots
+    FastCDC-style chunking at line granularity
+    A gear fingerprint is rolled over per-line hashes (shifted one bit per line,
+    so its low bits only depend on the last few lines). A chunk ends when the
+    low bits are zero: a stricter mask before avg_lines and a looser one after it
+    keeps sizes close to the average, with hard min/max limits
+    """
+    bits = max(1, (max(avg_lines, 2) - 1).bit_length())
+    mask_small = (1 << (bits + 1)) - 1 #harder to hit, used while the chunk is short
+    mask_large = (1 << max(bits - 1, 0)) - 1 #easier to hit, used once past the average
+
+    spans = []
+    start = 0
+    fp = 0
+    for i, line in enumerate(lines):
+        gear = (zlib.crc32(line.encode("utf-8", errors="replace")) * _GEAR_MULT) & _MASK64
+        fp = ((fp << 1) + gear) & _MASK64
+        n = i - start + 1
+        if n < min_lines:
+            continue
+        mask = mask_small if n < avg_lines else mask_large
+        if (fp & mask) == 0 or n >= max_lines:
+            spans.append((start, i + 1))
+            start = i + 1
+            fp = 0
+    if start < len(lines):
+        spans.append((start, len(lines)))
+    return spans
+
+def chunk_line_bounds(lines: list[str], chunking: dict | None = None) -> list[tuple[int, int]]:
+    """
+    (start_line, end_line) of every chunk, blank ones included, covering all lines
+    0-based line numbers, end_line exclusive
+    """
+    chunking = chunking or LINES_CHUNKING
+    if chunking.get("method") == "cdc":
+        return _cdc_boundaries(
+            lines,
+            int(chunking.get("avg_lines", CDC_CHUNKING["avg_lines"])),
+            int(chunking.get("min_lines", CDC_CHUNKING["min_lines"])),
+            int(chunking.get("max_lines", CDC_CHUNKING["max_lines"])),
+        )
+    max_lines = int(chunking.get("max_lines", 20))
+    return [(i, min(i + max_lines, len(lines))) for i in range(0, len(lines), max_lines)]
+
+def chunk_spans(text: str, chunking: dict | None = None) -> list[tuple[int, int, str]]:
+    """
+    Splits text into chunks using the given chunking settings
+    Returns (start_line, end_line, chunk_text) for every non-empty chunk,
+    with 0-based line numbers and end_line exclusive
     """
     lines = text.splitlines() #splits string insto list of lines
-    chunks = [] #empty list for chunks
-    for i in range(0, len(lines), max_lines): #loop
-        chunk = "\n".join(lines[i:i + max_lines]).strip() #takes slice of up to max lines and joins them back into one string
+    bounds = chunk_line_bounds(lines, chunking)
+
+    spans = []
+    for start, end in bounds:
+        chunk = "\n".join(lines[start:end]).strip() #joins the lines back into one string
         if chunk: #if chunk string is not empty, add to list
-            chunks.append(chunk)
-    return chunks
+            spans.append((start, end, chunk))
+    return spans
+
+def chunk_text(text: str, max_lines: int = 20, chunking: dict | None = None) -> list[str]: #splits text string into chunks
+    """
+    Split text into chunks of N lines (or by the given chunking settings)
+    This is stable and works across txt/pdf/docx snapshots
+    """
+    if chunking is None:
+        chunking = {"method": "lines", "max_lines": max_lines}
+    return [chunk for _, _, chunk in chunk_spans(text, chunking)]
 
 
 #takes full text, splits into chunks and hashes each chunk
-def calculate_chunk_hashes(text: str, algorithm: str, max_lines: int = 20) -> list[str]:
+def calculate_chunk_hashes(text: str, algorithm: str, max_lines: int = 20, chunking: dict | None = None) -> list[str]:
     """
     Returns a list of hashes, one per chunk
     """
     hashes = [] #empty list for chunk hashes
     #calls chunk_text() to get chunks and loops over them
-    for chunk in chunk_text(text, max_lines=max_lines):
+    for chunk in chunk_text(text, max_lines=max_lines, chunking=chunking):
         #hashes each chunk's text with same algo and adds to list
         hashes.append(calculate_text_hash(chunk, algorithm))
     return hashes
@@ -0,0 +1,192 @@
+# File: watcher.py
+# Description: Event-driven change detection for watch mode (Linux inotify via ctypes)
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+#imports
+from __future__ import annotations
+import ctypes #calls the libc inotify syscalls directly
+import ctypes.util #finds libc
+import errno #error codes for limit handling
+import os #fd reads and directory walking
+import select #waits on the inotify fd with a timeout
+import struct #decodes raw inotify_event structs
+import sys #platform check
+import time #debounce timing
+from pathlib import Path
+
+#inotify event flags (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+#events that can change a file's bytes or the set of files
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+#events that mean a directory (and everything under it) appeared or disappeared
+DIR_CHANGE_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII") #wd, mask, cookie, len (followed by len bytes of name)
+_READ_SIZE = 64 * 1024
+
+
+class WatcherUnavailable(Exception):
+    """inotify cannot be used (not Linux, or an inotify limit was hit), fall back to polling"""
+
+
+class InotifyWatcher:
+    """
+    Watches a folder tree with one inotify watch per directory and collects
+    the paths touched by events. Paths under skip_dirs and the files in
+    ignore_files (reports, logs, ...) never produce events.
+    skip: optional skip(path, is_dir) -> bool for exclude rules, matching
+    folders get no watch at all
+    """
+
+    def __init__(self, root, skip_dirs=(), ignore_files=(), skip=None):
+        if not sys.platform.startswith("linux"):
+            raise WatcherUnavailable("inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise WatcherUnavailable(f"inotify_init1 failed: {os.strerror(err)}")
+
+        self.root = Path(root).resolve()
+        self._skip_dirs = {str(Path(p).resolve()) for p in skip_dirs}
+        self._ignore_files = {str(Path(p).resolve()) for p in ignore_files}
+        self._skip = skip
+        self._wd_paths: dict[int, str] = {} #watch descriptor -> directory path
+
+        try:
+            self._add_tree(str(self.root))
+        except Exception:
+            self.close()
+            raise
+
+    def _skipped(self, path: str, is_dir: bool = True) -> bool:
+        if any(path == d or path.startswith(d + os.sep) for d in self._skip_dirs):
+            return True
+        return self._skip is not None and path != str(self.root) and self._skip(path, is_dir)
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOSPC, errno.ENOMEM):
+                raise WatcherUnavailable("inotify watch limit reached (fs.inotify.max_user_watches)")
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return #directory vanished or unreadable, the rescan will notice
+            raise OSError(err, os.strerror(err), path)
+        self._wd_paths[wd] = path
+
+    def _add_tree(self, top: str) -> None:
+        """Adds a watch on top and on every directory below it"""
+        if self._skipped(top):
+            return
+        self._add_watch(top)
+        for dirpath, dirnames, _ in os.walk(top):
+            #prune skipped folders so they are never descended into; symlinked folders are
+            #not scanned either, and a watch on one would replace the real folder's path
+            dirnames[:] = [
+                d for d in dirnames
+                if not os.path.islink(os.path.join(dirpath, d)) and not self._skipped(os.path.join(dirpath, d))
+            ]
+            for d in dirnames:
+                self._add_watch(os.path.join(dirpath, d))
+
+    def _read_events(self, touched: set) -> bool:
+        """
+        Drains the inotify fd into touched
+        Returns True if the kernel queue overflowed (events were lost)
+        """
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                name = buf[offset + _EVENT.size: offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & IN_IGNORED: #watch removed (directory deleted)
+                    self._wd_paths.pop(wd, None)
+                    continue
+
+                base = self._wd_paths.get(wd)
+                if base is None or not name: #events on the watched dir itself are reported by its parent
+                    continue
+
+                path = os.path.join(base, os.fsdecode(name))
+                if path in self._ignore_files or self._skipped(path, bool(mask & IN_ISDIR)):
+                    continue
+
+                if mask & IN_ISDIR:
+                    if not mask & DIR_CHANGE_MASK: #attribute change on a directory
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_tree(path)
+
+                touched.add(Path(path))
+        return overflow
+
+    def wait(self, timeout: float, debounce: float = 1.0) -> set[Path] | None:
+        """
+        Blocks for up to timeout seconds until something changes
+        After the first event it keeps collecting until debounce seconds pass with
+        no new events (capped at 10x debounce), so a burst of writes is coalesced
+        into one set of touched paths
+        Returns the set of paths (empty on timeout), or None if events were lost
+        and the caller should fall back to a full rescan
+        """
+        touched: set[Path] = set()
+        deadline = time.monotonic() + timeout
+        first_event = None
+        quiet_until = None
+
+        while True:
+            now = time.monotonic()
+            if quiet_until is None:
+                limit = deadline
+            else:
+                limit = min(quiet_until, first_event + debounce * 10)
+            if now >= limit:
+                break
+
+            ready, _, _ = select.select([self._fd], [], [], limit - now)
+            if not ready:
+                continue
+
+            if self._read_events(touched):
+                return None
+            if touched:
+                now = time.monotonic()
+                if first_event is None:
+                    first_event = now
+                quiet_until = now + debounce
+
+        return touched
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
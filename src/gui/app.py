@@ -1,5 +1,4 @@
-import json
-import html
+import sys
 import tempfile
 import zipfile
 from pathlib import Path
@@ -8,6 +7,11 @@ from typing import Optional
 import pandas as pd
 import streamlit as st
 
+# fic (src/fic) is shared with the CLI so chunk boundaries always match the scanner;
+# gui.helpers holds the Streamlit-free helpers (also used by benchmarks/bench_suite.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from gui.helpers import load_report, chunk_bounds, load_spans, render_colored_lines  # noqa: E402
+
 
 st.set_page_config(page_title="VeriLite GUI", layout="wide")
 
@@ -80,63 +84,7 @@ with st.sidebar:
 
 
 # ---- Helpers ----
-def load_report(report_path: Path) -> dict:
-    return json.loads(report_path.read_text(encoding="utf-8"))
-
-
-def chunk_bounds(idx: int, max_lines: int) -> tuple[int, int]:
-    start = idx * max_lines + 1
-    end = start + max_lines - 1
-    return start, end
-
-
-def read_text_file(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="replace")
-
-
-def split_into_chunks(text: str, max_lines: int) -> list[str]:
-    lines = text.splitlines()
-    chunks = []
-    for i in range(0, len(lines), max_lines):
-        chunk = "\n".join(lines[i:i + max_lines]).strip()
-        if chunk:
-            chunks.append(chunk)
-    return chunks
-
-
-def render_colored_lines(left_text: str, right_text: str, start_line: int) -> tuple[str, str]:
-    """
-    Returns (left_html, right_html) where each line is colored:
-    - green if equal at same line index
-    - red if different / missing on either side
-    """
-    left_lines = left_text.splitlines()
-    right_lines = right_text.splitlines()
-
-    n = max(len(left_lines), len(right_lines))
-    left_out = []
-    right_out = []
-
-    for i in range(n):
-        ln = start_line + i
-
-        l = left_lines[i] if i < len(left_lines) else None
-        r = right_lines[i] if i < len(right_lines) else None
-
-        same = (l == r) and (l is not None)
-
-        left_class = "same-line" if same else "diff-line"
-        right_class = "same-line" if same else "diff-line"
-
-        l_text = html.escape(l) if l is not None else '<span class="missing">[no line]</span>'
-        r_text = html.escape(r) if r is not None else '<span class="missing">[no line]</span>'
-
-        left_out.append(f'<span class="{left_class}"><span class="lineno">{ln:>4} |</span> {l_text}</span>')
-        right_out.append(f'<span class="{right_class}"><span class="lineno">{ln:>4} |</span> {r_text}</span>')
-
-    left_html = '<div class="diffbox">' + "\n".join(left_out) + "</div>"
-    right_html = '<div class="diffbox">' + "\n".join(right_out) + "</div>"
-    return left_html, right_html
+# pure helpers live in gui/helpers.py (no Streamlit import), so they can be benchmarked
 
 
 # ---- ZIP handling for deployment ----
@@ -373,6 +321,9 @@ with tab_mod:
         st.code(chosen_rec.get("baseline_raw", ""), language="text")
         st.write("**Current raw hash**")
         st.code(chosen_rec.get("current_raw", ""), language="text")
+        for algo, digest in (chosen_rec.get("current_digests") or {}).items(): #secondary digests, e.g. md5
+            st.write(f"**Baseline / current {algo}**")
+            st.code(f"{(chosen_rec.get('baseline_digests') or {}).get(algo, '')}\n{digest}", language="text")
     with meta2:
         st.write("**Baseline text hash**")
         st.code(str(chosen_rec.get("baseline_text_hash", "")), language="text")
@@ -381,16 +332,19 @@ with tab_mod:
 
     ci = chosen_rec.get("chunk_info") or {}
     max_lines = int(ci.get("max_lines", 20))
+    chunking = ci.get("chunking") or {"method": "lines", "max_lines": max_lines}
     changed_indices = ci.get("changed_indices", [])
     added_indices = ci.get("added_indices", [])
     removed_indices = ci.get("removed_indices", [])
 
     st.write("**Chunk change summary**")
     st.write({
+        "chunking": chunking.get("method", "lines"),
         "max_lines": max_lines,
         "changed_indices": changed_indices,
         "added_indices": added_indices,
         "removed_indices": removed_indices,
+        "moved": ci.get("moved", []),
         "tamper_ratio": ci.get("tamper_ratio"),
     })
 
@@ -416,12 +370,19 @@ with tab_mod:
             )
             st.stop()
 
-        baseline_dir = find_snapshots_dir(bundle_root, "snapshots_baseline")
-        current_dir = find_snapshots_dir(bundle_root, "snapshots_current")
+        if report.get("snapshot_store"):
+            # Baseline and current snapshots share one content-addressed store
+            baseline_dir = current_dir = find_snapshots_dir(bundle_root, "snapshot_store")
+            if baseline_dir is None:
+                st.error("Could not find snapshot_store/ inside the uploaded ZIP.")
+                st.stop()
+        else:
+            baseline_dir = find_snapshots_dir(bundle_root, "snapshots_baseline")
+            current_dir = find_snapshots_dir(bundle_root, "snapshots_current")
 
-        if baseline_dir is None or current_dir is None:
-            st.error("Could not find snapshots_baseline/ and snapshots_current/ inside the uploaded ZIP.")
-            st.stop()
+            if baseline_dir is None or current_dir is None:
+                st.error("Could not find snapshots_baseline/ and snapshots_current/ inside the uploaded ZIP.")
+                st.stop()
 
         base_path = baseline_dir / base_rel
         curr_path = current_dir / curr_rel
@@ -438,34 +399,59 @@ with tab_mod:
         )
         st.stop()
 
-    base_text = read_text_file(base_path)
-    curr_text = read_text_file(curr_path)
-
-    base_chunks = split_into_chunks(base_text, max_lines=max_lines)
-    curr_chunks = split_into_chunks(curr_text, max_lines=max_lines)
-
-    default_chunk = changed_indices[0] if changed_indices else 0
-
-    all_indices = sorted(set(changed_indices + added_indices + removed_indices))
-    if not all_indices:
-        n = max(len(base_chunks), len(curr_chunks))
-        all_indices = list(range(n))
-
-    chosen_chunk = st.selectbox(
-        "Select chunk index",
-        options=all_indices,
-        index=all_indices.index(default_chunk) if default_chunk in all_indices else 0
-    )
-
-    start_line, end_line = chunk_bounds(chosen_chunk, max_lines)
-    st.caption(f"Chunk {chosen_chunk} corresponds to lines ~{start_line}–{end_line} (max_lines={max_lines})")
+    # Compressed snapshots are framed per chunk: only the frame table is read
+    # here, and a chunk is decompressed when it is displayed
+    base_spans = load_spans(base_path, chunking)
+    curr_spans = load_spans(curr_path, chunking)
+
+    # Aligned reports map every current chunk to its baseline chunk, older
+    # reports compared chunks index by index
+    mapping = ci.get("current_to_baseline")
+    moved = ci.get("moved", [])
+
+    views = [] #(label, baseline chunk index, current chunk index)
+    if mapping is not None:
+        for c in changed_indices:
+            views.append((f"changed: current {c} (baseline {mapping[c]})", mapping[c], c))
+        for c in added_indices:
+            views.append((f"added: current {c}", None, c))
+        for b, c in moved:
+            views.append((f"moved: baseline {b} -> current {c}", b, c))
+        for b in removed_indices:
+            views.append((f"removed: baseline {b}", b, None))
+    else:
+        for i in sorted(set(changed_indices + added_indices + removed_indices)):
+            views.append((f"chunk {i}", i, i))
+    if not views:
+        n = max(len(base_spans), len(curr_spans))
+        views = [(f"chunk {i}", i, i) for i in range(n)]
+
+    labels = [v[0] for v in views]
+    chosen_label = st.selectbox("Select chunk", options=labels, index=0)
+    _, base_idx, curr_idx = views[labels.index(chosen_label)]
+
+    base_span = base_spans[base_idx] if base_idx is not None and base_idx < len(base_spans) else None
+    curr_span = curr_spans[curr_idx] if curr_idx is not None and curr_idx < len(curr_spans) else None
+    chosen_chunk = curr_idx if curr_idx is not None else base_idx
+
+    if chunking.get("method") == "cdc" or mapping is not None:
+        span = curr_span or base_span
+        start_line, end_line = (span[0] + 1, span[1]) if span else (1, 1)
+        st.caption(f"Chunk {chosen_chunk} corresponds to lines ~{start_line}–{end_line} ({chunking.get('method', 'lines')} chunking)")
+    else:
+        start_line, end_line = chunk_bounds(chosen_chunk, max_lines)
+        st.caption(f"Chunk {chosen_chunk} corresponds to lines ~{start_line}–{end_line} (max_lines={max_lines})")
 
     left, right = st.columns(2)
 
-    base_chunk = base_chunks[chosen_chunk] if chosen_chunk < len(base_chunks) else ""
-    curr_chunk = curr_chunks[chosen_chunk] if chosen_chunk < len(curr_chunks) else ""
+    base_chunk = base_span[2] if base_span else ""
+    curr_chunk = curr_span[2] if curr_span else ""
 
-    left_html, right_html = render_colored_lines(base_chunk, curr_chunk, start_line)
+    left_html, right_html = render_colored_lines(
+        base_chunk, curr_chunk,
+        base_span[0] + 1 if base_span else start_line,
+        curr_span[0] + 1 if curr_span else start_line,
+    )
 
     st.markdown(
         "- **Green** = same line in baseline and current\n"
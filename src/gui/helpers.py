@@ -0,0 +1,74 @@
+# File: helpers.py
+# Description: GUI helpers with no Streamlit dependency (report loading, snapshot spans, diff rendering)
+# Author: Theo Pakieser
+# Date: 16/10/2026
+
+import json
+import html
+from pathlib import Path
+from typing import Optional
+
+from fic.snapfile import snapshot_spans
+
+
+def load_report(report_path: Path) -> dict:
+    return json.loads(report_path.read_text(encoding="utf-8"))
+
+
+def chunk_bounds(idx: int, max_lines: int) -> tuple[int, int]:
+    start = idx * max_lines + 1
+    end = start + max_lines - 1
+    return start, end
+
+
+def load_spans(path: Path, chunking: dict):
+    """
+    Chunk spans of a snapshot file: a list for plain .txt snapshots, or a lazy
+    FramedSnapshot for compressed ones (indexing it decompresses one chunk)
+    """
+    return snapshot_spans(path, chunking)
+
+
+def render_colored_lines(
+    left_text: str,
+    right_text: str,
+    start_line: int,
+    right_start_line: Optional[int] = None
+) -> tuple[str, str]:
+    """
+    Returns (left_html, right_html) where each line is colored:
+    - green if equal at same line index
+    - red if different / missing on either side
+    right_start_line: numbering for the right side when the chunks start on different lines
+    """
+    if right_start_line is None:
+        right_start_line = start_line
+
+    left_lines = left_text.splitlines()
+    right_lines = right_text.splitlines()
+
+    n = max(len(left_lines), len(right_lines))
+    left_out = []
+    right_out = []
+
+    for i in range(n):
+        ln = start_line + i
+        rn = right_start_line + i
+
+        l = left_lines[i] if i < len(left_lines) else None
+        r = right_lines[i] if i < len(right_lines) else None
+
+        same = (l == r) and (l is not None)
+
+        left_class = "same-line" if same else "diff-line"
+        right_class = "same-line" if same else "diff-line"
+
+        l_text = html.escape(l) if l is not None else '<span class="missing">[no line]</span>'
+        r_text = html.escape(r) if r is not None else '<span class="missing">[no line]</span>'
+
+        left_out.append(f'<span class="{left_class}"><span class="lineno">{ln:>4} |</span> {l_text}</span>')
+        right_out.append(f'<span class="{right_class}"><span class="lineno">{rn:>4} |</span> {r_text}</span>')
+
+    left_html = '<div class="diffbox">' + "\n".join(left_out) + "</div>"
+    right_html = '<div class="diffbox">' + "\n".join(right_out) + "</div>"
+    return left_html, right_html
@@ -0,0 +1,61 @@
+#shared fixtures: a small evidence tree, its baseline saved in each manifest format, and a baseline/current scan pair
+
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.manifest import save #noqa: E402
+from fic.scanner import build_baseline #noqa: E402
+
+MANIFEST_SUFFIXES = {"json": ".json", "jsonl": ".jsonl", "binary": ".vlb"}
+
+
+def write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def data_tree(tmp_path) -> Path:
+    data = tmp_path / "data"
+    write_text(data / "a.txt", "".join(f"line {i}\n" for i in range(50)))
+    (data / "b.bin").write_bytes(bytes(range(256)) * 8)
+    write_text(data / "sub" / "c.log", "INFO start\nWARN disk\n")
+    write_text(data / "sub" / "deep" / "d.csv", "id,amount\n1,2.50\n")
+    return data
+
+
+@pytest.fixture
+def baseline(tmp_path, data_tree) -> dict:
+    return build_baseline(str(data_tree), "sha256", str(tmp_path / "baseline.json"), snapshot_dir=str(tmp_path / "snaps"))
+
+
+@pytest.fixture
+def saved(tmp_path, baseline):
+    """saved(fmt, name="baseline") writes the baseline in fmt and returns its path"""
+    def save_as(fmt: str, name: str = "baseline") -> Path:
+        path = tmp_path / f"{name}{MANIFEST_SUFFIXES[fmt]}"
+        save(dict(baseline), str(path), "sha256", fmt=fmt)
+        return path
+    return save_as
+
+
+@pytest.fixture
+def scans(tmp_path):
+    """(baseline, current) of a tree where one file was rewritten, one added and one deleted"""
+    data = tmp_path / "tree"
+    for d in ("keep", "edit", "edit/inner", "gone"):
+        for i in range(3):
+            write_text(data / d / f"f{i}.txt", "".join(f"{d} {i} line {n}\n" for n in range(45)))
+    manifest = str(tmp_path / "scans.json")
+    baseline = build_baseline(str(data), "sha256", manifest, snapshot_dir=str(tmp_path / "snaps_baseline"))
+
+    write_text(data / "edit" / "f1.txt", "rewritten\n")
+    write_text(data / "edit" / "inner" / "new.txt", "new file\n")
+    (data / "gone" / "f2.txt").unlink()
+    current = build_baseline(str(data), "sha256", manifest, snapshot_dir=str(tmp_path / "snaps_current"))
+    return baseline, current
@@ -1 +1,82 @@
-#Unit tests for compare
\ No newline at end of file
+#tests for chunk alignment and moved chunks in compare_records
+
+import sys
+from pathlib import Path
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.compare import align_chunks, compare_records #noqa: E402
+
+
+def test_align_identical():
+    chunks = ["a", "b", "c"]
+    assert align_chunks(chunks, chunks) == [(0, 0, "same"), (1, 1, "same"), (2, 2, "same")]
+
+
+def test_align_insertion():
+    assert align_chunks(["a", "b", "c"], ["a", "x", "b", "c"]) == [
+        (0, 0, "same"), (None, 1, "added"), (1, 2, "same"), (2, 3, "same")
+    ]
+
+
+def test_align_deletion():
+    assert align_chunks(["a", "b", "c", "d"], ["a", "c", "d"]) == [
+        (0, 0, "same"), (1, None, "removed"), (2, 1, "same"), (3, 2, "same")
+    ]
+
+
+def test_align_rewrite_in_place():
+    assert align_chunks(["a", "b", "c"], ["a", "x", "c"]) == [(0, 0, "same"), (1, 1, "changed"), (2, 2, "same")]
+
+
+def test_align_keeps_later_chunks_after_insertion_at_top():
+    b = [f"h{i}" for i in range(100)]
+    c = ["new"] + b
+    aligned = align_chunks(b, c)
+    assert aligned[0] == (None, 0, "added")
+    assert [kind for _, _, kind in aligned[1:]] == ["same"] * 100
+
+
+def test_align_repeated_chunks():
+    #repeated chunks (blank or boilerplate sections) are not unique anchors, but still line up
+    assert align_chunks(["x", "a", "x", "b", "x"], ["x", "a", "x", "y", "b", "x"]) == [
+        (0, 0, "same"), (1, 1, "same"), (2, 2, "same"), (None, 3, "added"), (3, 4, "same"), (4, 5, "same")
+    ]
+
+
+def test_align_empty_sides():
+    assert align_chunks([], ["a"]) == [(None, 0, "added")]
+    assert align_chunks(["a"], []) == [(0, None, "removed")]
+
+
+def test_align_large_insertion_in_the_middle():
+    b = [f"h{i}" for i in range(5000)]
+    c = b[:2500] + ["new"] + b[2500:]
+    aligned = align_chunks(b, c)
+    assert aligned[2500] == (None, 2500, "added")
+    assert sum(kind == "same" for _, _, kind in aligned) == 5000
+
+
+def _text(chunks: list) -> dict:
+    return {"kind": "text", "hash": "|".join(chunks), "snapshot": None,
+            "chunking": {"method": "lines", "max_lines": 20}, "chunks": chunks}
+
+
+def test_moved_chunk_is_not_counted_as_tampering():
+    b = {"path": "a.txt", "raw_hash": "1", "text": _text(["a", "b", "c", "d"])}
+    c = {"path": "a.txt", "raw_hash": "2", "text": _text(["b", "c", "d", "a"])}
+    info = compare_records(b, c)["chunk_info"]
+    assert info["moved"] == [[0, 3]]
+    assert info["added"] == info["removed"] == info["changed"] == 0
+    assert info["tamper_ratio"] == 0
+    assert info["current_to_baseline"] == [1, 2, 3, 0]
+
+
+def test_moved_and_changed_chunks():
+    b = {"path": "a.txt", "raw_hash": "1", "text": _text(["a", "b", "c", "d"])}
+    c = {"path": "a.txt", "raw_hash": "2", "text": _text(["d", "a", "x", "c"])}
+    info = compare_records(b, c)["chunk_info"]
+    assert info["moved"] == [[3, 0]]
+    assert info["changed_indices"] == [2]
+    assert info["removed"] == 0 and info["added"] == 0
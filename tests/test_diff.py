@@ -0,0 +1,141 @@
+#tests for manifest-vs-manifest comparison: the streaming merge-join and --diff
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.cli import diff_manifests #noqa: E402
+from fic.compare import compare_baselines, iter_changes #noqa: E402
+from fic.manifest import load, save #noqa: E402
+from fic.scanner import tree_hash_mismatch #noqa: E402
+
+
+def _records(spec: dict) -> list:
+    return [{"path": path, "raw_hash": h, "text": None} for path, h in sorted(spec.items())]
+
+
+def test_iter_changes_merge_join():
+    base = _records({"a": "1", "b": "2", "d": "4", "e": "5"})
+    curr = _records({"a": "1", "b": "9", "c": "3", "e": "5", "f": "6"})
+    changes = [(kind, path) for kind, path, *_ in iter_changes(iter(base), iter(curr))]
+    assert changes == [("modified", "b"), ("added", "c"), ("deleted", "d"), ("added", "f")]
+
+
+def test_iter_changes_matches_compare_baselines():
+    base = _records({f"p{i:03d}": str(i) for i in range(0, 60)})
+    curr = _records({f"p{i:03d}": str(i if i % 7 else -i) for i in range(10, 70)})
+    streamed = {"modified": [], "added": [], "deleted": []}
+    for kind, path, *_ in iter_changes(iter(base), iter(curr)):
+        streamed[kind].append(path)
+    modified, added, deleted = compare_baselines({"files": base}, {"files": curr})
+    assert streamed == {"modified": list(modified), "added": added, "deleted": deleted}
+
+
+def test_iter_changes_empty_sides():
+    recs = _records({"a": "1", "b": "2"})
+    assert [k for k, *_ in iter_changes([], recs)] == ["added", "added"]
+    assert [k for k, *_ in iter_changes(recs, [])] == ["deleted", "deleted"]
+    assert list(iter_changes([], [])) == []
+
+
+def test_iter_changes_rejects_unsorted_stream():
+    unsorted = [{"path": "b", "raw_hash": "1"}, {"path": "a", "raw_hash": "1"}]
+    with pytest.raises(ValueError):
+        list(iter_changes(unsorted, []))
+    duplicated = _records({"a": "1"}) * 2
+    with pytest.raises(ValueError):
+        list(iter_changes([], duplicated))
+
+
+def test_tree_hash_settings_must_match():
+    off = {"tree_hash": None}
+    small = {"tree_hash": {"min_size": 1 << 20, "segment_size": 1 << 20, "algorithm": "tree-sha256"}}
+    other_segments = {"tree_hash": {"min_size": 1 << 20, "segment_size": 2 << 20, "algorithm": "tree-sha256"}}
+    assert tree_hash_mismatch(off, {}) is None
+    assert tree_hash_mismatch(small, dict(small)) is None
+    assert tree_hash_mismatch(off, small) == "off vs from 1 MiB, 1 MiB segments"
+    assert tree_hash_mismatch(small, other_segments) == "from 1 MiB, 1 MiB segments vs from 1 MiB, 2 MiB segments"
+
+
+def test_tree_hash_settings_must_match():
+    off = {"tree_hash": None}
+    small = {"tree_hash": {"min_size": 1 << 20, "segment_size": 1 << 20, "algorithm": "tree-sha256"}}
+    other_segments = {"tree_hash": {"min_size": 1 << 20, "segment_size": 2 << 20, "algorithm": "tree-sha256"}}
+    assert tree_hash_mismatch(off, {}) is None
+    assert tree_hash_mismatch(small, dict(small)) is None
+    assert tree_hash_mismatch(off, small) == "off vs from 1 MiB, 1 MiB segments"
+    assert tree_hash_mismatch(small, other_segments) == "from 1 MiB, 1 MiB segments vs from 1 MiB, 2 MiB segments"
+
+
+def _save_records(path: Path, spec: dict, fmt: str) -> Path:
+    save({"algorithm": "sha256", "files": _records(spec)}, str(path), "sha256", fmt=fmt)
+    return path
+
+
+class _Counting:
+    """Iterator wrapper that counts how many records have been pulled"""
+
+    def __init__(self, records):
+        self._records = records
+        self.pulled = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        rec = next(self._records)
+        self.pulled += 1
+        return rec
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_streamed_manifests_are_consumed_lazily(tmp_path, fmt):
+    n = 2000
+    old = {f"p{i:05d}": str(i) for i in range(n)}
+    new = dict(old, p00003="changed")
+    suffix = ".vlb" if fmt == "binary" else ".jsonl"
+    old_files = load(str(_save_records(tmp_path / f"old{suffix}", old, fmt)), stream=True)["files"]
+    new_files = load(str(_save_records(tmp_path / f"new{suffix}", new, fmt)), stream=True)["files"]
+    assert not isinstance(old_files, (list, tuple)) and not isinstance(new_files, (list, tuple))
+
+    base, curr = _Counting(old_files), _Counting(new_files)
+    changes = iter_changes(base, curr)
+    kind, path, *_ = next(changes)
+    assert (kind, path) == ("modified", "p00003")
+    #the first change arrives after a handful of records, not after loading either manifest
+    assert base.pulled < 10 and curr.pulled < 10
+
+    assert list(changes) == [] #the rest is unchanged, and exhausting the streams checks both signatures
+    assert base.pulled == curr.pulled == n
+
+
+def _diff_report(tmp_path) -> dict:
+    return json.loads((tmp_path / "old.diff.report.json").read_text(encoding="utf-8"))
+
+
+def test_diff_manifests_writes_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) #verilite.log
+    _save_records(tmp_path / "old.jsonl", {"a": "1", "b": "2", "c": "3"}, "jsonl")
+    _save_records(tmp_path / "new.jsonl", {"a": "1", "b": "9", "d": "4"}, "jsonl")
+    diff_manifests(str(tmp_path / "old.jsonl"), str(tmp_path / "new.jsonl"))
+    report = _diff_report(tmp_path)
+    assert report["summary"] == {"modified": 1, "added": 1, "deleted": 1}
+    assert [m["path"] for m in report["modified"]] == ["b"]
+
+
+def test_diff_manifests_tampered_stream_writes_nothing(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path) #verilite.log
+    _save_records(tmp_path / "old.jsonl", {"a": "1", "b": "2"}, "jsonl")
+    new = _save_records(tmp_path / "new.jsonl", {"a": "1", "b": "9"}, "jsonl")
+    with open(new, "a", encoding="utf-8") as f:
+        f.write('{"path":"z","raw_hash":"0"}\n')
+    with pytest.raises(SystemExit):
+        diff_manifests(str(tmp_path / "old.jsonl"), str(new))
+    out = capsys.readouterr().out
+    assert "tampered" in out and "verified" not in out
+    assert not (tmp_path / "old.diff.report.json").exists()
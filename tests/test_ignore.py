@@ -0,0 +1,96 @@
+#tests for exclude rules: name, anchored and directory-only patterns, negation and pruning
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.ignore import ExcludeRules, read_ignore_file #noqa: E402
+from fic.scanner import build_baseline #noqa: E402
+from conftest import write_text #noqa: E402
+
+
+@pytest.mark.parametrize("rel, is_dir, excluded", [
+    ("a.tmp", False, True),
+    ("deep/down/a.tmp", False, True),
+    ("a.tmp.txt", False, False),
+    ("cache", True, True),
+    ("src/cache", True, True),
+    ("src/cache", False, True), #a plain name matches files too
+])
+def test_name_patterns_match_at_any_depth(rel, is_dir, excluded):
+    assert ExcludeRules(["*.tmp", "cache"]).match(rel, is_dir) is excluded
+
+
+@pytest.mark.parametrize("rel, excluded", [
+    ("build", True),
+    ("src/build", False), #a leading slash anchors the pattern to the scan root
+    ("docs/build", True),
+    ("old/docs/build", False),
+    ("docs/api/build", False),
+])
+def test_anchored_patterns_match_from_the_root(rel, excluded):
+    assert ExcludeRules(["/build", "docs/build"]).match(rel, True) is excluded
+
+
+def test_star_stays_in_one_directory_and_double_star_spans_several():
+    rules = ExcludeRules(["docs/*.md", "logs/**/*.gz"])
+    assert rules.match("docs/readme.md", False)
+    assert not rules.match("docs/api/readme.md", False)
+    assert rules.match("logs/a.gz", False)
+    assert rules.match("logs/2026/10/a.gz", False)
+    assert not rules.match("other/logs/a.gz", False)
+
+
+def test_trailing_slash_matches_directories_only():
+    rules = ExcludeRules(["node_modules/"])
+    assert rules.match("web/node_modules", True)
+    assert not rules.match("web/node_modules", False)
+
+
+def test_negation_last_matching_pattern_wins():
+    rules = ExcludeRules(["*.log", "!keep.log"])
+    assert rules.match("x/debug.log", False)
+    assert not rules.match("x/keep.log", False)
+    #an exclude after the negation takes the file out again
+    assert ExcludeRules(["*.log", "!keep.log", "x/*.log"]).match("x/keep.log", False)
+    assert ExcludeRules(["\\!bang"]).match("!bang", False) #escaped, not a negation
+
+
+def test_negation_cannot_reinclude_below_an_excluded_directory():
+    rules = ExcludeRules(["cache/", "!cache/keep.txt"])
+    assert not rules.match("cache/keep.txt", False) #the file pattern alone would keep it
+    assert rules.covers("cache/keep.txt") #but its directory is pruned
+
+
+def test_character_classes():
+    rules = ExcludeRules(["file[0-9].txt", "[!a]*.bak"])
+    assert rules.match("file3.txt", False) and not rules.match("fileX.txt", False)
+    assert rules.match("b.bak", False) and not rules.match("a.bak", False)
+
+
+def test_scan_prunes_excluded_directories(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    write_text(data / "keep.txt", "keep\n")
+    write_text(data / "notes.log", "dropped\n")
+    write_text(data / "important.log", "kept by negation\n")
+    write_text(data / ".git" / "objects" / "x", "pruned\n")
+    write_text(data / "build" / "out.txt", "anchored, pruned\n")
+    write_text(data / "src" / "build" / "main.txt", "not at the root, kept\n")
+    write_text(data / ".veriliteignore", "# comment\n.git/\n/build\n*.log\n!important.log\n")
+    assert read_ignore_file(data) == [".git/", "/build", "*.log", "!important.log"]
+
+    listed = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: listed.append(Path(path).name) or real_scandir(path))
+    scan = build_baseline(
+        str(data), "sha256", str(tmp_path / "baseline.json"), snapshot_dir=str(tmp_path / "snaps"),
+        excludes=read_ignore_file(data)
+    )
+    paths = sorted(rec["path"].replace("\\", "/") for rec in scan["files"])
+    assert paths == [".veriliteignore", "important.log", "keep.txt", "src/build/main.txt"]
+    assert ".git" not in listed and "objects" not in listed #never descended into
@@ -1 +1,39 @@
-#Unit tests for manifest
\ No newline at end of file
+#tests for manifest save/load in every format and per-format signature files
+
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.manifest import load, signature_path, MANIFEST_FORMATS #noqa: E402
+from fic.records import FileRecord, as_dict #noqa: E402
+
+
+@pytest.mark.parametrize("fmt", MANIFEST_FORMATS)
+def test_round_trip(saved, baseline, fmt):
+    loaded = load(str(saved(fmt)))
+    assert loaded["algorithm"] == "sha256"
+    assert loaded["base_dir"] == baseline["base_dir"]
+    assert loaded["merkle"] == baseline["merkle"]
+    assert [as_dict(rec) for rec in loaded["files"]] == baseline["files"]
+
+
+@pytest.mark.parametrize("fmt", MANIFEST_FORMATS)
+def test_round_trip_compact_and_stream(saved, baseline, fmt):
+    path = saved(fmt)
+    compact = load(str(path), compact_records=True)
+    assert all(isinstance(rec, FileRecord) for rec in compact["files"])
+    assert [rec.to_dict() for rec in compact["files"]] == baseline["files"]
+    if fmt != "json": #indented JSON is always loaded whole
+        streamed = load(str(path), stream=True)
+        assert [as_dict(rec) for rec in streamed["files"]] == baseline["files"]
+
+
+def test_formats_with_the_same_stem_keep_their_own_signature(saved, baseline):
+    paths = [saved(fmt) for fmt in MANIFEST_FORMATS]
+    assert len({signature_path(p, fmt) for p, fmt in zip(paths, MANIFEST_FORMATS)}) == 3
+    for path in paths: #saving the others must not have replaced its signature
+        assert len(load(str(path))["files"]) == len(baseline["files"])
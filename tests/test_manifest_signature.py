@@ -0,0 +1,74 @@
+#tests for single-read manifest loading: tampering, truncation and the streamed signature check
+
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.manifest import load, signature_path, MANIFEST_FORMATS #noqa: E402
+
+
+def _load_all(path: Path, stream: bool) -> dict:
+    data = load(str(path), stream=stream)
+    data["files"] = list(data["files"]) #a streamed load checks its signature when exhausted
+    return data
+
+
+@pytest.mark.parametrize("fmt", MANIFEST_FORMATS)
+def test_flipped_byte_is_tampering(saved, fmt, capsys):
+    path = saved(fmt)
+    raw = bytearray(path.read_bytes())
+    raw[len(raw) // 2] ^= 0x01
+    path.write_bytes(bytes(raw))
+    with pytest.raises(SystemExit) as exc:
+        load(str(path))
+    assert exc.value.code == 1
+    assert "tampered" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("fmt", MANIFEST_FORMATS)
+@pytest.mark.parametrize("cut", [1, 37, 200])
+def test_truncated_file_is_tampering(saved, fmt, cut, capsys):
+    path = saved(fmt)
+    raw = path.read_bytes()
+    path.write_bytes(raw[:-cut])
+    for stream in (False, True):
+        with pytest.raises(SystemExit) as exc:
+            _load_all(path, stream)
+        assert exc.value.code == 1
+        assert "tampered" in capsys.readouterr().out
+
+
+def test_appended_record_is_tampering(saved, capsys):
+    path = saved("jsonl")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path":"zzz.txt","raw_hash":"00"}\n')
+    with pytest.raises(SystemExit):
+        load(str(path))
+    assert "tampered" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_stream_checks_signature_after_the_last_record(saved, baseline, fmt, capsys):
+    path = saved(fmt)
+    raw = bytearray(path.read_bytes())
+    raw[-2] ^= 0x01 #inside the last record, after every other one has parsed
+    path.write_bytes(bytes(raw))
+    files = load(str(path), stream=True)["files"]
+    read = [next(files) for _ in range(len(baseline["files"]) - 1)]
+    assert len(read) == len(baseline["files"]) - 1 #records arrive before the file is trusted
+    with pytest.raises(SystemExit) as exc:
+        list(files)
+    assert exc.value.code == 1
+    assert "tampered" in capsys.readouterr().out
+
+
+def test_missing_signature(saved, capsys):
+    path = saved("jsonl")
+    signature_path(path, "jsonl").unlink()
+    with pytest.raises(SystemExit):
+        load(str(path))
+    assert "signature file is missing" in capsys.readouterr().out
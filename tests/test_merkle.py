@@ -0,0 +1,60 @@
+#tests for Merkle directory digests and the unchanged-subtree shortcut in compare_baselines
+
+import os
+import sys
+from pathlib import Path
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.compare import compare_baselines #noqa: E402
+from fic.merkle import build_tree, changed_dirs, paths_in_dirs #noqa: E402
+
+
+def test_merkle_shortcut_gives_the_same_result(scans):
+    baseline, current = scans
+    assert baseline["merkle"] and current["merkle"]
+    with_merkle = compare_baselines(baseline, current)
+    without = compare_baselines(dict(baseline, merkle=None), dict(current, merkle=None))
+    assert with_merkle == without
+
+    modified, added, deleted = with_merkle
+    sep = os.sep
+    assert list(modified) == [f"edit{sep}f1.txt"]
+    assert added == [f"edit{sep}inner{sep}new.txt"]
+    assert deleted == [f"gone{sep}f2.txt"]
+
+
+def test_merkle_unchanged_tree(scans):
+    baseline, _ = scans
+    assert compare_baselines(baseline, baseline) == ({}, [], [])
+
+
+def _files(spec: dict) -> list:
+    return [{"path": path, "raw_hash": h, "text": None} for path, h in sorted(spec.items())]
+
+
+def test_digests_do_not_depend_on_record_order():
+    spec = {"a/x": "01", "a/b/y": "02", "c/z": "03", "top": "04"}
+    records = _files(spec)
+    assert build_tree(records, "sha256", "/") == build_tree(records[::-1], "sha256", "/")
+
+
+def test_change_marks_only_its_ancestors():
+    spec = {"a/x": "01", "a/b/y": "02", "c/z": "03", "top": "04"}
+    before = build_tree(_files(spec), "sha256", "/")
+    after = build_tree(_files(dict(spec, **{"a/b/y": "ff"})), "sha256", "/")
+    assert changed_dirs(before, after) == {"", "a", "a/b"}
+    assert changed_dirs(before, before) == set()
+
+
+def test_trees_from_other_algorithms_are_not_compared():
+    records = _files({"a/x": "01"})
+    assert changed_dirs(build_tree(records, "sha256", "/"), build_tree(records, "blake2b", "/")) is None
+    assert changed_dirs(None, build_tree(records, "sha256", "/")) is None
+
+
+def test_paths_in_dirs_skips_unchanged_subtrees():
+    paths = sorted(["a/x", "a/b/y", "a/b/c/z", "d/w", "top"])
+    assert paths_in_dirs(paths, {"", "a", "a/b"}, "/") == ["a/b/y", "a/x", "top"]
+    assert paths_in_dirs(paths, {"a/b/c"}, "/") == ["a/b/c/z"]
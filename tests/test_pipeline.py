@@ -0,0 +1,101 @@
+#tests for the pipelined scan: same baseline as the serial path, and the byte budget
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.pipeline import ByteBudget #noqa: E402
+from fic.scanner import PipelineOptions, ScanOptions, build_baseline #noqa: E402
+from fic.utils import default_chunking #noqa: E402
+from conftest import write_text #noqa: E402
+
+
+def _scan(tmp_path: Path, data: Path, name: str, options: ScanOptions, pipeline=None, stats=None) -> dict:
+    return build_baseline(
+        str(data), "sha256", str(tmp_path / f"{name}.json"), snapshot_dir=str(tmp_path / name),
+        options=options, pipeline=pipeline, pipeline_stats=stats
+    )
+
+
+@pytest.mark.parametrize("options", [
+    ScanOptions(),
+    ScanOptions(chunking=default_chunking("cdc"), digests=("md5",), snapshot_compression="zlib"),
+    ScanOptions(tree_hash={"min_size": 8192, "segment_size": 4096}),
+], ids=["default", "cdc-md5-zlib", "tree-hash"])
+def test_pipeline_builds_the_same_baseline(tmp_path, data_tree, options):
+    for d in range(4):
+        for i in range(6):
+            write_text(data_tree / f"dir{d}" / f"f{i}.txt", "".join(f"{d} {i} line {n}\n" for n in range(30 * (i + 1))))
+    write_text(data_tree / "large.log", "".join(f"event {n}\n" for n in range(3000))) #larger than the budget below
+    (data_tree / "large.bin").write_bytes(bytes(range(256)) * 100)
+
+    serial = _scan(tmp_path, data_tree, "serial", options)
+    stats = {}
+    tight = PipelineOptions(hash_workers=3, extract_workers=2, queue_size=2, buffer_bytes=1024)
+    piped = _scan(tmp_path, data_tree, "piped", options, pipeline=tight, stats=stats)
+
+    assert piped["files"] == serial["files"]
+    assert piped["merkle"] == serial["merkle"]
+    assert stats["buffer"]["peak_bytes"] <= max(1024, (data_tree / "large.log").stat().st_size)
+
+
+def test_budget_lets_an_oversized_item_through_when_empty():
+    budget = ByteBudget(10)
+    budget.acquire(100) #would never fit, must not block on an empty budget
+    assert budget.used == 100
+    budget.release(100)
+    assert budget.used == 0 and budget.peak == 100
+
+
+def _acquire_in_thread(budget: ByteBudget, n: int, done: list) -> threading.Thread:
+    def run():
+        budget.acquire(n)
+        done.append(n)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_until(check, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_oversized_item_waits_for_the_budget_to_drain():
+    budget = ByteBudget(10)
+    budget.acquire(4)
+    done = []
+    big = _acquire_in_thread(budget, 100, done)
+    time.sleep(0.1)
+    assert done == [] #4 bytes still held
+    budget.release(4)
+    big.join(5)
+    assert done == [100]
+
+
+def test_small_items_cannot_starve_a_waiting_oversized_one():
+    budget = ByteBudget(10)
+    budget.acquire(4)
+    done = []
+    big = _acquire_in_thread(budget, 100, done)
+    assert _wait_until(lambda: budget._next_ticket == 2) #the large item is waiting
+    small = _acquire_in_thread(budget, 1, done)
+    time.sleep(0.1)
+    assert done == [] #1 byte would fit, but it queues behind the large item
+
+    budget.release(4)
+    big.join(5)
+    assert done == [100]
+    budget.release(100)
+    small.join(5)
+    assert done == [100, 1]
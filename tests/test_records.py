@@ -0,0 +1,75 @@
+#tests for the slotted FileRecord, the binary record codec and comparing compact records
+
+import sys
+from pathlib import Path
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.compare import compare_baselines #noqa: E402
+from fic.records import compact, decode_record, encode_record #noqa: E402
+
+
+def _record(**changes) -> dict:
+    rec = {
+        "path": "dir/file.txt",
+        "ext": ".txt",
+        "size": 1234,
+        "mtime": 1700000000,
+        "ctime": 1700000001,
+        "mode": 33188,
+        "mtime_ns": 1700000000123456789,
+        "ctime_ns": 1700000001123456789,
+        "inode": 42,
+        "raw_hash": "ab" * 32,
+        "text": {
+            "kind": "text",
+            "hash": "cd" * 32,
+            "snapshot": "dir/file.txt.txt",
+            "chunking": {"method": "lines", "max_lines": 20},
+            "chunks": ["01" * 32, "02" * 32],
+        },
+    }
+    rec.update(changes)
+    return rec
+
+
+def test_record_codec_round_trip():
+    rec = _record(digests={"md5": "ef" * 16}, check="full")
+    assert decode_record(encode_record(rec)).to_dict() == rec
+
+
+def test_record_codec_without_text_or_hash():
+    rec = _record(raw_hash=None, text=None)
+    decoded = decode_record(encode_record(rec))
+    assert decoded.get("raw_hash") is None
+    assert decoded.get("text") is None
+    assert decoded.to_dict() == rec
+
+
+def test_record_codec_missing_stat_fields():
+    #records from before the full-resolution stat tuple was stored
+    rec = _record()
+    for key in ("mtime_ns", "ctime_ns", "inode"):
+        del rec[key]
+    decoded = decode_record(encode_record(rec)).to_dict()
+    assert decoded["mtime_ns"] is None and decoded["ctime_ns"] is None and decoded["inode"] is None
+    assert {k: v for k, v in decoded.items() if k not in ("mtime_ns", "ctime_ns", "inode")} == rec
+
+
+def test_record_codec_text_without_hashes():
+    rec = _record(text={"kind": "pdf", "hash": None, "snapshot": None, "chunking": None, "chunks": None})
+    assert decode_record(encode_record(rec)).to_dict() == rec
+
+
+def test_record_codec_unpacked_chunks():
+    #chunk lists that are not fixed-size hex digests are kept as a list
+    rec = _record()
+    rec["text"]["chunks"] = ["not-hex", "01" * 32]
+    assert decode_record(encode_record(rec)).to_dict() == rec
+
+
+def test_compact_records_compare_like_dicts(scans):
+    baseline, current = scans
+    compacted = dict(current, files=[compact(rec) for rec in current["files"]])
+    assert compare_baselines(baseline, compacted) == compare_baselines(baseline, current)
@@ -0,0 +1,75 @@
+#tests for scanning: the fast-verify stat cache and its racy-file protection
+
+import json
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic import scanner #noqa: E402
+from fic.cli import create_baseline, verify #noqa: E402
+from fic.scanner import build_file_record #noqa: E402
+
+
+def _aged(stat: os.stat_result, seconds: int) -> SimpleNamespace:
+    #the same stat tuple, as if the file had last changed some seconds ago
+    shift = seconds * 1_000_000_000
+    return SimpleNamespace(
+        st_size=stat.st_size, st_mode=stat.st_mode, st_ino=stat.st_ino,
+        st_mtime=stat.st_mtime - seconds, st_ctime=stat.st_ctime - seconds,
+        st_mtime_ns=stat.st_mtime_ns - shift, st_ctime_ns=stat.st_ctime_ns - shift,
+    )
+
+
+def _record(path: Path, stat, reference=None) -> dict:
+    return build_file_record(path, path.parent, path.parent / "snaps", "sha256", reference=reference, stat=stat)
+
+
+def test_settled_file_is_trusted_by_its_stat_tuple(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"A" * 64)
+    stat = _aged(path.stat(), 60)
+    first = _record(path, stat)
+    assert first["mtime_ns"] == stat.st_mtime_ns
+
+    path.write_bytes(b"B" * 64)
+    #the stat tuple is unchanged, so the reference is trusted without reading the file
+    assert _record(path, stat, reference=first)["raw_hash"] == first["raw_hash"]
+
+
+def test_same_size_rewrite_in_racy_window_is_rehashed(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"A" * 64)
+    stat = path.stat() #just written: within the racy window
+    first = _record(path, stat)
+    assert first["mtime_ns"] is None and first["ctime_ns"] is None and first["inode"] is None
+
+    #rewritten in the same timestamp tick: size and stat tuple look unchanged
+    path.write_bytes(b"B" * 64)
+    second = _record(path, stat, reference=first)
+    assert second["raw_hash"] != first["raw_hash"]
+
+
+def _report(baseline: Path) -> dict:
+    return json.loads(baseline.with_suffix(".report.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("paranoid, detected", [(0, False), (1, True)])
+def test_paranoid_cycle_ignores_the_stat_cache(tmp_path, monkeypatch, paranoid, detected):
+    monkeypatch.chdir(tmp_path) #verilite.log
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("original\n", encoding="utf-8")
+    baseline = tmp_path / "baseline.json"
+    create_baseline(str(data), str(baseline))
+
+    (data / "a.txt").write_text("tampered\n", encoding="utf-8")
+    #a stat cache that trusts every file, like a rewrite that left the stat tuple alone
+    monkeypatch.setattr(scanner, "stat_matches", lambda stat, record: record is not None)
+    verify(str(data), str(baseline), fast=True, paranoid=paranoid)
+    assert (_report(baseline)["summary"]["modified"] == 1) is detected
@@ -0,0 +1,65 @@
+#tests for compressed snapshots framed per chunk and lazy chunk reads
+
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic import snapfile #noqa: E402
+from fic.snapfile import FramedSnapshot, encode_snapshot, read_snapshot_text, snapshot_spans, SNAPSHOT_CODECS #noqa: E402
+from fic.utils import chunk_spans, default_chunking #noqa: E402
+
+TEXT = "".join(
+    ("\n" if i % 37 == 0 else f"entry {i}: transfer {i * 7 % 101} units\n") for i in range(400)
+) + "\n\n\nlast line without newline"
+
+
+def _write(tmp_path: Path, text: str, method: str, codec: str) -> Path:
+    path = tmp_path / f"snap.txt{snapfile.COMPRESSED_SUFFIX}"
+    path.write_bytes(encode_snapshot(text, default_chunking(method), codec))
+    return path
+
+
+@pytest.mark.parametrize("codec", SNAPSHOT_CODECS)
+@pytest.mark.parametrize("method", ["lines", "cdc"])
+def test_round_trip(tmp_path, codec, method):
+    path = _write(tmp_path, TEXT, method, codec)
+    assert read_snapshot_text(path) == TEXT #byte-exact, blank lines and missing final newline included
+    snap = snapshot_spans(path, default_chunking(method))
+    assert isinstance(snap, FramedSnapshot) and snap.codec == codec
+    assert [snap[i] for i in range(len(snap))] == chunk_spans(TEXT, default_chunking(method))
+
+
+@pytest.mark.parametrize("text", ["", "\n\n", "one line", "crlf\r\nlines\r\n"])
+def test_round_trip_edge_cases(tmp_path, text):
+    path = _write(tmp_path, text, "lines", "zlib")
+    assert read_snapshot_text(path) == text
+    snap = FramedSnapshot(path)
+    assert [snap[i] for i in range(len(snap))] == chunk_spans(text)
+
+
+@pytest.mark.parametrize("codec", SNAPSHOT_CODECS)
+def test_single_chunk_read_decompresses_one_frame(tmp_path, monkeypatch, codec):
+    path = _write(tmp_path, TEXT, "lines", codec)
+    snap = FramedSnapshot(path)
+    expected = chunk_spans(TEXT, default_chunking("lines"))[5]
+
+    calls = []
+    real = snapfile._decompress
+    monkeypatch.setattr(snapfile, "_decompress", lambda c, data: calls.append(len(data)) or real(c, data))
+    assert snap[5] == expected
+    assert calls == [snap._chunks[5][1]] #one frame, and only its compressed bytes were read
+
+
+def test_single_chunk_read_ignores_other_frames(tmp_path):
+    path = _write(tmp_path, TEXT, "lines", "zlib")
+    snap = FramedSnapshot(path)
+    expected = snap[5]
+    raw = bytearray(path.read_bytes())
+    offset, length = snap._chunks[0][0], snap._chunks[0][1]
+    raw[offset:offset + length] = b"\x00" * length #first frame no longer decompresses
+    path.write_bytes(bytes(raw))
+    assert FramedSnapshot(path)[5] == expected
@@ -0,0 +1,77 @@
+#tests for the content-addressed snapshot store: deduplication, reference lists and gc
+
+import os
+import sys
+import time
+from pathlib import Path
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.store import SnapshotStore #noqa: E402
+
+LIVE = "aa" + "11" * 31
+SHARED = "bb" + "22" * 31
+DEAD = "cc" + "33" * 31
+
+
+def _age(path: Path, seconds: int = 7200) -> None:
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def _filled(tmp_path) -> SnapshotStore:
+    store = SnapshotStore(tmp_path / "store")
+    for h in (LIVE, SHARED, DEAD):
+        _age(store.root / store.put(h, lambda h=h: h.encode()))
+    _age(store.root / store.put(LIVE, lambda: b"framed", suffix=".txt.vlz")) #the same text stored compressed
+    return store
+
+
+def test_put_writes_each_text_once(tmp_path):
+    store = SnapshotStore(tmp_path / "store")
+    calls = []
+    rel = store.put(LIVE, lambda: calls.append(1) or b"text")
+    assert store.put(LIVE, lambda: calls.append(1) or b"other") == rel
+    assert calls == [1]
+    assert (store.root / rel).read_bytes() == b"text"
+
+
+def test_gc_keeps_referenced_blobs_and_removes_the_rest(tmp_path):
+    store = _filled(tmp_path)
+    store.set_refs("baseline.json.baseline", [LIVE, SHARED])
+    assert store.gc() == 1
+    assert set(store.blobs()) == {f"{LIVE}.txt", f"{LIVE}.txt.vlz", f"{SHARED}.txt"}
+    assert not store.path_for(DEAD).exists()
+    assert not store.path_for(DEAD).parent.exists() #empty bucket removed too
+
+
+def test_blob_survives_while_any_manifest_refers_to_it(tmp_path):
+    store = _filled(tmp_path)
+    store.set_refs("baseline.json.baseline", [LIVE, SHARED])
+    store.set_refs("baseline.json.current", [SHARED, SHARED]) #duplicates count once
+    assert store.refcounts()[SHARED] == 2
+
+    store.set_refs("baseline.json.baseline", [LIVE]) #baseline rebuilt without it
+    store.gc()
+    assert store.path_for(SHARED).exists()
+    store.set_refs("baseline.json.current", [])
+    store.gc()
+    assert not store.path_for(SHARED).exists()
+    assert store.path_for(LIVE).exists()
+
+
+def test_gc_spares_recent_blobs_and_writes(tmp_path):
+    store = _filled(tmp_path)
+    fresh = store.path_for(DEAD[:2] + "44" * 31)
+    store.put(fresh.stem, lambda: b"just written") #not registered by its scan yet
+    (fresh.parent / ".tmp-inflight").write_bytes(b"partial")
+    stale_tmp = fresh.parent / ".tmp-crashed"
+    stale_tmp.write_bytes(b"partial")
+    _age(stale_tmp)
+
+    store.gc()
+    assert fresh.exists() and (fresh.parent / ".tmp-inflight").exists()
+    assert not stale_tmp.exists()
+    assert not store.path_for(DEAD).exists()
+    assert store.gc(grace=0) == 1 and not fresh.exists()
@@ -0,0 +1,107 @@
+#tests for hashing helpers: content-defined chunking and tree hashing of huge files
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+#makes the fic package importable without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fic.compare import compare_records #noqa: E402
+from fic.scanner import ScanOptions, build_file_record #noqa: E402
+from fic.utils import CDC_CHUNKING, calculate_chunk_hashes, chunk_line_bounds, default_chunking #noqa: E402
+from fic.utils import calculate_hash, calculate_tree_hash #noqa: E402
+
+
+def _lines(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    words = ("ledger", "exhibit", "transfer", "custody", "digest", "seal", "witness", "entry")
+    return [f"{i} " + " ".join(rng.choice(words) for _ in range(rng.randint(2, 8))) for i in range(n)]
+
+
+def test_cdc_boundaries_are_deterministic_and_cover_every_line():
+    lines = _lines(3000)
+    bounds = chunk_line_bounds(lines, default_chunking("cdc"))
+    assert bounds == chunk_line_bounds(list(lines), default_chunking("cdc"))
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(lines)
+    assert all(prev[1] == cur[0] for prev, cur in zip(bounds, bounds[1:]))
+    sizes = [end - start for start, end in bounds]
+    assert all(CDC_CHUNKING["min_lines"] <= n <= CDC_CHUNKING["max_lines"] for n in sizes[:-1])
+
+
+def test_cdc_boundaries_depend_only_on_nearby_lines():
+    #the same lines after a different prefix end up cut at the same places
+    lines = _lines(2000)
+    tail = set(chunk_line_bounds(lines, default_chunking("cdc")))
+    shifted = chunk_line_bounds(["other"] * 7 + lines, default_chunking("cdc"))
+    realigned = {(start - 7, end - 7) for start, end in shifted if start >= 7}
+    assert len(tail & realigned) >= 0.95 * len(tail)
+
+
+def _kept(before: list[str], after: list[str], method: str) -> float:
+    chunking = default_chunking(method)
+    old = calculate_chunk_hashes("\n".join(before), "sha256", chunking=chunking)
+    new = set(calculate_chunk_hashes("\n".join(after), "sha256", chunking=chunking))
+    return sum(h in new for h in old) / len(old)
+
+
+def test_line_inserted_at_top_keeps_most_cdc_chunks():
+    lines = _lines(3000)
+    edited = ["inserted line"] + lines
+    assert _kept(lines, edited, "cdc") >= 0.95
+    assert _kept(lines, edited, "lines") < 0.05 #fixed windows all shift by one line
+
+
+SEGMENT = 4096
+
+
+def _segmented_file(path: Path, segments: float = 4.75) -> Path:
+    path.write_bytes(random.Random(3).randbytes(int(SEGMENT * segments)))
+    return path
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+def test_tree_root_does_not_depend_on_worker_count(tmp_path, workers):
+    path = _segmented_file(tmp_path / "image.bin")
+    assert calculate_tree_hash(path, "sha256", SEGMENT, workers) == calculate_tree_hash(path, "sha256", SEGMENT, 1)
+
+
+def test_tree_root_covers_content_size_and_segment_size(tmp_path):
+    path = _segmented_file(tmp_path / "image.bin")
+    root, segments = calculate_tree_hash(path, "sha256", SEGMENT, 1)
+    assert len(segments) == 5
+    assert root != calculate_hash(path, "sha256") #tagged as a tree root, never equal to a plain digest
+    assert root != calculate_tree_hash(path, "sha256", SEGMENT * 2, 1)[0]
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert len(calculate_tree_hash(empty, "sha256", SEGMENT, 1)[1]) == 1
+
+
+def _tree_record(path: Path) -> dict:
+    options = ScanOptions(tree_hash={"min_size": SEGMENT, "segment_size": SEGMENT}, tree_workers=2)
+    return build_file_record(path, path.parent, path.parent / "snaps", "sha256", options=options)
+
+
+def test_changed_segment_is_the_only_one_flagged(tmp_path):
+    path = _segmented_file(tmp_path / "image.bin")
+    before = _tree_record(path)
+    assert before["raw_algorithm"] == "tree-sha256"
+
+    data = bytearray(path.read_bytes())
+    data[3 * SEGMENT + 17] ^= 0xFF
+    path.write_bytes(bytes(data))
+    info = compare_records(before, _tree_record(path))
+    assert info["raw_changed"]
+    assert info["segment_info"]["changed"] == [3]
+    assert info["segment_info"]["total_baseline"] == info["segment_info"]["total_current"] == 5
+
+
+def test_appended_segment_is_flagged(tmp_path):
+    path = _segmented_file(tmp_path / "image.bin")
+    before = _tree_record(path)
+    with open(path, "ab") as f:
+        f.write(b"x" * SEGMENT)
+    #the last partial segment grows and a new one starts after it
+    assert compare_records(before, _tree_record(path))["segment_info"]["changed"] == [4, 5]